@@ -0,0 +1,41 @@
+"""Micro-benchmark del pool de conexiones de DatabaseManager.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_db_pool
+"""
+from benchmarks.bench_utils import temp_db_path, ops_per_second, print_table
+from database.database_manager import DatabaseManager
+
+ITERATIONS = 2000
+
+
+def run(pool_size: int):
+    with temp_db_path() as db_path:
+        db = DatabaseManager(db_path, pool_size=pool_size)
+        db.seed_sample_data()
+        user_id = 1
+        post_id = 1
+        results = {
+            "get_posts_feed": ops_per_second(lambda: db.get_posts_feed(20), ITERATIONS),
+            "toggle_like": ops_per_second(lambda: db.toggle_like(user_id, post_id), ITERATIONS),
+            "get_unread_notifications_count": ops_per_second(
+                lambda: db.get_unread_notifications_count(2), ITERATIONS
+            ),
+        }
+        db.close()
+        return results
+
+
+def main():
+    before = run(pool_size=0)
+    after = run(pool_size=5)
+    rows = [
+        (name, f"{before[name]:.0f}", f"{after[name]:.0f}", f"x{after[name] / before[name]:.2f}")
+        for name in before
+    ]
+    print_table("Operaciones por segundo (sin pool vs pool + WAL)", rows,
+                ("operación", "sin pool", "con pool", "mejora"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Bytes de imágenes por página del feed: original copiado vs versiones redimensionadas.
+
+Uso (desde la raíz del repositorio, requiere Pillow):
+    python -m benchmarks.bench_feed_images [--width 4032] [--height 3024]
+
+Genera fotos sintéticas del tamaño de una cámara de celular (JPEG calidad 92
+con EXIF), las ingesta como UploadPage, crea los posts y suma los bytes que
+cargan una página del feed y la grilla del perfil antes (el original) y
+después (las versiones "feed" y "thumb").
+"""
+import argparse
+import os
+import random
+import time
+
+from benchmarks.bench_utils import percentile, print_table, temp_db_path
+from database.database_manager import DatabaseManager
+from database.models import Post, User
+from utils import image_pipeline
+
+# Igual que pages.home_page (no se importa para no requerir flet)
+FEED_PAGE_SIZE = 10
+
+
+def synthetic_photo(path: str, width: int, height: int, seed: int):
+    """Degradé con formas y ruido leve: detalle que sobrevive al reducir, como una foto"""
+    from PIL import Image, ImageDraw
+    rng = random.Random(seed)
+    photo = Image.merge("RGB", [Image.linear_gradient("L").rotate(rng.randrange(360)).resize((width, height))
+                                for _ in range(3)])
+    draw = ImageDraw.Draw(photo)
+    for _ in range(400):
+        x, y = rng.randrange(width), rng.randrange(height)
+        radius = rng.randrange(10, width // 8)
+        draw.ellipse((x, y, x + radius, y + radius // 2),
+                     fill=tuple(rng.randrange(256) for _ in range(3)),
+                     outline=(0, 0, 0), width=rng.randrange(1, 6))
+    photo = Image.blend(photo, Image.effect_noise((width, height), 40).convert("RGB"), 0.08)
+    exif = Image.Exif()
+    exif[0x010F] = "Cámara de ejemplo"  # Fabricante
+    exif[0x0112] = 1  # Orientación
+    photo.save(path, "JPEG", quality=92, exif=exif)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--width", type=int, default=4032)
+    parser.add_argument("--height", type=int, default=3024)
+    args = parser.parse_args()
+    if not image_pipeline.PIL_AVAILABLE:
+        print("Este benchmark requiere Pillow (pip install Pillow)")
+        return
+
+    with temp_db_path() as db_path:
+        base_dir = os.path.dirname(db_path)
+        db = DatabaseManager(db_path, blob_root=os.path.join(base_dir, "blobs"))
+        user_id = db.create_user(User(username="bench", email="bench@teamup.com",
+                                      password_hash="bench", full_name="Bench"))
+
+        originals = {}
+        ingest_times = []
+        for i in range(FEED_PAGE_SIZE):
+            source = os.path.join(base_dir, f"foto_{i}.jpg")
+            synthetic_photo(source, args.width, args.height, i)
+            start = time.perf_counter()
+            renditions = image_pipeline.ingest_image(source, db.store_blob)
+            ingest_times.append(time.perf_counter() - start)
+            image_url = renditions["full"].path
+            originals[image_url] = source
+            db.create_post(Post(user_id=user_id, caption=f"Post #{i}", image_url=image_url), renditions)
+
+        posts, _ = db.get_posts_feed_page(None, FEED_PAGE_SIZE)
+        sources = [post.image_url for post in posts]
+        rows = []
+        for label, rendition in (("feed", "feed"), ("perfil (grilla)", "thumb")):
+            paths = db.get_image_renditions(sources, rendition)
+            before = sum(os.path.getsize(originals[source]) for source in sources)
+            after = sum(os.path.getsize(paths[source]) for source in sources)
+            rows.append((label, f"{before / 1024:,.0f}", f"{after / 1024:,.0f}", f"{before / after:.0f}x"))
+        db.close()
+
+    print_table(f"KB de imágenes por página ({FEED_PAGE_SIZE} posts de {args.width}x{args.height}, "
+                f"{image_pipeline.output_format()})", rows, ("vista", "antes KB", "después KB", "reducción"))
+    print(f"\nIngesta por imagen: p50 {percentile(ingest_times, 50) * 1000:.0f} ms, "
+          f"p95 {percentile(ingest_times, 95) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
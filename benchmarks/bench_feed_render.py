@@ -0,0 +1,49 @@
+"""Costo de construir las tarjetas del feed: en frío vs con la caché de controles.
+
+Uso (desde la raíz del repositorio, requiere flet):
+    python -m benchmarks.bench_feed_render
+"""
+import time
+
+from benchmarks.bench_utils import temp_db_path, print_table
+from database.database_manager import DatabaseManager
+from database.models import Post, User
+from pages.home_page import HomePage
+from utils.theme_manager import ThemeManager
+
+POSTS = 1000
+
+
+def main():
+    with temp_db_path() as db_path:
+        db = DatabaseManager(db_path)
+        user_id = db.create_user(User(username="bench", email="bench@teamup.com",
+                                      password_hash="bench", full_name="Bench"))
+        for i in range(POSTS):
+            db.create_post(Post(user_id=user_id, caption=f"Post #{i}",
+                                image_url=f"https://picsum.photos/375/250?{i}"))
+        posts = db.get_posts_feed(POSTS)
+
+        theme_manager = ThemeManager()
+        home_page = HomePage(theme_manager, db)
+        colors = theme_manager.get_theme_colors()
+
+        start = time.perf_counter()
+        for post in posts:
+            home_page._create_feed_card(post, colors)
+        cold = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for post in posts:
+            home_page._create_feed_card(post, colors)
+        warm = time.perf_counter() - start
+        db.close()
+
+    print_table(f"Construcción de {POSTS} tarjetas del feed", [
+        ("frío", f"{cold * 1000:.1f}", home_page.card_cache.misses),
+        ("caliente", f"{warm * 1000:.1f}", home_page.card_cache.hits),
+    ], ("pasada", "ms", "miss/hit"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Feed de seguidos: fan-out-on-write vs fan-out-on-read vs híbrido.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_following_feed [--users 10000] [--follows-per-user 100]
+
+Con los valores por defecto genera 10k usuarios y 1M relaciones de seguimiento
+con popularidad sesgada (pocos autores concentran muchos seguidores).
+"""
+import argparse
+import random
+import time
+
+from benchmarks.bench_utils import temp_db_path, percentile, print_table
+from database.database_manager import DatabaseManager
+from database.models import Post
+from database.timeline import FANOUT_FOLLOWER_THRESHOLD
+
+STRATEGIES = (
+    ("fan-out-on-write", 10 ** 9),
+    ("fan-out-on-read", -1),
+    ("híbrido", FANOUT_FOLLOWER_THRESHOLD),
+)
+
+
+def populate(db: DatabaseManager, users: int, follows_per_user: int, posts: int):
+    rng = random.Random(42)
+    conn = db.get_connection()
+    conn.executemany(
+        "INSERT INTO users (id, username, email, password_hash, full_name) VALUES (?, ?, ?, '', ?)",
+        ((i, f"user{i}", f"user{i}@teamup.com", f"User {i}") for i in range(1, users + 1))
+    )
+
+    def follows():
+        for follower in range(1, users + 1):
+            followed = set()
+            while len(followed) < follows_per_user:
+                # Popularidad sesgada hacia los ids bajos
+                candidate = int(users * rng.random() ** 3) + 1
+                if candidate != follower:
+                    followed.add(candidate)
+            for following in followed:
+                yield follower, following
+
+    conn.executemany("INSERT INTO follows (follower_id, following_id) VALUES (?, ?)", follows())
+    conn.execute('''
+        UPDATE users SET
+            followers_count = (SELECT COUNT(*) FROM follows WHERE following_id = users.id),
+            following_count = (SELECT COUNT(*) FROM follows WHERE follower_id = users.id)
+    ''')
+    conn.executemany(
+        "INSERT INTO posts (user_id, caption, image_url, created_at) VALUES (?, ?, '', ?)",
+        ((rng.randint(1, users), f"Post {i}",
+          f"2025-01-{1 + i * 28 // posts:02d} {i % 24:02d}:{i % 60:02d}:{i % 59:02d}")
+         for i in range(posts))
+    )
+    conn.commit()
+    conn.close()
+
+
+def run_strategy(db_path: str, threshold: int, users: int, samples: int):
+    rng = random.Random(7)
+    db = DatabaseManager(db_path, fanout_threshold=threshold)
+
+    start = time.perf_counter()
+    db.rebuild_timeline()
+    rebuild = time.perf_counter() - start
+
+    write_times = []
+    for i in range(samples):
+        author = rng.randint(1, users)
+        start = time.perf_counter()
+        db.create_post(Post(user_id=author, caption=f"Bench {i}", image_url=""))
+        write_times.append(time.perf_counter() - start)
+
+    read_times = []
+    for _ in range(samples):
+        user_id = rng.randint(1, users)
+        start = time.perf_counter()
+        db.get_following_feed_page(user_id, None, 20)
+        read_times.append(time.perf_counter() - start)
+
+    conn = db.get_connection()
+    timeline_rows = conn.execute("SELECT COUNT(*) FROM timeline").fetchone()[0]
+    conn.close()
+    db.close()
+    return rebuild, write_times, read_times, timeline_rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--follows-per-user", type=int, default=100)
+    parser.add_argument("--posts", type=int, default=20000)
+    parser.add_argument("--samples", type=int, default=200)
+    args = parser.parse_args()
+
+    with temp_db_path() as db_path:
+        populate(DatabaseManager(db_path), args.users, args.follows_per_user, args.posts)
+        rows = []
+        for name, threshold in STRATEGIES:
+            rebuild, writes, reads, timeline_rows = run_strategy(db_path, threshold, args.users, args.samples)
+            rows.append((
+                name,
+                timeline_rows,
+                f"{rebuild:.1f}",
+                f"{percentile(writes, 50) * 1000:.2f}",
+                f"{percentile(writes, 95) * 1000:.2f}",
+                f"{percentile(reads, 50) * 1000:.2f}",
+                f"{percentile(reads, 95) * 1000:.2f}",
+            ))
+
+    print_table(
+        f"Feed de seguidos ({args.users} usuarios, {args.users * args.follows_per_user} follows)",
+        rows,
+        ("estrategia", "filas timeline", "rebuild s", "post p50 ms", "post p95 ms",
+         "feed p50 ms", "feed p95 ms")
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""Caché de imágenes remotas contra un servidor HTTP local que imita a pravatar/picsum.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_image_cache [--images 40] [--kb 60] [--latency 0.05]
+
+El servidor responde con ETag y Last-Modified, contesta 304 a las
+peticiones condicionales y agrega ``--latency`` segundos por respuesta para
+simular la red. Mide la primera descarga, la precarga de una página en
+segundo plano, los aciertos, la revalidación de entradas vencidas tras
+reabrir la caché y el desalojo LRU con un tope menor que el total.
+"""
+import argparse
+import os
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.bench_utils import percentile, print_table, temp_db_path
+from utils.image_cache import ImageCache
+
+LAST_MODIFIED = "Mon, 01 Jan 2024 00:00:00 GMT"
+
+# Vigencia que anuncia el servidor; se espera a que venza para medir la revalidación
+MAX_AGE_SECONDS = 2
+
+
+class StandInServer:
+    """Servidor HTTP en un puerto libre; cuenta peticiones, 304 y bytes enviados"""
+
+    def __init__(self, image_bytes: int, latency: float):
+        self.image_bytes = image_bytes
+        self.latency = latency
+        self.requests = self.not_modified = self.bytes_sent = 0
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                time.sleep(server.latency)
+                etag = f'"{self.path}-v1"'
+                with server._lock:
+                    server.requests += 1
+                    if self.headers.get("If-None-Match") == etag:
+                        server.not_modified += 1
+                        self.send_response(304)
+                        self.send_header("ETag", etag)
+                        self.end_headers()
+                        return
+                    server.bytes_sent += server.image_bytes
+                body = (self.path.encode() * server.image_bytes)[:server.image_bytes]
+                self.send_response(200)
+                self.send_header("Content-Type", "image/jpeg")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", etag)
+                self.send_header("Last-Modified", LAST_MODIFIED)
+                self.send_header("Cache-Control", f"max-age={MAX_AGE_SECONDS}")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", type=int, default=40)
+    parser.add_argument("--kb", type=int, default=60)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    server = StandInServer(args.kb * 1024, args.latency)
+    urls = [f"{server.url}/avatar/{i}.jpg" for i in range(args.images)]
+    rows = []
+    try:
+        with temp_db_path() as db_path:
+            root = os.path.join(os.path.dirname(db_path), "cache")
+
+            # Sin caché: cada tarjeta reconstruida vuelve a pedir la imagen
+            times = []
+            for url in urls[:10]:
+                start = time.perf_counter()
+                with urllib.request.urlopen(url) as response:
+                    response.read()
+                times.append(time.perf_counter() - start)
+            rows.append(("sin caché (por imagen)", f"{percentile(times, 50) * 1000:.1f}", 10))
+
+            cache = ImageCache(root)
+            start = time.perf_counter()
+            cache.prefetch(urls)
+            cache.wait()
+            prefetch_seconds = time.perf_counter() - start
+            rows.append((f"precarga de {args.images} en segundo plano (total)",
+                         f"{prefetch_seconds * 1000:.0f}", server.requests - 10))
+
+            requests_before = server.requests
+            times = []
+            for url in urls * 5:
+                start = time.perf_counter()
+                path = cache.resolve(url)
+                times.append(time.perf_counter() - start)
+                assert path != url, "la imagen debería estar en caché"
+            rows.append(("acierto (resolve)", f"{percentile(times, 50) * 1000:.3f}",
+                         server.requests - requests_before))
+            cache.close()
+
+            # Reabrir (el índice persiste) con las entradas ya vencidas: se sirven
+            # de disco y se revalidan con If-None-Match
+            time.sleep(MAX_AGE_SECONDS + 0.1)
+            cache = ImageCache(root)
+            requests_before, bytes_before = server.requests, server.bytes_sent
+            start = time.perf_counter()
+            for url in urls:
+                assert cache.resolve(url) != url, "el índice debería sobrevivir al reinicio"
+            cache.wait()
+            rows.append(("revalidación de vencidas (total)", f"{(time.perf_counter() - start) * 1000:.0f}",
+                         server.requests - requests_before))
+            revalidated_bytes = server.bytes_sent - bytes_before
+            cache.close()
+
+            # Tope de la mitad del total: se desalojan las menos usadas
+            cap = args.images * args.kb * 1024 // 2
+            cache = ImageCache(os.path.join(root, "lru"), max_bytes=cap)
+            cache.prefetch(urls)
+            cache.wait()
+            size = cache.size()
+            evicted = cache.stats["evicted"]
+            cache.close()
+    finally:
+        server.close()
+
+    print_table(f"Caché de imágenes ({args.images} imágenes de {args.kb} KB, "
+                f"latencia {args.latency * 1000:.0f} ms)", rows, ("caso", "ms", "peticiones HTTP"))
+    print(f"\nRevalidación: {server.not_modified} respuestas 304, {revalidated_bytes} bytes de imagen re-descargados")
+    print(f"LRU con tope de {cap // 1024} KB: {size['entries']} imágenes, {size['bytes'] // 1024} KB en disco, "
+          f"{evicted} desalojadas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Throughput de toggles de likes: transacción por toggle vs cola write-behind.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_like_write_behind
+"""
+import random
+import time
+
+from benchmarks.bench_utils import temp_db_path, print_table
+from database.database_manager import DatabaseManager
+
+TOGGLE_COUNTS = (1000, 10000, 100000)
+USERS = 100
+POSTS = 1000
+
+
+def populate(db: DatabaseManager):
+    conn = db.get_connection()
+    conn.executemany(
+        "INSERT INTO users (id, username, email, password_hash, full_name) VALUES (?, ?, ?, '', ?)",
+        ((i, f"user{i}", f"user{i}@teamup.com", f"User {i}") for i in range(1, USERS + 1))
+    )
+    conn.executemany(
+        "INSERT INTO posts (id, user_id, caption, image_url) VALUES (?, ?, '', '')",
+        ((i, 1 + i % USERS) for i in range(1, POSTS + 1))
+    )
+    conn.commit()
+    conn.close()
+
+
+def run(toggles: int, write_behind: bool) -> float:
+    rng = random.Random(toggles)
+    events = [(rng.randint(1, USERS), rng.randint(1, POSTS)) for _ in range(toggles)]
+    with temp_db_path() as db_path:
+        db = DatabaseManager(db_path)
+        populate(db)
+        if write_behind:
+            db.enable_like_write_behind()
+        start = time.perf_counter()
+        for user_id, post_id in events:
+            db.toggle_like(user_id, post_id)
+        # close() escribe lo que quede pendiente en la cola
+        db.close()
+        return toggles / (time.perf_counter() - start)
+
+
+def main():
+    rows = []
+    for toggles in TOGGLE_COUNTS:
+        direct = run(toggles, write_behind=False)
+        batched = run(toggles, write_behind=True)
+        rows.append((toggles, f"{direct:.0f}", f"{batched:.0f}", f"x{batched / direct:.2f}"))
+    print_table("Toggles de likes por segundo", rows,
+                ("toggles", "directo", "write-behind", "mejora"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Búsquedas por cercanía: grilla espacial vs fuerza bruta (Python y NumPy).
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_map_nearby [--venues 100000] [--samples 200]
+
+Genera lugares alrededor de Buenos Aires (más densos en el centro) y mide
+consultas por radio y de los k más cercanos desde posiciones al azar.
+"""
+import argparse
+import random
+import time
+
+from benchmarks.bench_utils import percentile, print_table
+from database import geo
+from database.geo import GridIndex
+
+CENTER = (-34.6118, -58.3960)
+RADII_KM = (1.0, 5.0)
+K = 10
+
+
+def synthetic_venues(count: int, rng: random.Random):
+    # ~0.15° de desvío: la mayoría dentro del conurbano, pocos más lejos
+    return [(venue_id, rng.gauss(CENTER[0], 0.15), rng.gauss(CENTER[1], 0.15))
+            for venue_id in range(count)]
+
+
+def time_queries(func, origins):
+    times = []
+    for lat, lng in origins:
+        start = time.perf_counter()
+        func(lat, lng)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--venues", type=int, default=100000)
+    parser.add_argument("--samples", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    venues = synthetic_venues(args.venues, rng)
+    start = time.perf_counter()
+    index = GridIndex.from_points(venues)
+    print(f"Índice de {args.venues} lugares en {len(index.cells)} celdas: {time.perf_counter() - start:.2f} s")
+    origins = [(rng.gauss(CENTER[0], 0.1), rng.gauss(CENTER[1], 0.1)) for _ in range(args.samples)]
+
+    queries = [(f"radio {radius:g} km", lambda lat, lng, r=radius: index.within_radius(lat, lng, r),
+                lambda lat, lng, r=radius: index.brute_force_within_radius(lat, lng, r))
+               for radius in RADII_KM]
+    queries.append((f"{K} más cercanos", lambda lat, lng: index.nearest(lat, lng, K),
+                    lambda lat, lng: index.brute_force_nearest(lat, lng, K)))
+
+    rows = []
+    for name, indexed, brute in queries:
+        # Mismo resultado que recorrer todo
+        for lat, lng in origins[:20]:
+            assert [item for _, item in indexed(lat, lng)] == [item for _, item in brute(lat, lng)]
+        grid_times = time_queries(indexed, origins)
+        brute_times = time_queries(brute, origins[:max(10, args.samples // 10)])
+        label = "NumPy" if geo.NUMPY_AVAILABLE else "Python"
+        rows.append((name, f"{percentile(grid_times, 50) * 1000:.3f}", f"{percentile(grid_times, 95) * 1000:.3f}",
+                     f"{percentile(brute_times, 50) * 1000:.1f} ({label})"))
+
+    print_table(f"Consultas espaciales sobre {args.venues} lugares", rows,
+                ("consulta", "grilla p50 ms", "grilla p95 ms", "fuerza bruta p50 ms"))
+
+
+if __name__ == "__main__":
+    main()
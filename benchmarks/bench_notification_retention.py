@@ -0,0 +1,77 @@
+"""Depuración de notificaciones: un DELETE único vs lotes cortos.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_notification_retention [--notifications 300000]
+
+Lo que importa es el lote más lento: es el tiempo máximo que otras escrituras
+(likes, comentarios) quedan esperando el lock de escritura.
+"""
+import argparse
+import random
+import time
+
+from benchmarks.bench_utils import temp_db_path, print_table
+from database.database_manager import DatabaseManager
+from database.retention import RetentionPolicy
+
+USERS = 1000
+
+
+def populate(db: DatabaseManager, notifications: int, rng: random.Random):
+    conn = db.get_connection()
+    conn.executemany(
+        "INSERT INTO users (id, username, email, password_hash, full_name) VALUES (?, ?, ?, '', ?)",
+        ((i, f"user{i}", f"user{i}@teamup.com", f"User {i}") for i in range(1, USERS + 1))
+    )
+    # 80% leídas, repartidas en los últimos 90 días e insertadas en orden cronológico
+    ages = sorted((rng.randint(0, 90 * 24) for _ in range(notifications)), reverse=True)
+    conn.executemany('''
+        INSERT INTO notifications (user_id, from_user_id, type, message, is_read, created_at)
+        VALUES (?, ?, 'follow', 'comenzó a seguirte', ?, datetime('now', ?))
+    ''', ((rng.randint(1, USERS), rng.randint(1, USERS), rng.random() < 0.8, f"-{age} hours")
+          for age in ages))
+    conn.commit()
+    conn.close()
+
+
+def run(notifications: int, batch_size: int = 0, archive: bool = False):
+    rng = random.Random(42)
+    with temp_db_path() as db_path:
+        db = DatabaseManager(db_path)
+        populate(db, notifications, rng)
+        if batch_size:
+            report = db.prune_notifications(RetentionPolicy(archive=archive, batch_size=batch_size, pause=0))
+            db.close()
+            return report.pruned, report.seconds, report.max_batch_seconds
+
+        conn = db.get_connection()
+        start = time.perf_counter()
+        cursor = conn.execute('''
+            DELETE FROM notifications WHERE is_read = TRUE AND created_at < datetime('now', '-30 days')
+        ''')
+        pruned = cursor.rowcount
+        conn.commit()
+        elapsed = time.perf_counter() - start
+        conn.close()
+        db.close()
+        return pruned, elapsed, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--notifications", type=int, default=300000)
+    args = parser.parse_args()
+
+    rows = []
+    for name, batch_size, archive in (("DELETE único (solo TTL)", 0, False),
+                                      ("lotes de 500", 500, False),
+                                      ("lotes de 2000", 2000, False),
+                                      ("lotes de 500 + archivo", 500, True)):
+        pruned, total, max_lock = run(args.notifications, batch_size, archive)
+        rows.append((name, pruned, f"{total:.2f}", f"{max_lock * 1000:.1f}"))
+    print_table(f"Depuración de {args.notifications} notificaciones", rows,
+                ("estrategia", "borradas", "total s", "lock máx ms"))
+
+
+if __name__ == "__main__":
+    main()
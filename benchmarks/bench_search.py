@@ -0,0 +1,128 @@
+"""Latencia de DatabaseManager.search (FTS5 + bm25) frente a un LIKE '%...%'.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_search [--posts 1000000] [--samples 300]
+
+Genera captions con un vocabulario de distribución Zipf (pocas palabras muy
+frecuentes, una cola larga de palabras raras) y mide consultas de palabras
+raras, medias y frecuentes, completas y como prefijo. Objetivo: p95 < 10 ms.
+"""
+import argparse
+import itertools
+import random
+import time
+
+from benchmarks.bench_utils import temp_db_path, percentile, print_table
+from database.database_manager import DatabaseManager
+
+SPORT_WORDS = (
+    "entrenamiento", "running", "fútbol", "básquet", "natación", "ciclismo", "crossfit",
+    "gimnasio", "maratón", "velocidad", "resistencia", "recuperación", "yoga", "tenis",
+    "pádel", "voley", "rugby", "palermo", "costanera", "parque", "mañana", "tarde",
+    "récord", "equipo", "partido", "torneo", "sprint", "series", "fondo", "pileta",
+)
+VOCABULARY_SIZE = 50000
+TARGET_P95_MS = 10.0
+
+
+def build_vocabulary(rng: random.Random):
+    words = list(SPORT_WORDS)
+    while len(words) < VOCABULARY_SIZE:
+        words.append("".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(4, 10))))
+    # Peso Zipf: la palabra en la posición r aparece con frecuencia ~ 1/r
+    cum_weights = list(itertools.accumulate(1.0 / (rank + 1) for rank in range(len(words))))
+    return words, cum_weights
+
+
+def populate(db: DatabaseManager, posts: int, words, cum_weights, rng: random.Random):
+    conn = db.get_connection()
+    conn.executemany(
+        "INSERT INTO users (id, username, email, password_hash, full_name, sport) VALUES (?, ?, ?, '', ?, ?)",
+        ((i, f"user{i}", f"user{i}@teamup.com", f"User {i}", SPORT_WORDS[i % len(SPORT_WORDS)])
+         for i in range(1, 1001))
+    )
+
+    def captions():
+        for i in range(posts):
+            yield 1 + i % 1000, " ".join(rng.choices(words, cum_weights=cum_weights, k=rng.randint(6, 14)))
+
+    # Los triggers de FTS indexan cada post al insertarlo
+    conn.executemany("INSERT INTO posts (user_id, caption, image_url) VALUES (?, ?, '')", captions())
+    conn.commit()
+    conn.execute("INSERT INTO posts_fts (posts_fts) VALUES ('optimize')")
+    conn.commit()
+    conn.close()
+    db.refresh_search_stats()
+
+
+def build_queries(words, rng: random.Random, samples: int):
+    """Consultas por categoría según la posición de la palabra en el ranking de frecuencia"""
+    bands = {
+        "frecuente": words[:30],
+        "media": words[30:2000],
+        "rara": words[2000:],
+    }
+    queries = {}
+    for band, pool in bands.items():
+        picked = [rng.choice(pool) for _ in range(samples)]
+        queries[f"{band} (palabra)"] = picked
+        queries[f"{band} (prefijo)"] = [word[:max(3, len(word) - 3)] for word in picked]
+    queries["dos palabras"] = [f"{rng.choice(bands['frecuente'])} {rng.choice(bands['media'])}"
+                               for _ in range(samples)]
+    return queries
+
+
+def time_queries(func, queries):
+    times = []
+    for query in queries:
+        start = time.perf_counter()
+        func(query)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--posts", type=int, default=1000000)
+    parser.add_argument("--samples", type=int, default=300)
+    parser.add_argument("--like-samples", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    words, cum_weights = build_vocabulary(rng)
+
+    with temp_db_path() as db_path:
+        db = DatabaseManager(db_path)
+        start = time.perf_counter()
+        populate(db, args.posts, words, cum_weights, rng)
+        print(f"Carga e indexado de {args.posts} posts: {time.perf_counter() - start:.1f} s")
+
+        rows = []
+        all_times = []
+        for name, queries in build_queries(words, rng, args.samples).items():
+            times = time_queries(lambda q: db.search(q, limit=20), queries)
+            all_times.extend(times)
+            rows.append((name, f"{percentile(times, 50) * 1000:.2f}",
+                         f"{percentile(times, 95) * 1000:.2f}", f"{max(times) * 1000:.2f}"))
+        rows.append(("total", f"{percentile(all_times, 50) * 1000:.2f}",
+                     f"{percentile(all_times, 95) * 1000:.2f}", f"{max(all_times) * 1000:.2f}"))
+
+        # Referencia: búsqueda por subcadena como en get_filtered_locations
+        conn = db.get_connection()
+        like_times = time_queries(
+            lambda q: conn.execute(
+                "SELECT id FROM posts WHERE caption LIKE ? LIMIT 20", (f"%{q}%",)
+            ).fetchall(),
+            [rng.choice(words[2000:]) for _ in range(args.like_samples)]
+        )
+        conn.close()
+        rows.append(("LIKE '%...%' (rara)", f"{percentile(like_times, 50) * 1000:.2f}",
+                     f"{percentile(like_times, 95) * 1000:.2f}", f"{max(like_times) * 1000:.2f}"))
+        db.close()
+
+    print_table(f"Búsqueda en {args.posts} posts (objetivo p95 < {TARGET_P95_MS:.0f} ms)",
+                rows, ("consulta", "p50 ms", "p95 ms", "máx ms"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Tiempo de arranque: importar main.py y mostrar la primera pantalla, contra un presupuesto.
+
+Uso (desde la raíz del repositorio, requiere flet):
+    python -m benchmarks.bench_startup [--runs 5] [--budget 1.0]
+
+Cada corrida es un proceso nuevo (sin módulos ya importados) en un
+directorio temporal con su propia teamup.db; la primera, descartada, crea y
+siembra la base como el primer arranque real. Se mide la importación de
+main.py y la llamada a main() hasta su último page.update(), con una página
+que solo registra los update(). También lista las páginas importadas al
+arrancar (solo deberían ser login o registro) y cuánto cuesta importar las
+demás, que ahora se cargan al navegar. Sale con código 1 si la mediana del
+total supera el presupuesto.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.bench_utils import percentile, print_table
+
+# Segundos de importación + primera pantalla (mediana)
+STARTUP_BUDGET_SECONDS = 1.0
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD_SCRIPT = '''
+import importlib, json, sys, time
+sys.path.insert(0, {repo_root!r})
+start = time.perf_counter()
+import main as app
+imported = time.perf_counter()
+
+
+class StartupPage:
+    """Lo que main() usa de ft.Page; update() anota el momento"""
+
+    def __init__(self):
+        self.controls = []
+        self.overlay = []
+        self.last_update = None
+
+    def add(self, *controls):
+        self.controls.extend(controls)
+        self.update()
+
+    def update(self, *controls):
+        self.last_update = time.perf_counter()
+
+    def run_task(self, handler, *args):
+        pass
+
+
+page = StartupPage()
+app.main(page)
+shown = page.last_update
+startup_pages = sorted(name for name in sys.modules if name.startswith("pages.") and name != "pages.registry")
+
+deferred_start = time.perf_counter()
+for module in {page_modules!r}:
+    importlib.import_module(module)
+deferred = time.perf_counter() - deferred_start
+
+print(json.dumps({{
+    "import": imported - start,
+    "first_screen": shown - imported,
+    "total": shown - start,
+    "startup_pages": startup_pages,
+    "deferred_imports": deferred,
+}}))
+'''
+
+PAGE_MODULES = [
+    "pages.home_page", "pages.profile_page", "pages.edit_profile_page", "pages.settings_page",
+    "pages.map_page", "pages.notifications_page", "pages.upload_page", "pages.search_page",
+    "pages.login_page", "pages.registration_page",
+]
+
+
+def run_child(work_dir: str) -> dict:
+    script = CHILD_SCRIPT.format(repo_root=REPO_ROOT, page_modules=PAGE_MODULES)
+    result = subprocess.run([sys.executable, "-c", script], cwd=work_dir,
+                            capture_output=True, text=True, check=True)
+    # main() imprime sus propios mensajes; el resultado es la última línea
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=STARTUP_BUDGET_SECONDS)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="teamup_bench_") as work_dir:
+        run_child(work_dir)  # Crea y siembra la base
+        results = [run_child(work_dir) for _ in range(args.runs)]
+
+    rows = [
+        (label, f"{percentile([r[key] for r in results], 50) * 1000:.0f}",
+         f"{percentile([r[key] for r in results], 95) * 1000:.0f}")
+        for label, key in (("importar main.py", "import"),
+                           ("main() hasta la primera pantalla", "first_screen"),
+                           ("total", "total"),
+                           ("páginas diferidas (importarlas)", "deferred_imports"))
+    ]
+    print_table(f"Arranque ({args.runs} procesos nuevos, presupuesto {args.budget * 1000:.0f} ms)",
+                rows, ("etapa", "p50 ms", "p95 ms"))
+    print(f"\nPáginas importadas al arrancar: {', '.join(results[-1]['startup_pages']) or 'ninguna'}")
+
+    total = percentile([r["total"] for r in results], 50)
+    if total > args.budget:
+        print(f"FUERA DE PRESUPUESTO: {total * 1000:.0f} ms > {args.budget * 1000:.0f} ms")
+        sys.exit(1)
+    print(f"Dentro del presupuesto: {total * 1000:.0f} ms <= {args.budget * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
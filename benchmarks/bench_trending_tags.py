@@ -0,0 +1,72 @@
+"""Tags en tendencia: ventana precalculada vs GROUP BY sobre post_tags.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_trending_tags [--posts 200000] [--tags 20000]
+"""
+import argparse
+import random
+import time
+
+from benchmarks.bench_utils import temp_db_path, percentile, print_table
+from database.database_manager import DatabaseManager
+from database.models import Post
+
+SAMPLES = 200
+TOP_K = 10
+
+
+def populate(db: DatabaseManager, posts: int, tags: int, rng: random.Random):
+    conn = db.get_connection()
+    conn.execute("INSERT INTO users (id, username, email, password_hash, full_name) "
+                 "VALUES (1, 'user1', 'user1@teamup.com', '', 'User 1')")
+    conn.commit()
+    conn.close()
+    # create_post indexa los hashtags y actualiza buckets y ventana
+    for _ in range(posts):
+        picked = {rng.randint(0, tags - 1) for _ in range(rng.randint(1, 4))}
+        caption = " ".join(f"#tag{tag}" for tag in picked)
+        db.create_post(Post(user_id=1, caption=caption, image_url=""))
+
+
+def time_calls(func):
+    times = []
+    for _ in range(SAMPLES):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--posts", type=int, default=200000)
+    parser.add_argument("--tags", type=int, default=20000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    with temp_db_path() as db_path:
+        db = DatabaseManager(db_path)
+        start = time.perf_counter()
+        populate(db, args.posts, args.tags, rng)
+        print(f"Carga de {args.posts} posts con hashtags: {time.perf_counter() - start:.1f} s")
+
+        conn = db.get_connection()
+        group_by = time_calls(lambda: conn.execute('''
+            SELECT tag, COUNT(*) AS uses FROM post_tags
+            WHERE created_at >= datetime('now', '-24 hours')
+            GROUP BY tag ORDER BY uses DESC, tag LIMIT ?
+        ''', (TOP_K,)).fetchall())
+        conn.close()
+        window = time_calls(lambda: db.get_trending_tags(TOP_K))
+        db.close()
+
+    rows = [
+        (name, f"{percentile(times, 50) * 1000:.2f}", f"{percentile(times, 95) * 1000:.2f}")
+        for name, times in (("GROUP BY post_tags", group_by), ("tag_window (top-k)", window))
+    ]
+    print_table(f"Top {TOP_K} tags de las últimas 24 h ({args.tags} tags distintos)",
+                rows, ("consulta", "p50 ms", "p95 ms"))
+
+
+if __name__ == "__main__":
+    main()
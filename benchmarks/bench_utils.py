@@ -0,0 +1,43 @@
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+
+
+@contextmanager
+def temp_db_path(name: str = "bench.db"):
+    """Directorio temporal con la ruta de una base de datos descartable"""
+    tmp_dir = tempfile.mkdtemp(prefix="teamup_bench_")
+    try:
+        yield os.path.join(tmp_dir, name)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def ops_per_second(func, iterations: int) -> float:
+    """Ejecutar func() iterations veces y devolver operaciones por segundo"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    elapsed = time.perf_counter() - start
+    return iterations / elapsed if elapsed > 0 else float("inf")
+
+
+def percentile(samples, pct: float) -> float:
+    """Percentil (0-100) de una lista de muestras"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def print_table(title: str, rows, headers):
+    """Imprimir resultados en una tabla de texto simple"""
+    widths = [max(len(str(h)), *(len(str(r[i])) for r in rows)) for i, h in enumerate(headers)]
+    print(f"\n{title}")
+    print("  ".join(str(h).ljust(w) for h, w in zip(headers, widths)))
+    print("  ".join("-" * w for w in widths))
+    for row in rows:
+        print("  ".join(str(c).ljust(w) for c, w in zip(row, widths)))
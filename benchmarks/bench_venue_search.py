@@ -0,0 +1,98 @@
+"""Búsqueda de lugares: índice invertido vs recorrido por subcadenas.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_venue_search [--venues 100000] [--samples 50]
+
+Genera lugares con nombres, barrios y deportes combinados al azar y mide
+consultas exactas, por prefijo (mientras se escribe), con acentos y con
+errores de tipeo. El recorrido es el filtro que hacía MapDataManager antes
+del índice: no encuentra acentos ni errores, por eso puede devolver menos.
+"""
+import argparse
+import random
+import time
+
+from benchmarks.bench_utils import percentile, print_table
+from database.venue_search import VenueSearchIndex
+
+PREFIXES = ("Club", "Polideportivo", "Gimnasio", "Complejo", "Parque", "Estadio", "Centro Deportivo")
+NAMES = ("Atlético", "Náutico", "Social", "Municipal", "Sportivo", "Independiente", "Unión",
+         "Belgrano", "San Martín", "Rivadavia", "Mitre", "Sarmiento", "Almagro", "Libertad")
+NEIGHBORHOODS = ("Palermo", "Belgrano", "Caballito", "Flores", "Núñez", "Boedo", "Quilmes",
+                 "Lanús", "Morón", "Tigre", "Córdoba", "Rosario", "Mendoza", "La Plata")
+SPORTS = ("futbol", "basquet", "tenis", "padel", "voley", "natacion", "running", "hockey", "rugby")
+CATEGORIES = ("canchas", "clubes", "gimnasios", "parques", "piscinas")
+
+QUERIES = {
+    "exacta": "palermo",
+    "prefijo (2 letras)": "pa",
+    "prefijo largo": "polidep",
+    "con acento": "básquet",
+    "dos palabras": "club quilmes",
+    "error de tipeo": "natacon",
+    "trasposición": "nuñze",
+}
+
+
+def synthetic_venues(count: int, rng: random.Random):
+    for venue_id in range(1, count + 1):
+        neighborhood = rng.choice(NEIGHBORHOODS)
+        yield {
+            "id": venue_id,
+            "name": f"{rng.choice(PREFIXES)} {rng.choice(NAMES)} {neighborhood} {venue_id}",
+            "category": rng.choice(CATEGORIES),
+            "sports": rng.sample(SPORTS, rng.randint(1, 3)),
+            "address": f"Av. {rng.choice(NAMES)} {rng.randint(1, 9000)}, {neighborhood}",
+            "description": f"Instalaciones para {rng.choice(SPORTS)} en {neighborhood}",
+            "rating": round(rng.uniform(3, 5), 1),
+        }
+
+
+def substring_scan(venues, query: str):
+    query = query.lower()
+    return [venue for venue in venues
+            if query in venue["name"].lower() or query in venue["description"].lower()
+            or any(query in sport for sport in venue["sports"]) or query in venue["address"].lower()]
+
+
+def time_queries(func, samples: int):
+    times = []
+    result = None
+    for _ in range(samples):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return times, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--venues", type=int, default=100000)
+    parser.add_argument("--samples", type=int, default=50)
+    args = parser.parse_args()
+
+    venues = list(synthetic_venues(args.venues, random.Random(42)))
+    start = time.perf_counter()
+    index = VenueSearchIndex(venues)
+    index.vocabulary
+    index.trigram_index
+    print(f"Índice de {len(index.postings)} palabras para {args.venues} lugares: "
+          f"{time.perf_counter() - start:.2f} s")
+
+    rows = []
+    for name, query in QUERIES.items():
+        index_times, results = time_queries(lambda: index.search(query, limit=50), args.samples)
+        _, all_results = time_queries(lambda: index.search(query), 1)
+        scan_times, scanned = time_queries(lambda: substring_scan(venues, query),
+                                           max(3, args.samples // 10))
+        rows.append((f"{name}: {query}", f"{percentile(index_times, 50) * 1000:.2f}",
+                     f"{percentile(index_times, 95) * 1000:.2f}", len(all_results),
+                     f"{percentile(scan_times, 50) * 1000:.1f}", len(scanned)))
+
+    print_table(f"Búsqueda sobre {args.venues} lugares (50 primeros resultados)", rows,
+                ("consulta", "índice p50 ms", "índice p95 ms", "resultados",
+                 "recorrido p50 ms", "resultados recorrido"))
+
+
+if __name__ == "__main__":
+    main()
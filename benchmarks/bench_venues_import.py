@@ -0,0 +1,85 @@
+"""Importación masiva de lugares y primera apertura del mapa.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_venues_import [--venues 100000]
+
+Importa lugares sintéticos a una base descartable (a escala país) y mide la
+importación, la carga de MapDataManager (tablas + índices en memoria) y las
+consultas que hace MapPage al abrirse y al cambiar de categoría.
+"""
+import argparse
+import random
+import time
+
+from benchmarks.bench_utils import percentile, print_table, temp_db_path
+from database.database_manager import DatabaseManager
+from database.map_data import MAP_RESULTS_LIMIT, MapDataManager
+
+CENTER = {"lat": -34.6118, "lng": -58.3960}
+CATEGORIES = ("canchas", "clubes", "gimnasios", "parques", "piscinas", "eventos")
+SPORTS = ("futbol", "basquet", "tenis", "padel", "voley", "natacion", "running", "gimnasio")
+
+
+def synthetic_venues(count: int, rng: random.Random):
+    # Dispersos por el país (~ latitud -22 a -55, longitud -53 a -73)
+    for venue_id in range(1, count + 1):
+        yield {
+            "id": venue_id,
+            "name": f"Lugar {venue_id}",
+            "category": rng.choice(CATEGORIES),
+            "sports": rng.sample(SPORTS, rng.randint(1, 3)),
+            "address": f"Calle {rng.randint(1, 5000)}",
+            "coordinates": {"lat": rng.uniform(-55, -22), "lng": rng.uniform(-73, -53)},
+            "description": "Lugar deportivo",
+            "rating": round(rng.uniform(3, 5), 1),
+            "price_range": rng.choice(("Gratis", "$", "$$", "$$$")),
+        }
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--venues", type=int, default=100000)
+    parser.add_argument("--samples", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    with temp_db_path() as db_path:
+        db = DatabaseManager(db_path)
+        try:
+            imported, import_seconds = timed(lambda: db.import_venues(synthetic_venues(args.venues, rng)))
+            manager = MapDataManager(db)
+            _, load_seconds = timed(manager.get_all_locations)
+            _, first_open_seconds = timed(lambda: manager.get_filtered_locations(
+                "todos", "", origin=CENTER, limit=MAP_RESULTS_LIMIT))
+
+            category_times = []
+            for _ in range(args.samples):
+                category = rng.choice(CATEGORIES)
+                _, seconds = timed(lambda: manager.get_filtered_locations(
+                    category, "", origin=CENTER, limit=MAP_RESULTS_LIMIT))
+                category_times.append(seconds)
+            _, by_id_seconds = timed(lambda: [manager.get_location_by_id(rng.randint(1, args.venues))
+                                              for _ in range(args.samples)])
+        finally:
+            db.close()
+
+    total = len(manager.get_all_locations())
+    rows = [
+        ("importación", f"{import_seconds * 1000:.0f}", f"{imported / import_seconds:,.0f} lugares/s"),
+        ("carga + índices", f"{load_seconds * 1000:.0f}", f"{total} lugares"),
+        ("primera apertura", f"{first_open_seconds * 1000:.1f}", f"{MAP_RESULTS_LIMIT} más cercanos"),
+        ("cambio de categoría p50", f"{percentile(category_times, 50) * 1000:.1f}",
+         f"p95 {percentile(category_times, 95) * 1000:.1f} ms"),
+        ("lugar por id", f"{by_id_seconds / args.samples * 1000:.4f}", "promedio"),
+    ]
+    print_table(f"Lugares del mapa ({args.venues} importados)", rows, ("operación", "ms", "detalle"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Primer pintado y memoria del feed virtualizado con 100 a 10k posts.
+
+Uso (desde la raíz del repositorio, requiere flet):
+    python -m benchmarks.bench_virtualized_list
+"""
+import time
+import tracemalloc
+
+from benchmarks.bench_utils import print_table
+from components.virtualized_list import VirtualizedList
+from database.models import Post
+from pages.home_page import HomePage, FEED_PAGE_SIZE
+from utils.theme_manager import ThemeManager
+
+SIZES = (100, 1000, 10000)
+
+
+def make_loader(total: int):
+    """Fuente paginada de posts sintéticos, como get_posts_feed_page"""
+    state = {"next": 0}
+
+    def load_more():
+        start = state["next"]
+        end = min(total, start + FEED_PAGE_SIZE)
+        state["next"] = end
+        return [Post(id=i, user_id=1, caption=f"Post #{i}", image_url=f"https://picsum.photos/375/250?{i}",
+                     username="bench") for i in range(start, end)]
+    return load_more
+
+
+def main():
+    theme_manager = ThemeManager()
+    colors = theme_manager.get_theme_colors()
+    rows = []
+    for total in SIZES:
+        home_page = HomePage(theme_manager)
+        feed = VirtualizedList(
+            build_item=lambda post: home_page._create_feed_card(post, colors),
+            load_more=make_loader(total),
+            chunk_size=FEED_PAGE_SIZE,
+        )
+        tracemalloc.start()
+        start = time.perf_counter()
+        feed.reset()
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        rows.append((total, f"{elapsed * 1000:.1f}", f"{peak / 1024:.0f}", feed.live_count()))
+
+    print_table("Primer pintado del feed virtualizado", rows,
+                ("posts", "ms", "pico KiB", "tarjetas vivas"))
+
+
+if __name__ == "__main__":
+    main()
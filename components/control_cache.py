@@ -0,0 +1,45 @@
+from collections import OrderedDict
+
+
+class ControlCache:
+    """Caché LRU de controles Flet ya construidos.
+
+    Cada entrada guarda una versión (p. ej. updated_at y tema); si la versión
+    pedida no coincide, el control se reconstruye con el builder.
+    """
+
+    def __init__(self, max_size: int = 500):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_build(self, key, version, builder):
+        """Devolver el control cacheado para key/version o construirlo"""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        control = builder()
+        self._entries[key] = (version, control)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        return control
+
+    def get(self, key):
+        """Control cacheado para key (cualquier versión) o None"""
+        entry = self._entries.get(key)
+        return entry[1] if entry else None
+
+    def invalidate(self, key):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
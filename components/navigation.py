@@ -7,6 +7,9 @@ class NavigationManager:
         self.page_callbacks = page_callbacks
         self.current_page = current_page
         self.nav_bar = None
+        # main.py la reemplaza por la consulta a la base de datos
+        self.get_unread_count = lambda: 0
+        self.unread_badge = None
 
     def create_app_bar(self):
         colors = self.theme_manager.get_theme_colors()
@@ -39,17 +42,55 @@ class NavigationManager:
                         expand=True
                     ),
                     ft.IconButton(
-                        icon=ft.Icons.NOTIFICATIONS,
+                        icon=ft.Icons.SEARCH,
                         icon_color=colors["text_primary"],
-                        tooltip="Notificaciones",
-                        on_click=self.show_notifications  
+                        tooltip="Buscar",
+                        on_click=self.show_search
                     ),
+                    self._create_notifications_button(colors),
                 ],
                 alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
                 vertical_alignment=ft.CrossAxisAlignment.CENTER,
             )
         )
 
+    def _create_notifications_button(self, colors):
+        """Campana con un contador de no leídas encima"""
+        unread = self.get_unread_count()
+        self.unread_badge = ft.Container(
+            content=ft.Text(self._badge_text(unread), size=10, color=ft.Colors.WHITE,
+                            weight=ft.FontWeight.BOLD),
+            bgcolor=ft.Colors.RED_500,
+            border_radius=10,
+            padding=ft.padding.symmetric(horizontal=5, vertical=1),
+            right=4,
+            top=4,
+            visible=unread > 0
+        )
+        return ft.Stack(
+            controls=[
+                ft.IconButton(
+                    icon=ft.Icons.NOTIFICATIONS,
+                    icon_color=colors["text_primary"],
+                    tooltip="Notificaciones",
+                    on_click=self.show_notifications
+                ),
+                self.unread_badge,
+            ]
+        )
+
+    def _badge_text(self, count: int) -> str:
+        return "99+" if count > 99 else str(count)
+
+    def set_unread_count(self, count: int):
+        """Actualizar el contador de la campana sin reconstruir la barra"""
+        if not self.unread_badge:
+            return
+        self.unread_badge.content.value = self._badge_text(count)
+        self.unread_badge.visible = count > 0
+        if self.unread_badge.page:
+            self.unread_badge.update()
+
     def create_bottom_bar(self, page):
         colors = self.theme_manager.get_theme_colors()
         
@@ -187,3 +228,8 @@ class NavigationManager:
         """Mostrar página de notificaciones"""
         if "show_notifications" in self.page_callbacks:
             self.page_callbacks["show_notifications"]()
+
+    def show_search(self, e):
+        """Mostrar página de búsqueda"""
+        if "show_search" in self.page_callbacks:
+            self.page_callbacks["show_search"]()
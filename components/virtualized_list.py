@@ -0,0 +1,194 @@
+import math
+import flet as ft
+
+
+class VirtualizedList:
+    """ListView que solo materializa una ventana acotada de elementos.
+
+    Los datos se piden por bloques a ``load_more`` (devuelve una lista vacía
+    cuando no hay más) y las tarjetas se construyen con ``build_item`` solo
+    cuando entran en la ventana visible; si construirlas es caro, la caché de
+    controles es responsabilidad de ``build_item`` (p. ej. la de HomePage).
+
+    Los bloques de ``chunk_size`` elementos que quedan por encima de la ventana
+    se reemplazan por un espaciador con su altura real, medida a partir de la
+    extensión del scroll cuando el bloque se agregó al final de la ventana; así
+    el contenido no salta aunque las tarjetas midan distinto. ``item_extent``
+    solo se usa como estimación para ubicar bloques que todavía no se midieron.
+    El primer bloque (y lo que se inserte arriba) queda siempre materializado:
+    su altura, junto con la del encabezado, es la base de las mediciones.
+
+    Con ``item_key`` ``apply_changes`` puede insertar, reemplazar o quitar
+    elementos manteniendo la ventana sobre los mismos elementos.
+    """
+
+    def __init__(self, build_item, load_more, item_extent: float = 420, chunk_size: int = 10,
+                 max_live_items: int = 40, header_controls=None,
+                 spacing: float = 0, padding=10, item_key=None):
+        self.build_item = build_item
+        self.item_key = item_key
+        self.load_more = load_more
+        self.item_extent = item_extent + spacing
+        self.chunk_size = chunk_size
+        self.max_live_items = max(max_live_items, chunk_size * 2)
+        self.header_controls = header_controls or []
+
+        self.items = []
+        self.exhausted = False
+        # items[:head] quedan fijos arriba; los bloques empiezan en head
+        self.head = 0
+        self.start = 0
+        self.end = 0
+        # Altura medida de cada bloque (índice de bloque -> píxeles)
+        self.chunk_heights = {}
+        # Altura del encabezado + elementos fijos + márgenes; None si hay que medirla
+        self.base_height = None
+
+        self.top_spacer = ft.Container(height=0)
+        self.list_view = ft.ListView(
+            expand=True,
+            spacing=spacing,
+            padding=padding,
+            on_scroll_interval=100,
+            on_scroll=self._on_scroll
+        )
+
+    def reset(self):
+        """Descartar los datos cargados y materializar el primer bloque"""
+        self.items = []
+        self.exhausted = False
+        self.chunk_heights = {}
+        self.base_height = None
+        self.head = self._ensure_items(self.chunk_size)
+        self.start = self.end = self.head
+        self._render()
+        return self.list_view
+
+    def live_count(self) -> int:
+        """Cantidad de elementos materializados como controles"""
+        return self.head + self.end - self.start
+
+    def _ensure_items(self, count: int) -> int:
+        """Cargar datos hasta tener al menos count elementos (si existen)"""
+        while len(self.items) < count and not self.exhausted:
+            batch = self.load_more()
+            if not batch:
+                self.exhausted = True
+            else:
+                self.items.extend(batch)
+        return min(count, len(self.items))
+
+    def _chunk_of(self, index: int) -> int:
+        return (index - self.head) // self.chunk_size
+
+    def _chunk_count(self, index: int) -> int:
+        """Cantidad de bloques (el último puede estar incompleto) hasta index"""
+        return math.ceil((index - self.head) / self.chunk_size)
+
+    def _estimated_height(self, chunk: int) -> float:
+        return self.chunk_heights.get(chunk, self.chunk_size * self.item_extent)
+
+    def _spacer_height(self) -> float:
+        # Solo cubre bloques medidos: _on_scroll nunca saca de la ventana uno sin medir
+        return sum(self.chunk_heights[chunk] for chunk in range(self._chunk_of(self.start)))
+
+    def apply_changes(self, prepend=(), replace=(), remove_keys=()):
+        """Insertar elementos al principio, reemplazar otros en su lugar y quitar claves.
+
+        Requiere ``item_key``. Mantiene la ventana sobre los mismos elementos y
+        redibuja una vez. Los insertados quedan fijos arriba; quitar elementos
+        de bloques ya medidos deja su altura aproximada hasta el próximo reset.
+        """
+        replacements = {self.item_key(item): item for item in replace}
+        removed = set(remove_keys) | {self.item_key(item) for item in prepend}
+        removed_at = [i for i, item in enumerate(self.items) if self.item_key(item) in removed]
+
+        def new_index(index):
+            return index + len(prepend) - sum(1 for i in removed_at if i < index)
+
+        head = new_index(self.head)
+        start = new_index(self.start)
+        end = new_index(self.end)
+        self.items = [
+            *prepend,
+            *(replacements.get(self.item_key(item), item)
+              for item in self.items if self.item_key(item) not in removed),
+        ]
+        if head != self.head:
+            self.base_height = None
+
+        # Realinear la ventana a los bloques, que se cuentan desde head
+        self.head = head
+        self.start = head + max(0, self._chunk_of(start)) * self.chunk_size
+        self.end = min(len(self.items), max(self.start, head + self._chunk_count(end) * self.chunk_size))
+        self._render()
+        if self.list_view.page:
+            self.list_view.update()
+
+    def _render(self):
+        self.top_spacer.height = self._spacer_height()
+        self.list_view.controls = [
+            *self.header_controls,
+            *(self.build_item(self.items[i]) for i in range(self.head)),
+            self.top_spacer,
+            *(self.build_item(self.items[i]) for i in range(self.start, self.end)),
+        ]
+
+    def _measure(self, e: ft.OnScrollEvent):
+        """Medir los bloques agregados en el último redibujado.
+
+        El contenido mide base + espaciador + bloques vivos; conocida la base,
+        lo que falta es la altura de los bloques vivos sin medir (normalmente
+        uno solo: el último agregado).
+        """
+        if not e.max_scroll_extent or e.viewport_dimension is None:
+            return
+        content = e.max_scroll_extent + e.viewport_dimension
+        live = range(self._chunk_of(self.start), self._chunk_count(self.end))
+        measured = sum(self.chunk_heights[chunk] for chunk in live if chunk in self.chunk_heights)
+        pending = [chunk for chunk in live if chunk not in self.chunk_heights]
+
+        if self.base_height is None:
+            estimated = sum(self._estimated_height(chunk) for chunk in pending)
+            self.base_height = content - self.top_spacer.height - measured - estimated
+        elif pending:
+            height = (content - self.base_height - self.top_spacer.height - measured) / len(pending)
+            if height > 0:
+                for chunk in pending:
+                    self.chunk_heights[chunk] = height
+
+    def _on_scroll(self, e: ft.OnScrollEvent):
+        self._measure(e)
+        if self.base_height is None:
+            return
+
+        # Bloque en el borde superior de la vista y último bloque visible
+        loaded = self._chunk_count(len(self.items))
+        offset = e.pixels - self.base_height
+        first_visible, top = 0, 0.0
+        while first_visible < loaded - 1 and top + self._estimated_height(first_visible) <= offset:
+            top += self._estimated_height(first_visible)
+            first_visible += 1
+        last_visible, bottom = first_visible, top + self._estimated_height(first_visible)
+        while bottom < offset + (e.viewport_dimension or 0):
+            last_visible += 1
+            bottom += self._estimated_height(last_visible)
+
+        # Un bloque de margen a cada lado; la ventana se mueve por bloques enteros
+        first = max(0, first_visible - 1)
+        last = last_visible + 2
+        # Solo se reemplaza por espaciador lo ya medido, y se agrega a lo sumo
+        # un bloque sin medir por vez para poder medirlo en el siguiente evento
+        unmeasured = 0
+        while unmeasured in self.chunk_heights:
+            unmeasured += 1
+        last = min(last, unmeasured + 1)
+        first = max(min(first, unmeasured), last - self.max_live_items // self.chunk_size)
+
+        end = self._ensure_items(self.head + last * self.chunk_size)
+        start = min(self.head + first * self.chunk_size, end)
+        if (start, end) == (self.start, self.end):
+            return
+        self.start, self.end = start, end
+        self._render()
+        self.list_view.update()
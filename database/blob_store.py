@@ -0,0 +1,142 @@
+"""Almacén de imágenes direccionado por contenido.
+
+Cada archivo se guarda una sola vez con el SHA-256 de sus bytes como nombre,
+repartido en subdirectorios (ab/cd/abcd….webp) para que ningún directorio
+crezca sin límite. Posts y avatares apuntan a los blobs desde blob_refs y
+los triggers mantienen blobs.refcount; los que quedan sin referencias se
+borran con collect_blob_garbage.
+
+Recolectar blobs huérfanos (desde la raíz del repositorio):
+    python -m database.blob_store [ruta.db]
+"""
+import hashlib
+import os
+import sys
+import tempfile
+from typing import Iterable, List, Tuple
+
+# Directorio de los blobs (relativo a la raíz de la app, como las imágenes anteriores)
+BLOB_ROOT = os.path.join("assets", "images", "blobs")
+
+# Niveles de subdirectorios, de 2 caracteres hexadecimales cada uno (65536 directorios)
+BLOB_SHARD_DEPTH = 2
+
+# Blobs sin referencias guardados hace menos que esto no se borran: pueden ser
+# de una subida que todavía no confirmó su post
+BLOB_GC_GRACE_SECONDS = 3600
+
+BLOB_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS blobs (
+        sha256 TEXT PRIMARY KEY,
+        path TEXT NOT NULL,
+        bytes INTEGER NOT NULL,
+        refcount INTEGER NOT NULL DEFAULT 0,
+        stored_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    ) WITHOUT ROWID
+    ''',
+    # Solo los huérfanos: la recolección no recorre los blobs en uso
+    "CREATE INDEX IF NOT EXISTS idx_blobs_orphans ON blobs (stored_at) WHERE refcount = 0",
+    # owner: 'post:<id>' o 'avatar:<id de usuario>'
+    '''
+    CREATE TABLE IF NOT EXISTS blob_refs (
+        owner TEXT NOT NULL,
+        sha256 TEXT NOT NULL,
+        PRIMARY KEY (owner, sha256)
+    ) WITHOUT ROWID
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS blob_refs_insert AFTER INSERT ON blob_refs BEGIN
+        UPDATE blobs SET refcount = refcount + 1 WHERE sha256 = new.sha256;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS blob_refs_delete AFTER DELETE ON blob_refs BEGIN
+        UPDATE blobs SET refcount = refcount - 1 WHERE sha256 = old.sha256;
+    END
+    ''',
+    # Borrar un post suelta sus imágenes, venga de donde venga el DELETE
+    '''
+    CREATE TRIGGER IF NOT EXISTS posts_release_blobs AFTER DELETE ON posts BEGIN
+        DELETE FROM blob_refs WHERE owner = 'post:' || old.id;
+    END
+    ''',
+]
+
+
+def post_owner(post_id: int) -> str:
+    return f"post:{post_id}"
+
+
+def avatar_owner(user_id: int) -> str:
+    return f"avatar:{user_id}"
+
+
+def blob_path(digest: str, extension: str, root: str = BLOB_ROOT) -> str:
+    """Ruta del blob: root/ab/cd/abcd….ext"""
+    shards = [digest[2 * level:2 * level + 2] for level in range(BLOB_SHARD_DEPTH)]
+    return os.path.join(root, *shards, digest + extension)
+
+
+def write_blob(data: bytes, extension: str, root: str = BLOB_ROOT) -> Tuple[str, str]:
+    """Escribir los bytes si no están ya guardados; devuelve (sha256, ruta)"""
+    digest = hashlib.sha256(data).hexdigest()
+    path = blob_path(digest, extension, root)
+    if not os.path.exists(path):
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        # Archivo temporal + rename: nadie ve nunca un blob escrito a medias
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    return digest, path
+
+
+def register_blob(cursor, digest: str, path: str, size: int):
+    """Registrar el blob o renovar su fecha para que la recolección no lo tome como huérfano viejo"""
+    cursor.execute('''
+        INSERT INTO blobs (sha256, path, bytes) VALUES (?, ?, ?)
+        ON CONFLICT (sha256) DO UPDATE SET stored_at = CURRENT_TIMESTAMP
+    ''', (digest, path, size))
+
+
+def add_blob_refs(cursor, owner: str, digests: Iterable[str]):
+    cursor.executemany('''
+        INSERT OR IGNORE INTO blob_refs (owner, sha256) VALUES (?, ?)
+    ''', [(owner, digest) for digest in set(digests)])
+
+
+def release_blob_refs(cursor, owner: str):
+    cursor.execute("DELETE FROM blob_refs WHERE owner = ?", (owner,))
+
+
+def orphaned_blobs(cursor, grace_seconds: int = BLOB_GC_GRACE_SECONDS) -> List[Tuple[str, str]]:
+    """(sha256, ruta) de los blobs sin referencias guardados hace más de grace_seconds"""
+    cursor.execute('''
+        SELECT sha256, path FROM blobs
+        WHERE refcount = 0 AND stored_at < datetime('now', ?)
+    ''', (f"-{max(0, int(grace_seconds))} seconds",))
+    return [(row[0], row[1]) for row in cursor.fetchall()]
+
+
+def main(argv=None) -> int:
+    from database.database_manager import DatabaseManager
+
+    argv = sys.argv[1:] if argv is None else argv
+    db = DatabaseManager(argv[0] if argv else "teamup.db")
+    try:
+        removed, freed = db.collect_blob_garbage()
+    finally:
+        db.close()
+    print(f"Blobs huérfanos borrados: {removed} ({freed / 1024:,.0f} KB liberados)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+import sqlite3
+import threading
+from typing import List
+
+# PRAGMAs aplicados una sola vez por conexión física
+DEFAULT_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -8000",        # ~8 MB de caché de páginas
+    "PRAGMA mmap_size = 67108864",      # 64 MB mapeados en memoria
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA busy_timeout = 5000",
+)
+
+
+class PooledConnection:
+    """Envoltura de sqlite3.Connection cuyo close() devuelve la conexión al pool"""
+
+    def __init__(self, pool, conn: sqlite3.Connection):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self._conn.commit()
+        else:
+            self._conn.rollback()
+        self.close()
+        return False
+
+    def close(self):
+        """Devolver la conexión al pool (descartando transacciones a medio terminar)"""
+        if self._conn is None:
+            return
+        conn, self._conn = self._conn, None
+        self._pool.release(conn)
+
+
+class ConnectionPool:
+    """Pool acotado de conexiones SQLite con checkout/checkin.
+
+    Las conexiones se crean bajo demanda y se reutilizan entre llamadas e hilos.
+    Si todas están en uso se abre una conexión extra en lugar de bloquear, y al
+    devolverla se cierra si el pool ya tiene ``max_size`` conexiones libres.
+    """
+
+    def __init__(self, db_path: str, max_size: int = 5, pragmas=DEFAULT_PRAGMAS):
+        self.db_path = db_path
+        self.max_size = max_size
+        self.pragmas = pragmas
+        self._idle: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        for pragma in self.pragmas:
+            conn.execute(pragma)
+        return conn
+
+    def acquire(self) -> PooledConnection:
+        """Obtener una conexión del pool (checkout).
+
+        Lanza sqlite3.ProgrammingError si el pool ya se cerró con close_all.
+        """
+        with self._lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError(f"El pool de conexiones de {self.db_path} está cerrado")
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            conn = self._connect()
+        return PooledConnection(self, conn)
+
+    def release(self, conn: sqlite3.Connection):
+        """Devolver una conexión al pool (checkin)"""
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            if not self._closed and len(self._idle) < self.max_size:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def close_all(self):
+        """Cerrar todas las conexiones libres y rechazar nuevos checkouts y checkins"""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
@@ -1,20 +1,277 @@
+import os
 import sqlite3
 import hashlib
+import threading
+import time
+import base64
+import json
+from dataclasses import replace
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 from database.models import Notification
-from database.models import User, Post, Like, Comment, Follow
+from database.models import User, Post, Like, Comment, Follow, SearchResult
+from database.connection_pool import ConnectionPool
+from database.cache import TTLCache
+from database.write_behind import LikeWriteBehindQueue
+from database.migrations import apply_migrations
+from database.events import EventBus, NotificationChangeFeed, notification_topic
+from database.venues import VENUE_IMPORT_BATCH, import_venues, venue_from_row
+from database.image_renditions import record_renditions, select_renditions
+from database.blob_store import (
+    BLOB_GC_GRACE_SECONDS, BLOB_ROOT, add_blob_refs, avatar_owner, orphaned_blobs, post_owner,
+    register_blob, release_blob_refs, write_blob
+)
+from database.uploads import UPLOAD_MAX_WORKERS, UploadQueue, upload_topic
+from database.retention import NotificationRetentionJob, RetentionPolicy, RetentionReport, prune_notifications
+from database.timeline import (
+    FANOUT_FOLLOWER_THRESHOLD, FOLLOW_BACKFILL_LIMIT, FEED_UPPER_BOUND,
+    TIMELINE_BACKFILL_SQL, fan_out_pending_posts, mark_unfanned_posts, merge_post_streams
+)
+from database.notifications import (
+    find_unread_count_mismatches, notify_post_owner, rebuild_unread_counts, record_notification,
+    retract_notification, retract_post_notification
+)
+from database.hashtags import (
+    TRENDING_WINDOW_HOURS, expire_tag_buckets, extract_hashtags, normalize_tag, record_post_tags,
+    remove_post_tags
+)
+from database.search import (
+    EXACT_RANK_MATCHES, PREFIX_INDEX_MAX, PREFIX_SCAN_FACTOR, SEARCH_CANDIDATE_LIMIT, SEARCH_KINDS,
+    SEARCH_TEXT_COLUMNS, bm25_scores, build_match_expression, decode_search_cursor, encode_search_cursor,
+    estimate_document_frequency, normalize_kinds, parse_query, refresh_search_stats,
+    search_candidates_sql, search_probe_sql, term_expression, term_pattern, term_range
+)
+
+# Variables por consulta en los IN (...) por lotes; por debajo del límite
+# histórico de SQLite (SQLITE_MAX_VARIABLE_NUMBER = 999)
+SQLITE_MAX_VARIABLES = 900
+
+# Consultas frecuentes; database.query_plan revisa sus planes con estas mismas cadenas
+POSTS_FEED_SQL = '''
+    SELECT p.*, u.username, u.avatar_url as user_avatar
+    FROM posts p
+    JOIN users u ON p.user_id = u.id
+    ORDER BY p.created_at DESC
+    LIMIT ?
+'''
+
+POSTS_FEED_PAGE_SQL = '''
+    SELECT p.*, u.username, u.avatar_url as user_avatar
+    FROM posts p
+    JOIN users u ON p.user_id = u.id
+    WHERE (p.created_at, p.id) < (?, ?)
+    ORDER BY p.created_at DESC, p.id DESC
+    LIMIT ?
+'''
+
+FOLLOWING_TIMELINE_PAGE_SQL = '''
+    SELECT p.*, u.username, u.avatar_url as user_avatar
+    FROM timeline t
+    JOIN posts p ON p.id = t.post_id
+    JOIN users u ON u.id = p.user_id
+    WHERE t.user_id = ? AND (t.created_at, t.post_id) < (?, ?)
+    ORDER BY t.created_at DESC, t.post_id DESC
+    LIMIT ?
+'''
+
+AUTHOR_POSTS_PAGE_SQL = '''
+    SELECT p.*, u.username, u.avatar_url as user_avatar
+    FROM posts p
+    JOIN users u ON p.user_id = u.id
+    WHERE p.user_id = ? AND (p.created_at, p.id) < (?, ?)
+    ORDER BY p.created_at DESC, p.id DESC
+    LIMIT ?
+'''
+
+TAG_POSTS_PAGE_SQL = '''
+    SELECT p.*, u.username, u.avatar_url as user_avatar
+    FROM post_tags t
+    JOIN posts p ON p.id = t.post_id
+    JOIN users u ON u.id = p.user_id
+    WHERE t.tag = ? AND (t.created_at, t.post_id) < (?, ?)
+    ORDER BY t.created_at DESC, t.post_id DESC
+    LIMIT ?
+'''
+
+TRENDING_TAGS_SQL = '''
+    SELECT tag, uses FROM tag_window ORDER BY uses DESC, tag LIMIT ?
+'''
+
+USER_POSTS_SQL = '''
+    SELECT p.*, u.username, u.avatar_url as user_avatar
+    FROM posts p
+    JOIN users u ON p.user_id = u.id
+    WHERE p.user_id = ?
+    ORDER BY p.created_at DESC
+'''
+
+FOLLOWER_IDS_SQL = '''
+    SELECT follower_id FROM follows WHERE following_id = ?
+'''
+
+POST_COMMENTS_SQL = '''
+    SELECT c.*, u.username, u.avatar_url as user_avatar
+    FROM comments c
+    JOIN users u ON u.id = c.user_id
+    WHERE c.post_id = ?
+    ORDER BY c.created_at DESC, c.id DESC
+    LIMIT ?
+'''
+
+USER_NOTIFICATIONS_SQL = '''
+    SELECT n.*, u.username as from_username, u.avatar_url as from_user_avatar
+    FROM notifications n
+    JOIN users u ON n.from_user_id = u.id
+    WHERE n.user_id = ?
+    ORDER BY n.created_at DESC
+    LIMIT ?
+'''
+
+UNREAD_NOTIFICATIONS_COUNT_SQL = '''
+    SELECT unread_count FROM notification_counters WHERE user_id = ?
+'''
+
+VENUE_IDS_BY_CATEGORY_SQL = 'SELECT id FROM venues WHERE category = ? ORDER BY id'
+
+VENUE_IDS_BY_SPORT_SQL = '''
+    SELECT s.venue_id FROM venue_sports s JOIN venues v ON v.id = s.venue_id
+    WHERE s.sport = ? AND (? IS NULL OR v.category = ?)
+    ORDER BY s.venue_id
+'''
+
+VENUES_SPORTS_SQL = 'SELECT venue_id, sport FROM venue_sports ORDER BY venue_id, position'
+
+
+def chunked(values: List, size: int = SQLITE_MAX_VARIABLES):
+    """Dividir una lista en bloques de como máximo size elementos"""
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def encode_feed_cursor(created_at, post_id: int) -> str:
+    """Codificar la posición (created_at, id) como cursor opaco"""
+    raw = json.dumps([str(created_at), post_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_feed_cursor(cursor: str) -> Tuple[str, int]:
+    """Decodificar un cursor de feed; lanza ValueError si es inválido"""
+    try:
+        created_at, post_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return str(created_at), int(post_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Cursor de feed inválido: {cursor!r}") from e
+
 
 class DatabaseManager:
-    def __init__(self, db_path: str = "teamup.db"):
+    def __init__(self, db_path: str = "teamup.db", pool_size: int = 5,
+                 fanout_threshold: int = FANOUT_FOLLOWER_THRESHOLD,
+                 user_cache_size: int = 1024, user_cache_ttl: float = 60.0,
+                 blob_root: str = BLOB_ROOT):
         self.db_path = db_path
+        # Almacén de imágenes por contenido; el lock ordena escrituras y recolección
+        self.blob_root = blob_root
+        self._blob_lock = threading.Lock()
+        # Caché de lectura de perfiles; la invalidan las escrituras que los modifican
+        self.user_cache = TTLCache(user_cache_size, user_cache_ttl)
+        # Cola write-behind opcional para likes (ver enable_like_write_behind)
+        self.like_queue = None
+        # Depuración periódica de notificaciones (ver enable_notification_retention)
+        self.retention_job = None
+        # Subidas en segundo plano (ver enable_upload_queue); se crea con la primera
+        # subida y el lock evita que dos sesiones creen dos pools a la vez
+        self.upload_queue = None
+        self._upload_queue_lock = threading.Lock()
+        # Autores con más seguidores se leen al pedir el feed en vez de distribuirse
+        self.fanout_threshold = fanout_threshold
+        # Hora (epoch / 3600) de la última depuración de tendencias (ver get_trending_tags)
+        self._trending_refreshed_hour = None
+        # pool_size=0 desactiva el pool: una conexión nueva por operación
+        self.pool = ConnectionPool(db_path, max_size=pool_size) if pool_size > 0 else None
         self.init_database()
+        # Bus en proceso: las escrituras publican los cambios de notificaciones
+        self.events = EventBus()
+        self.notification_feed = NotificationChangeFeed(self, self.events)
     
     def get_connection(self):
+        """Obtener una conexión; close() la devuelve al pool en lugar de cerrarla"""
+        if self.pool:
+            return self.pool.acquire()
         conn = sqlite3.connect(self.db_path)
         conn.row_factory = sqlite3.Row
         return conn
     
+    def enable_like_write_behind(self, flush_interval: float = 0.05, max_pending: int = 5000):
+        """Agrupar los toggles de likes y escribirlos por lotes en segundo plano"""
+        if not self.like_queue:
+            self.like_queue = LikeWriteBehindQueue(self, flush_interval, max_pending)
+        return self.like_queue
+    
+    def enable_notification_retention(self, policy: Optional[RetentionPolicy] = None,
+                                      interval: float = 3600.0):
+        """Aplicar la política de retención de notificaciones en segundo plano"""
+        if not self.retention_job:
+            self.retention_job = NotificationRetentionJob(self, policy or RetentionPolicy(), interval)
+        return self.retention_job
+    
+    def enable_upload_queue(self, max_workers: int = UPLOAD_MAX_WORKERS):
+        """Procesar las subidas de imágenes en un pool de hilos (ver database.uploads)"""
+        with self._upload_queue_lock:
+            if not self.upload_queue:
+                self.upload_queue = UploadQueue(self, max_workers)
+            return self.upload_queue
+    
+    def subscribe_uploads(self, user_id: int, callback):
+        """Recibir una copia del UploadJob por cada cambio en las subidas del usuario.
+
+        El callback corre en el hilo de la subida; devuelve la función para desuscribirse.
+        """
+        return self.events.subscribe(upload_topic(user_id), callback)
+    
+    def prune_notifications(self, policy: Optional[RetentionPolicy] = None) -> RetentionReport:
+        """Depurar notificaciones ahora en lotes cortos; devuelve filas borradas y tiempo"""
+        try:
+            return prune_notifications(self, policy or RetentionPolicy())
+        except sqlite3.Error as e:
+            print(f"Error al depurar notificaciones: {e}")
+            return RetentionReport()
+    
+    def subscribe_notifications(self, user_id: int, callback):
+        """Recibir un NotificationEvent por cada lote de cambios en las notificaciones del usuario.
+
+        El callback corre en el hilo que escribió; devuelve la función para desuscribirse.
+        """
+        return self.events.subscribe(notification_topic(user_id), callback)
+    
+    def publish_notification_changes(self) -> int:
+        """Publicar en el bus los cambios de notificaciones ya confirmados"""
+        try:
+            return self.notification_feed.drain()
+        except sqlite3.Error as e:
+            print(f"Error al publicar cambios de notificaciones: {e}")
+            return 0
+    
+    def start_notification_polling(self, interval: float = 1.0):
+        """Con varios procesos sobre la misma base: leer también los cambios de los demás"""
+        self.notification_feed.start_polling(interval)
+    
+    def close(self):
+        """Escribir lo pendiente y cerrar las conexiones abiertas del pool"""
+        # Primero las subidas: crean posts y notificaciones
+        with self._upload_queue_lock:
+            upload_queue, self.upload_queue = self.upload_queue, None
+        if upload_queue:
+            upload_queue.close()
+        if self.like_queue:
+            self.like_queue.close()
+            self.like_queue = None
+        if self.retention_job:
+            self.retention_job.close()
+            self.retention_job = None
+        self.notification_feed.stop()
+        if self.pool:
+            self.pool.close_all()
+    
     def init_database(self):
         conn = self.get_connection()
         cursor = conn.cursor()
@@ -110,6 +367,11 @@ class DatabaseManager:
         ''')
         
         conn.commit()
+        
+        # Índices y cambios de esquema versionados (PRAGMA user_version)
+        applied = apply_migrations(conn)
+        if applied:
+            print(f"Migraciones aplicadas: {applied}")
         conn.close()
 
         
@@ -176,7 +438,31 @@ class DatabaseManager:
             )
         return None
     
+    def _row_to_user(self, row) -> User:
+        return User(
+            id=row['id'],
+            username=row['username'],
+            email=row['email'],
+            full_name=row['full_name'],
+            bio=row['bio'],
+            avatar_url=row['avatar_url'],
+            sport=row['sport'],
+            followers_count=row['followers_count'],
+            following_count=row['following_count'],
+            posts_count=row['posts_count'],
+            is_verified=row['is_verified'],
+            created_at=row['created_at'],
+            updated_at=row['updated_at']
+        )
+    
     def get_user_by_id(self, user_id: int) -> Optional[User]:
+        # Se devuelven copias para que quien llama pueda modificarlas sin tocar la caché
+        cached = self.user_cache.get(user_id)
+        if cached is not None:
+            return replace(cached)
+        # Antes de leer: si una escritura lo invalida mientras tanto, no se cachea
+        generation = self.user_cache.generation(user_id)
+        
         conn = self.get_connection()
         cursor = conn.cursor()
         
@@ -185,29 +471,56 @@ class DatabaseManager:
         conn.close()
         
         if row:
-            return User(
-                id=row['id'],
-                username=row['username'],
-                email=row['email'],
-                full_name=row['full_name'],
-                bio=row['bio'],
-                avatar_url=row['avatar_url'],
-                sport=row['sport'],
-                followers_count=row['followers_count'],
-                following_count=row['following_count'],
-                posts_count=row['posts_count'],
-                is_verified=row['is_verified'],
-                created_at=row['created_at'],
-                updated_at=row['updated_at']
-            )
+            user = self._row_to_user(row)
+            self.user_cache.set(user_id, user, generation)
+            return replace(user)
         return None
     
-    def update_user(self, user: User) -> bool:
-        """Actualizar información del usuario"""
+    def get_users_by_ids(self, user_ids: Iterable[int]) -> Dict[int, User]:
+        """Obtener varios usuarios a la vez; solo consulta los que no están en caché"""
+        users = {}
+        missing = {}
+        for user_id in dict.fromkeys(user_ids):
+            cached = self.user_cache.get(user_id)
+            if cached is not None:
+                users[user_id] = replace(cached)
+            else:
+                missing[user_id] = self.user_cache.generation(user_id)
+        
+        if missing:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            rows = []
+            for chunk in chunked(list(missing)):
+                placeholders = ",".join("?" * len(chunk))
+                cursor.execute(f'SELECT * FROM users WHERE id IN ({placeholders})', chunk)
+                rows.extend(cursor.fetchall())
+            conn.close()
+            
+            for row in rows:
+                user = self._row_to_user(row)
+                self.user_cache.set(user.id, user, missing[user.id])
+                users[user.id] = replace(user)
+        
+        return users
+    
+    def get_user_cache_stats(self) -> dict:
+        """Estadísticas de la caché de perfiles (aciertos, fallos, desalojos)"""
+        return self.user_cache.stats()
+    
+    def update_user(self, user: User, avatar_renditions: Optional[Dict] = None) -> bool:
+        """Actualizar información del usuario.
+
+        avatar_renditions son las versiones de user.avatar_url (ver utils.image_pipeline);
+        el avatar anterior se suelta y, si nadie más lo usa, lo borra la recolección.
+        """
         conn = self.get_connection()
         cursor = conn.cursor()
         
         try:
+            cursor.execute('SELECT avatar_url FROM users WHERE id = ?', (user.id,))
+            row = cursor.fetchone()
+            avatar_changed = row is not None and row['avatar_url'] != user.avatar_url
             cursor.execute('''
                 UPDATE users 
                 SET full_name = ?,
@@ -217,10 +530,20 @@ class DatabaseManager:
                     updated_at = CURRENT_TIMESTAMP
                 WHERE id = ?
             ''', (user.full_name, user.bio, user.avatar_url, user.sport, user.id))
+            success = cursor.rowcount > 0
+            
+            if avatar_changed:
+                release_blob_refs(cursor, avatar_owner(user.id))
+            if avatar_renditions:
+                record_renditions(cursor, user.avatar_url, avatar_renditions)
+                add_blob_refs(cursor, avatar_owner(user.id),
+                              (rendition.sha256 for rendition in avatar_renditions.values()))
             
             conn.commit()
-            success = cursor.rowcount > 0
+            self.user_cache.invalidate(user.id)
             conn.close()
+            if avatar_changed:
+                self.collect_blob_garbage()
             return success
         except Exception as e:
             print(f"Error al actualizar usuario: {e}")
@@ -228,7 +551,8 @@ class DatabaseManager:
             return False
 
     # Post operations
-    def create_post(self, post: Post) -> Optional[int]:
+    def create_post(self, post: Post, image_renditions: Optional[Dict] = None) -> Optional[int]:
+        """Crear un post; image_renditions son las versiones de post.image_url (ver utils.image_pipeline)"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
@@ -238,82 +562,356 @@ class DatabaseManager:
         ''', (post.user_id, post.caption, post.image_url))
         
         post_id = cursor.lastrowid
+        if image_renditions:
+            record_renditions(cursor, post.image_url, image_renditions)
+            add_blob_refs(cursor, post_owner(post_id),
+                          (rendition.sha256 for rendition in image_renditions.values()))
         
         # Update user's post count
         cursor.execute('''
             UPDATE users SET posts_count = posts_count + 1 WHERE id = ?
         ''', (post.user_id,))
         
+        # Fan-out-on-write: copiar el post al timeline de cada seguidor
+        cursor.execute('''
+            SELECT p.created_at, u.followers_count
+            FROM posts p JOIN users u ON u.id = p.user_id
+            WHERE p.id = ?
+        ''', (post_id,))
+        row = cursor.fetchone()
+        if row and row['followers_count'] <= self.fanout_threshold:
+            cursor.execute('''
+                INSERT OR IGNORE INTO timeline (user_id, created_at, post_id, author_id)
+                SELECT follower_id, ?, ?, ? FROM follows WHERE following_id = ?
+            ''', (row['created_at'], post_id, post.user_id, post.user_id))
+        elif row:
+            # Se lee al pedir el feed; si el autor vuelve a quedar bajo el umbral
+            # se distribuye entonces (ver toggle_follow)
+            cursor.execute('UPDATE posts SET fanned_out = 0 WHERE id = ?', (post_id,))
+        
+        # Índice de hashtags y contadores de tendencias
+        if row:
+            record_post_tags(cursor, post_id, row['created_at'], extract_hashtags(post.caption))
+        
         conn.commit()
+        self.user_cache.invalidate(post.user_id)
         conn.close()
         return post_id
     
-    def get_posts_feed(self, limit: int = 20) -> List[Post]:
+    def delete_post(self, post_id: int, user_id: int) -> bool:
+        """Borrar un post propio con sus likes, comentarios, guardados y notificaciones.
+
+        El trigger posts_release_blobs suelta sus imágenes; las que nadie más usa se
+        borran del disco al terminar.
+        """
         conn = self.get_connection()
         cursor = conn.cursor()
+        try:
+            cursor.execute('SELECT user_id, caption, created_at FROM posts WHERE id = ?', (post_id,))
+            post = cursor.fetchone()
+            if post is None or post['user_id'] != user_id:
+                return False
+            
+            cursor.execute('DELETE FROM likes WHERE post_id = ?', (post_id,))
+            cursor.execute('DELETE FROM comments WHERE post_id = ?', (post_id,))
+            cursor.execute('DELETE FROM saved_posts WHERE post_id = ?', (post_id,))
+            # Por la clave primaria de timeline: solo los seguidores recibieron el post
+            cursor.execute(f'''
+                DELETE FROM timeline
+                WHERE user_id IN ({FOLLOWER_IDS_SQL})
+                  AND created_at = ? AND post_id = ?
+            ''', (user_id, post['created_at'], post_id))
+            remove_post_tags(cursor, post_id)
+            cursor.execute('''
+                DELETE FROM notification_actors WHERE notification_id IN (
+                    SELECT id FROM notifications WHERE user_id = ? AND post_id = ?
+                )
+            ''', (user_id, post_id))
+            cursor.execute('DELETE FROM notifications WHERE user_id = ? AND post_id = ?', (user_id, post_id))
+            cursor.execute('DELETE FROM posts WHERE id = ?', (post_id,))
+            cursor.execute('UPDATE users SET posts_count = posts_count - 1 WHERE id = ?', (user_id,))
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"Error al borrar publicación: {e}")
+            conn.rollback()
+            return False
+        finally:
+            conn.close()
         
-        cursor.execute('''
+        self.user_cache.invalidate(user_id)
+        self.publish_notification_changes()
+        self.collect_blob_garbage()
+        return True
+    
+    def store_blob(self, data: bytes, extension: str) -> Tuple[str, str]:
+        """Guardar bytes en el almacén por contenido; devuelve (sha256, ruta).
+
+        Si ya estaban guardados no se escriben de nuevo. El blob queda sin
+        referencias hasta que un post o avatar lo use (create_post, update_user).
+        """
+        with self._blob_lock:
+            digest, path = write_blob(data, extension, self.blob_root)
+            conn = self.get_connection()
+            try:
+                register_blob(conn.cursor(), digest, path, len(data))
+                conn.commit()
+            finally:
+                conn.close()
+        return digest, path
+    
+    def collect_blob_garbage(self, grace_seconds: int = BLOB_GC_GRACE_SECONDS) -> Tuple[int, int]:
+        """Borrar los blobs sin referencias; devuelve (cantidad, bytes liberados)"""
+        removed = freed = 0
+        with self._blob_lock:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            try:
+                for digest, path in orphaned_blobs(cursor, grace_seconds):
+                    # Volver a mirar el contador: pudo ganar una referencia desde la consulta
+                    cursor.execute('DELETE FROM blobs WHERE sha256 = ? AND refcount = 0', (digest,))
+                    if not cursor.rowcount:
+                        continue
+                    cursor.execute('DELETE FROM image_renditions WHERE source = ?', (path,))
+                    conn.commit()
+                    try:
+                        freed += os.path.getsize(path)
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                    removed += 1
+            except sqlite3.Error as e:
+                print(f"Error al recolectar imágenes: {e}")
+                conn.rollback()
+            finally:
+                conn.close()
+        return removed, freed
+    
+    def _row_to_post(self, row) -> Post:
+        return Post(
+            id=row['id'],
+            user_id=row['user_id'],
+            caption=row['caption'],
+            image_url=row['image_url'],
+            likes_count=row['likes_count'],
+            comments_count=row['comments_count'],
+            created_at=row['created_at'],
+            updated_at=row['updated_at'],
+            username=row['username'],
+            user_avatar=row['user_avatar']
+        )
+    
+    def get_post(self, post_id: int) -> Optional[Post]:
+        conn = self.get_connection()
+        row = conn.execute('''
             SELECT p.*, u.username, u.avatar_url as user_avatar
             FROM posts p
             JOIN users u ON p.user_id = u.id
-            ORDER BY p.created_at DESC
-            LIMIT ?
-        ''', (limit,))
+            WHERE p.id = ?
+        ''', (post_id,)).fetchone()
+        conn.close()
+        return self._row_to_post(row) if row else None
+    
+    def get_posts_feed(self, limit: int = 20) -> List[Post]:
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute(POSTS_FEED_SQL, (limit,))
         
         rows = cursor.fetchall()
         conn.close()
         
-        posts = []
-        for row in rows:
-            posts.append(Post(
-                id=row['id'],
-                user_id=row['user_id'],
-                caption=row['caption'],
-                image_url=row['image_url'],
-                likes_count=row['likes_count'],
-                comments_count=row['comments_count'],
-                created_at=row['created_at'],
-                updated_at=row['updated_at'],
-                username=row['username'],
-                user_avatar=row['user_avatar']
-            ))
+        return [self._row_to_post(row) for row in rows]
+    
+    def get_posts_feed_page(self, cursor: Optional[str] = None, limit: int = 20) -> Tuple[List[Post], Optional[str]]:
+        """Página del feed paginada por keyset sobre (created_at, id).
+        
+        Devuelve (posts, next_cursor); next_cursor es None en la última página.
+        """
+        created_at, post_id = decode_feed_cursor(cursor) if cursor else FEED_UPPER_BOUND
+        conn = self.get_connection()
+        db_cursor = conn.cursor()
         
-        return posts
+        # Se pide un post extra para saber si existe una página siguiente
+        db_cursor.execute(POSTS_FEED_PAGE_SQL, (created_at, post_id, limit + 1))
+        
+        rows = db_cursor.fetchall()
+        conn.close()
+        
+        posts = [self._row_to_post(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = posts[-1]
+            next_cursor = encode_feed_cursor(last.created_at, last.id)
+        return posts, next_cursor
     
+    def get_following_feed_page(self, user_id: int, cursor: Optional[str] = None,
+                                limit: int = 20) -> Tuple[List[Post], Optional[str]]:
+        """Feed de posts de las personas que sigue el usuario, paginado por keyset.
+        
+        Estrategia híbrida: los autores con pocos seguidores ya están en el
+        timeline materializado (fan-out-on-write); los que superan
+        fanout_threshold se leen ahora y se mezclan (fan-out-on-read).
+        """
+        created_at, post_id = decode_feed_cursor(cursor) if cursor else FEED_UPPER_BOUND
+        conn = self.get_connection()
+        db_cursor = conn.cursor()
+        
+        streams = []
+        db_cursor.execute(FOLLOWING_TIMELINE_PAGE_SQL, (user_id, created_at, post_id, limit + 1))
+        streams.append(db_cursor.fetchall())
+        
+        db_cursor.execute('''
+            SELECT f.following_id
+            FROM follows f JOIN users a ON a.id = f.following_id
+            WHERE f.follower_id = ? AND a.followers_count > ?
+        ''', (user_id, self.fanout_threshold))
+        for author in db_cursor.fetchall():
+            db_cursor.execute(AUTHOR_POSTS_PAGE_SQL, (author['following_id'], created_at, post_id, limit + 1))
+            streams.append(db_cursor.fetchall())
+        conn.close()
+        
+        rows = merge_post_streams(streams, limit + 1)
+        posts = [self._row_to_post(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = posts[-1]
+            next_cursor = encode_feed_cursor(last.created_at, last.id)
+        return posts, next_cursor
+    
+    def rebuild_timeline(self):
+        """Regenerar el timeline materializado desde follows y posts"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('DELETE FROM timeline')
+        cursor.execute(TIMELINE_BACKFILL_SQL, (self.fanout_threshold,))
+        cursor.execute('UPDATE posts SET fanned_out = 1 WHERE fanned_out = 0')
+        mark_unfanned_posts(cursor, self.fanout_threshold)
+        conn.commit()
+        conn.close()
+    
+    def get_posts_by_tag(self, tag: str, cursor: Optional[str] = None,
+                         limit: int = 20) -> Tuple[List[Post], Optional[str]]:
+        """Posts con un hashtag, del más nuevo al más viejo, paginados por keyset.
+        
+        Acepta el tag con o sin #; devuelve (posts, next_cursor).
+        """
+        tag = normalize_tag(tag)
+        created_at, post_id = decode_feed_cursor(cursor) if cursor else FEED_UPPER_BOUND
+        
+        conn = self.get_connection()
+        db_cursor = conn.cursor()
+        db_cursor.execute(TAG_POSTS_PAGE_SQL, (tag, created_at, post_id, limit + 1))
+        rows = db_cursor.fetchall()
+        conn.close()
+        
+        posts = [self._row_to_post(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = posts[-1]
+            next_cursor = encode_feed_cursor(last.created_at, last.id)
+        return posts, next_cursor
+    
+    def get_trending_tags(self, limit: int = 10) -> List[Tuple[str, int]]:
+        """Tags más usados en las últimas TRENDING_WINDOW_HOURS horas, como (tag, usos).
+        
+        Lee los primeros `limit` del índice de la ventana precalculada. Los
+        buckets son por hora: los vencidos se descuentan con la primera lectura
+        de cada hora, no en cada una.
+        """
+        hour = int(time.time()) // 3600
+        if hour != self._trending_refreshed_hour:
+            self._trending_refreshed_hour = hour
+            self.refresh_trending_tags()
+        conn = self.get_connection()
+        rows = conn.execute(TRENDING_TAGS_SQL, (limit,)).fetchall()
+        conn.close()
+        return [(row['tag'], row['uses']) for row in rows]
+    
+    def refresh_trending_tags(self, window_hours: int = TRENDING_WINDOW_HOURS) -> int:
+        """Job de tendencias: sacar de la ventana los buckets por hora vencidos"""
+        conn = self.get_connection()
+        try:
+            expired = expire_tag_buckets(conn.cursor(), window_hours)
+            conn.commit()
+            return expired
+        except sqlite3.Error as e:
+            conn.rollback()
+            print(f"Error al actualizar tendencias: {e}")
+            return 0
+        finally:
+            conn.close()
+    
+    # Venue operations (lugares del mapa)
+    def import_venues(self, venues: Iterable[Dict], batch_size: int = VENUE_IMPORT_BATCH) -> int:
+        """Importar lugares (insertar o reemplazar por id) en una transacción"""
+        conn = self.get_connection()
+        try:
+            imported = import_venues(conn.cursor(), venues, batch_size)
+            conn.commit()
+            return imported
+        except (sqlite3.Error, KeyError, ValueError) as e:
+            print(f"Error al importar lugares: {e}")
+            conn.rollback()
+            return 0
+        finally:
+            conn.close()
+
+    def load_venues(self) -> List[Dict]:
+        """Todos los lugares con sus deportes, en dos consultas"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(VENUES_SPORTS_SQL)
+        sports: Dict[int, List[str]] = {}
+        for row in cursor.fetchall():
+            sports.setdefault(row['venue_id'], []).append(row['sport'])
+        cursor.execute('SELECT * FROM venues ORDER BY id')
+        venues = [venue_from_row(row, sports.get(row['id'], [])) for row in cursor.fetchall()]
+        conn.close()
+        return venues
+
+    def get_venue(self, venue_id: int) -> Optional[Dict]:
+        """Un lugar por id"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT * FROM venues WHERE id = ?', (venue_id,))
+        row = cursor.fetchone()
+        if row is None:
+            conn.close()
+            return None
+        cursor.execute('SELECT sport FROM venue_sports WHERE venue_id = ? ORDER BY position', (venue_id,))
+        sports = [sport_row['sport'] for sport_row in cursor.fetchall()]
+        conn.close()
+        return venue_from_row(row, sports)
+
+    def get_venue_ids(self, category: Optional[str] = None, sport: Optional[str] = None) -> List[int]:
+        """Ids de lugares por categoría y/o deporte (usa idx_venues_category y venue_sports)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        if sport:
+            cursor.execute(VENUE_IDS_BY_SPORT_SQL, (sport, category, category))
+        elif category:
+            cursor.execute(VENUE_IDS_BY_CATEGORY_SQL, (category,))
+        else:
+            cursor.execute('SELECT id FROM venues ORDER BY id')
+        ids = [row[0] for row in cursor.fetchall()]
+        conn.close()
+        return ids
+
     def get_user_posts(self, user_id: int) -> List[Post]:
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute('''
-            SELECT p.*, u.username, u.avatar_url as user_avatar
-            FROM posts p
-            JOIN users u ON p.user_id = u.id
-            WHERE p.user_id = ?
-            ORDER BY p.created_at DESC
-        ''', (user_id,))
+        cursor.execute(USER_POSTS_SQL, (user_id,))
         
         rows = cursor.fetchall()
         conn.close()
         
-        posts = []
-        for row in rows:
-            posts.append(Post(
-                id=row['id'],
-                user_id=row['user_id'],
-                caption=row['caption'],
-                image_url=row['image_url'],
-                likes_count=row['likes_count'],
-                comments_count=row['comments_count'],
-                created_at=row['created_at'],
-                updated_at=row['updated_at'],
-                username=row['username'],
-                user_avatar=row['user_avatar']
-            ))
-        
-        return posts
+        return [self._row_to_post(row) for row in rows]
     
     # Like operations
     def toggle_like(self, user_id: int, post_id: int) -> bool:
+        if self.like_queue:
+            return self.like_queue.toggle(user_id, post_id)
         
         conn = self.get_connection()
         cursor = conn.cursor()
@@ -335,6 +933,9 @@ class DatabaseManager:
                 UPDATE posts SET likes_count = likes_count - 1 WHERE id = ?
             ''', (post_id,))
             
+            # Retirar el like de la notificación agrupada
+            retract_post_notification(cursor, user_id, post_id, 'like')
+            
             liked = False
         else:
             # Add like
@@ -346,25 +947,161 @@ class DatabaseManager:
                 UPDATE posts SET likes_count = likes_count + 1 WHERE id = ?
             ''', (post_id,))
             
-            # CREAR NOTIFICACIÓN ← NUEVO
-            # Obtener el dueño del post
-            cursor.execute('SELECT user_id FROM posts WHERE id = ?', (post_id,))
-            post_owner = cursor.fetchone()
-            
-            if post_owner and post_owner['user_id'] != user_id:
-                # Solo notificar si no es tu propio post
-                cursor.execute('''
-                    INSERT INTO notifications (user_id, from_user_id, type, post_id, message)
-                    VALUES (?, ?, 'like', ?, 'le dio like a tu publicación')
-                ''', (post_owner['user_id'], user_id, post_id))
+            # CREAR NOTIFICACIÓN (se agrupa con los demás likes del post)
+            notify_post_owner(cursor, user_id, post_id, 'like')
             
             liked = True
     
         conn.commit()
         conn.close()
+        self.publish_notification_changes()
         return liked
 
 
+    def get_liked_post_ids(self, user_id: int) -> Set[int]:
+        """Ids de todos los posts con like del usuario (se carga una vez por sesión)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT post_id FROM likes WHERE user_id = ?', (user_id,))
+        post_ids = {row['post_id'] for row in cursor.fetchall()}
+        conn.close()
+        if self.like_queue:
+            post_ids = self.like_queue.overlay(user_id, post_ids)
+        return post_ids
+    
+    # Saved posts operations
+    def toggle_save(self, user_id: int, post_id: int) -> bool:
+        """Guardar/quitar de guardados una publicación; devuelve si quedó guardada"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute('''
+                DELETE FROM saved_posts WHERE user_id = ? AND post_id = ?
+            ''', (user_id, post_id))
+            
+            if cursor.rowcount:
+                saved = False
+            else:
+                cursor.execute('''
+                    INSERT INTO saved_posts (user_id, post_id) VALUES (?, ?)
+                ''', (user_id, post_id))
+                saved = True
+            
+            conn.commit()
+            return saved
+        except Exception as e:
+            print(f"Error al guardar publicación: {e}")
+            conn.rollback()
+            return False
+        finally:
+            conn.close()
+    
+    def get_saved_post_ids(self, user_id: int) -> Set[int]:
+        """Ids de los posts guardados por el usuario (se carga una vez por sesión)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT post_id FROM saved_posts WHERE user_id = ?', (user_id,))
+        post_ids = {row['post_id'] for row in cursor.fetchall()}
+        conn.close()
+        return post_ids
+    
+    def get_like_states(self, user_id: int, post_ids: Iterable[int]) -> Dict[int, bool]:
+        """Para cada post, si el usuario le dio like (una consulta por lote)"""
+        post_ids = list(dict.fromkeys(post_ids))
+        states = {post_id: False for post_id in post_ids}
+        if not post_ids:
+            return states
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        for chunk in chunked(post_ids, SQLITE_MAX_VARIABLES - 1):
+            placeholders = ",".join("?" * len(chunk))
+            cursor.execute(f'''
+                SELECT post_id FROM likes WHERE user_id = ? AND post_id IN ({placeholders})
+            ''', (user_id, *chunk))
+            for row in cursor.fetchall():
+                states[row['post_id']] = True
+        conn.close()
+        if self.like_queue:
+            liked = self.like_queue.overlay(user_id, (pid for pid, state in states.items() if state))
+            states = {post_id: post_id in liked for post_id in states}
+        return states
+    
+    def get_comments_for_posts(self, post_ids: Iterable[int], per_post_limit: int = 3) -> Dict[int, List[Comment]]:
+        """Últimos comentarios de varios posts, como máximo per_post_limit por post"""
+        post_ids = list(dict.fromkeys(post_ids))
+        comments = {post_id: [] for post_id in post_ids}
+        if not post_ids:
+            return comments
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        for chunk in chunked(post_ids, SQLITE_MAX_VARIABLES - 1):
+            placeholders = ",".join("?" * len(chunk))
+            cursor.execute(f'''
+                SELECT * FROM (
+                    SELECT c.*, u.username, u.avatar_url as user_avatar,
+                           ROW_NUMBER() OVER (
+                               PARTITION BY c.post_id ORDER BY c.created_at DESC, c.id DESC
+                           ) AS comment_rank
+                    FROM comments c
+                    JOIN users u ON u.id = c.user_id
+                    WHERE c.post_id IN ({placeholders})
+                )
+                WHERE comment_rank <= ?
+                ORDER BY post_id, created_at, id
+            ''', (*chunk, per_post_limit))
+            for row in cursor.fetchall():
+                comments[row['post_id']].append(Comment(
+                    id=row['id'],
+                    user_id=row['user_id'],
+                    post_id=row['post_id'],
+                    content=row['content'],
+                    created_at=row['created_at'],
+                    username=row['username'],
+                    user_avatar=row['user_avatar']
+                ))
+        conn.close()
+        return comments
+    
+    def get_post_comments(self, post_id: int, limit: int = 50) -> List[Comment]:
+        """Últimos limit comentarios de un post, del más antiguo al más nuevo"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(POST_COMMENTS_SQL, (post_id, limit))
+        comments = [
+            Comment(
+                id=row['id'],
+                user_id=row['user_id'],
+                post_id=row['post_id'],
+                content=row['content'],
+                created_at=row['created_at'],
+                username=row['username'],
+                user_avatar=row['user_avatar']
+            )
+            for row in cursor.fetchall()
+        ]
+        conn.close()
+        comments.reverse()
+        return comments
+    
+    def get_image_renditions(self, sources: Iterable[str], rendition: str) -> Dict[str, str]:
+        """Ruta de la versión pedida ("thumb", "feed" o "full") de varias imágenes, por lotes.
+
+        Las imágenes sin versiones (URLs externas, subidas antes de la ingesta) no aparecen.
+        """
+        sources = list(dict.fromkeys(source for source in sources if source))
+        paths: Dict[str, str] = {}
+        if not sources:
+            return paths
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        for chunk in chunked(sources, SQLITE_MAX_VARIABLES - 3):
+            paths.update(select_renditions(cursor, chunk, rendition))
+        conn.close()
+        return paths
+    
     def create_comment(self, user_id: int, post_id: int, content: str) -> Optional[int]:
         """Crear un comentario y generar notificación"""
         conn = self.get_connection()
@@ -384,19 +1121,11 @@ class DatabaseManager:
                 UPDATE posts SET comments_count = comments_count + 1 WHERE id = ?
             ''', (post_id,))
             
-            # CREAR NOTIFICACIÓN
-            # Obtener el dueño del post
-            cursor.execute('SELECT user_id FROM posts WHERE id = ?', (post_id,))
-            post_owner = cursor.fetchone()
-            
-            if post_owner and post_owner['user_id'] != user_id:
-                # Solo notificar si no es tu propio post
-                cursor.execute('''
-                    INSERT INTO notifications (user_id, from_user_id, type, post_id, message)
-                    VALUES (?, ?, 'comment', ?, 'comentó tu publicación')
-                ''', (post_owner['user_id'], user_id, post_id))
+            # CREAR NOTIFICACIÓN (se agrupa con los demás comentarios del post)
+            notify_post_owner(cursor, user_id, post_id, 'comment')
             
             conn.commit()
+            self.publish_notification_changes()
             return comment_id
         except Exception as e:
             print(f"Error al crear comentario: {e}")
@@ -434,6 +1163,21 @@ class DatabaseManager:
                     UPDATE users SET following_count = following_count - 1 WHERE id = ?
                 ''', (follower_id,))
                 
+                # Quitar sus posts del timeline materializado
+                cursor.execute('''
+                    DELETE FROM timeline WHERE user_id = ? AND author_id = ?
+                ''', (follower_id, following_id))
+                
+                # Bajo el umbral el feed ya no lee sus posts: distribuir los que
+                # publicó mientras lo superaba (ninguno, casi siempre). Al cruzarlo
+                # hacia arriba no hace falta nada: se leen todos al pedir el feed
+                cursor.execute('SELECT followers_count FROM users WHERE id = ?', (following_id,))
+                author = cursor.fetchone()
+                if author and author['followers_count'] <= self.fanout_threshold:
+                    fan_out_pending_posts(cursor, following_id)
+                
+                retract_notification(cursor, following_id, follower_id, 'follow')
+                
                 is_following = False
             else:
                 # Seguir
@@ -450,15 +1194,24 @@ class DatabaseManager:
                     UPDATE users SET following_count = following_count + 1 WHERE id = ?
                 ''', (follower_id,))
                 
-                # CREAR NOTIFICACIÓN
+                # Copiar sus posts recientes al timeline (si no es un autor masivo)
                 cursor.execute('''
-                    INSERT INTO notifications (user_id, from_user_id, type, message)
-                    VALUES (?, ?, 'follow', 'comenzó a seguirte')
-                ''', (following_id, follower_id))
+                    INSERT OR IGNORE INTO timeline (user_id, created_at, post_id, author_id)
+                    SELECT ?, p.created_at, p.id, p.user_id
+                    FROM posts p JOIN users u ON u.id = p.user_id
+                    WHERE p.user_id = ? AND u.followers_count <= ?
+                    ORDER BY p.created_at DESC
+                    LIMIT ?
+                ''', (follower_id, following_id, self.fanout_threshold, FOLLOW_BACKFILL_LIMIT))
+                
+                # CREAR NOTIFICACIÓN
+                record_notification(cursor, following_id, follower_id, 'follow')
                 
                 is_following = True
             
             conn.commit()
+            self.user_cache.invalidate(follower_id, following_id)
+            self.publish_notification_changes()
             return is_following
         except Exception as e:
             print(f"Error al seguir/dejar de seguir: {e}")
@@ -468,6 +1221,234 @@ class DatabaseManager:
             conn.close()
 
 
+    def get_follow_states(self, follower_id: int, user_ids: Iterable[int]) -> Dict[int, bool]:
+        """Para cada usuario, si follower_id lo sigue (una consulta por lote)"""
+        user_ids = list(dict.fromkeys(user_ids))
+        states = {user_id: False for user_id in user_ids}
+        if not user_ids:
+            return states
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        for chunk in chunked(user_ids, SQLITE_MAX_VARIABLES - 1):
+            placeholders = ",".join("?" * len(chunk))
+            cursor.execute(f'''
+                SELECT following_id FROM follows
+                WHERE follower_id = ? AND following_id IN ({placeholders})
+            ''', (follower_id, *chunk))
+            for row in cursor.fetchall():
+                states[row['following_id']] = True
+        conn.close()
+        return states
+    
+    # Search operations
+    def search(self, query: str, kinds: Optional[Iterable[str]] = None, limit: int = 20,
+               cursor: Optional[str] = None) -> Tuple[List[SearchResult], Optional[str]]:
+        """Búsqueda de texto completo en posts, usuarios y comentarios.
+        
+        Las palabras se combinan con AND y la última se busca por prefijo ("corr"
+        encuentra "corriendo"). Se rankean con BM25 todas las coincidencias de
+        cada tipo que tenga hasta EXACT_RANK_MATCHES; con más, por ventanas de
+        SEARCH_CANDIDATE_LIMIT de la más nueva a la más vieja (ver search.py):
+        siguiendo el cursor se llega a todas.
+        
+        La paginación es por keyset sobre (ventana, score, tipo, id). El cursor
+        guarda además el mayor id de cada tipo al pedir la primera página: las
+        siguientes ignoran las filas nuevas y puntúan con las mismas
+        estadísticas, así ningún resultado se repite ni se saltea entre páginas.
+        Devuelve (resultados, next_cursor).
+        """
+        kinds = normalize_kinds(kinds)
+        parsed = parse_query(query)
+        if not parsed or not kinds:
+            return [], None
+        after = decode_search_cursor(cursor) if cursor else None
+        
+        conn = self.get_connection()
+        try:
+            db_cursor = conn.cursor()
+            if after:
+                max_ids, window, tops, position = after.max_ids, after.window, after.tops, after.position
+            else:
+                max_ids = tuple(
+                    db_cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {kind}").fetchone()[0]
+                    if kind in kinds else 0
+                    for kind in SEARCH_KINDS
+                )
+                window, tops, position = 0, max_ids, None
+            
+            # (ventana, score, tipo, id); se pasa a la ventana siguiente hasta
+            # llenar la página o quedarse sin coincidencias
+            candidates = []
+            window_tops = {}
+            while True:
+                window_tops[window] = tops
+                next_tops = [0] * len(SEARCH_KINDS)
+                found = []
+                for kind in kinds:
+                    kind_index = SEARCH_KINDS.index(kind)
+                    scored, next_top = self._search_kind(db_cursor, kind, parsed, max_ids[kind_index],
+                                                         tops[kind_index], position)
+                    found.extend((window, score, kind_index, item_id) for score, item_id in scored)
+                    next_tops[kind_index] = next_top
+                found.sort()
+                candidates.extend(found)
+                if len(candidates) > limit or not any(next_tops):
+                    break
+                window, tops, position = window + 1, tuple(next_tops), None
+            
+            page = candidates[:limit]
+            results = self._hydrate_search_results(db_cursor, [candidate[1:] for candidate in page])
+        except sqlite3.Error as e:
+            print(f"Error en la búsqueda: {e}")
+            return [], None
+        finally:
+            conn.close()
+        
+        next_cursor = None
+        if len(candidates) > limit:
+            window, score, kind_index, item_id = page[-1]
+            next_cursor = encode_search_cursor(window, score, SEARCH_KINDS[kind_index], item_id,
+                                               max_ids, window_tops[window])
+        return results, next_cursor
+    
+    def _search_kind(self, db_cursor, kind: str, query, max_id: int, top: int,
+                     after) -> Tuple[List[Tuple[float, int]], int]:
+        """Resultados de un tipo en la ventana que empieza en el id top, posteriores a
+        after (score, tipo, id), como (score, id); y el top de la ventana siguiente
+        (0 si no quedan coincidencias)"""
+        if not top:
+            return [], 0
+        columns = SEARCH_TEXT_COLUMNS[kind]
+        kind_index = SEARCH_KINDS.index(kind)
+        candidates_sql = search_candidates_sql(kind)
+        last = len(query.terms) - 1
+        # Documentos de los términos frecuentes que cubre cada palabra (0 si ninguno)
+        frequent = [
+            self._frequent_term_documents(db_cursor, kind, term, query.prefix and index == last)
+            for index, term in enumerate(query.terms)
+        ]
+        frequent_prefix = query.prefix and len(query.terms[last]) > PREFIX_INDEX_MAX and frequent[last]
+        
+        candidate_limit = SEARCH_CANDIDATE_LIMIT
+        if not all(frequent) and not frequent_prefix:
+            # Contar hasta EXACT_RANK_MATCHES + 1 coincidencias cuesta menos de 1 ms
+            db_cursor.execute(search_probe_sql(kind), (build_match_expression(query), top, EXACT_RANK_MATCHES + 1))
+            if db_cursor.fetchone()['matches'] <= EXACT_RANK_MATCHES:
+                candidate_limit = EXACT_RANK_MATCHES
+        
+        rows = None
+        if frequent_prefix:
+            # Unir las listas de un prefijo frecuente cuesta decenas de ms: recorrer
+            # el prefijo indexado y filtrar en Python
+            scan_limit = SEARCH_CANDIDATE_LIMIT * PREFIX_SCAN_FACTOR
+            db_cursor.execute(candidates_sql, (build_match_expression(query, scan_indexed_prefix=True),
+                                               top, scan_limit))
+            scanned = db_cursor.fetchall()
+            pattern = term_pattern(query.terms[last], prefix=True)
+            rows = [row for row in scanned if any(pattern.search(row[column] or "") for column in columns)]
+            more = len(scanned) == scan_limit
+            if more and len(rows) < SEARCH_CANDIDATE_LIMIT:
+                # Poco denso dentro del prefijo indexado: consulta de prefijo exacta
+                rows = None
+        if rows is None:
+            db_cursor.execute(candidates_sql, (build_match_expression(query), top, candidate_limit))
+            rows = db_cursor.fetchall()
+            more = len(rows) == candidate_limit
+        more = more or len(rows) > candidate_limit
+        rows = rows[:candidate_limit]
+        if not rows:
+            return [], 0
+        # Las filas vienen por id descendente: la ventana siguiente empieza debajo de la última
+        next_top = rows[-1]['id'] - 1 if more else 0
+        
+        # Con una sola palabra el IDF no cambia el orden; con varias se toma de
+        # search_term_stats o se estima con un sondeo acotado. max_id hace de
+        # total para que cada página y cada ventana usen las mismas estadísticas
+        frequencies = [1.0] * len(query.terms)
+        if len(query.terms) > 1:
+            for index, term in enumerate(query.terms):
+                if frequent[index]:
+                    frequencies[index] = float(frequent[index])
+                    continue
+                expression = term_expression(term, query.prefix and index == last)
+                db_cursor.execute(search_probe_sql(kind), (expression, max_id, SEARCH_CANDIDATE_LIMIT))
+                probe = db_cursor.fetchone()
+                frequencies[index] = estimate_document_frequency(
+                    probe['matches'], SEARCH_CANDIDATE_LIMIT, probe['min_id'] or 0, max_id
+                )
+        scored = sorted(bm25_scores(rows, kind, query, frequencies, max_id))
+        if after:
+            scored = [(score, item_id) for score, item_id in scored if (score, kind_index, item_id) > after]
+        return scored, next_top
+    
+    def _frequent_term_documents(self, db_cursor, kind: str, term: str, prefix: bool) -> int:
+        """Documentos de los términos frecuentes (search_term_stats) que coinciden con term"""
+        low, high = term_range(term, prefix)
+        db_cursor.execute('''
+            SELECT COALESCE(SUM(documents), 0) FROM search_term_stats
+            WHERE kind = ? AND term >= ? AND term < ?
+        ''', (kind, low, high))
+        return db_cursor.fetchone()[0]
+    
+    def refresh_search_stats(self):
+        """Recalcular las estadísticas de términos frecuentes (tras cargas masivas)"""
+        conn = self.get_connection()
+        try:
+            refresh_search_stats(conn.cursor())
+            conn.commit()
+        finally:
+            conn.close()
+    
+    def _hydrate_search_results(self, db_cursor, page) -> List[SearchResult]:
+        """Completar los datos de cada resultado con una consulta por tipo"""
+        ids_by_kind = {}
+        for _, kind_index, item_id in page:
+            ids_by_kind.setdefault(SEARCH_KINDS[kind_index], []).append(item_id)
+        
+        rows = {}
+        details_sql = {
+            "posts": '''
+                SELECT p.id, p.user_id, p.caption AS text, NULL AS post_id,
+                       u.username AS title, u.avatar_url
+                FROM posts p JOIN users u ON u.id = p.user_id
+                WHERE p.id IN ({})
+            ''',
+            "users": '''
+                SELECT id, id AS user_id, username AS title, avatar_url, NULL AS post_id,
+                       full_name || CASE WHEN sport != '' THEN ' · ' || sport ELSE '' END AS text
+                FROM users WHERE id IN ({})
+            ''',
+            "comments": '''
+                SELECT c.id, c.user_id, c.content AS text, c.post_id,
+                       u.username AS title, u.avatar_url
+                FROM comments c JOIN users u ON u.id = c.user_id
+                WHERE c.id IN ({})
+            ''',
+        }
+        for kind, ids in ids_by_kind.items():
+            db_cursor.execute(details_sql[kind].format(",".join("?" * len(ids))), ids)
+            for row in db_cursor.fetchall():
+                rows[(kind, row['id'])] = row
+        
+        results = []
+        for score, kind_index, item_id in page:
+            kind = SEARCH_KINDS[kind_index]
+            row = rows.get((kind, item_id))
+            if row is None:
+                continue
+            results.append(SearchResult(
+                kind=kind,
+                id=item_id,
+                score=score,
+                title=row['title'],
+                text=row['text'] or "",
+                user_id=row['user_id'],
+                avatar_url=row['avatar_url'] or "",
+                post_id=row['post_id']
+            ))
+        return results
+    
     def seed_sample_data(self):
         # Users de muestra
         sample_users = [
@@ -509,22 +1490,21 @@ class DatabaseManager:
 
 
     def create_notification(self, notification) -> Optional[int]:
-        """Crear una nueva notificación"""
+        """Crear una notificación; se suma a su grupo si hay uno abierto y devuelve el id del grupo"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
         try:
-            cursor.execute('''
-                INSERT INTO notifications (user_id, from_user_id, type, post_id, message)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (notification.user_id, notification.from_user_id, notification.type, 
-                notification.post_id, notification.message))
-            
-            notification_id = cursor.lastrowid
+            notification_id = record_notification(
+                cursor, notification.user_id, notification.from_user_id, notification.type,
+                notification.post_id, notification.message or None
+            )
             conn.commit()
+            self.publish_notification_changes()
             return notification_id
         except Exception as e:
             print(f"Error al crear notificación: {e}")
+            conn.rollback()
             return None
         finally:
             conn.close()
@@ -536,35 +1516,51 @@ class DatabaseManager:
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute('''
-            SELECT n.*, u.username as from_username, u.avatar_url as from_user_avatar
-            FROM notifications n
-            JOIN users u ON n.from_user_id = u.id
-            WHERE n.user_id = ?
-            ORDER BY n.created_at DESC
-            LIMIT ?
-        ''', (user_id, limit))
+        cursor.execute(USER_NOTIFICATIONS_SQL, (user_id, limit))
         
         rows = cursor.fetchall()
         conn.close()
         
-        notifications = []
-        for row in rows:
-            notifications.append(Notification(
-                id=row['id'],
-                user_id=row['user_id'],
-                from_user_id=row['from_user_id'],
-                type=row['type'],
-                post_id=row['post_id'],
-                message=row['message'],
-                is_read=row['is_read'],
-                created_at=row['created_at'],
-                from_username=row['from_username'],
-                from_user_avatar=row['from_user_avatar']
-            ))
+        return [self._notification_from_row(row) for row in rows]
+
+    def get_notifications_by_ids(self, notification_ids: Iterable[int]) -> List[Notification]:
+        """Notificaciones por id, de la más reciente a la más vieja (para actualizar la lista en vivo)"""
+        ids = list(dict.fromkeys(notification_ids))
+        if not ids:
+            return []
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        rows = []
+        for chunk in chunked(ids):
+            placeholders = ",".join("?" * len(chunk))
+            cursor.execute(f'''
+                SELECT n.*, u.username as from_username, u.avatar_url as from_user_avatar
+                FROM notifications n
+                JOIN users u ON n.from_user_id = u.id
+                WHERE n.id IN ({placeholders})
+            ''', chunk)
+            rows.extend(cursor.fetchall())
+        conn.close()
         
+        notifications = [self._notification_from_row(row) for row in rows]
+        notifications.sort(key=lambda n: (n.created_at, n.id), reverse=True)
         return notifications
 
+    def _notification_from_row(self, row) -> Notification:
+        return Notification(
+            id=row['id'],
+            user_id=row['user_id'],
+            from_user_id=row['from_user_id'],
+            type=row['type'],
+            post_id=row['post_id'],
+            message=row['message'],
+            is_read=row['is_read'],
+            created_at=row['created_at'],
+            actor_count=row['actor_count'],
+            from_username=row['from_username'],
+            from_user_avatar=row['from_user_avatar']
+        )
+
     def mark_notification_as_read(self, notification_id: int) -> bool:
         """Marcar notificación como leída"""
         conn = self.get_connection()
@@ -577,6 +1573,7 @@ class DatabaseManager:
         conn.commit()
         success = cursor.rowcount > 0
         conn.close()
+        self.publish_notification_changes()
         return success
 
     def mark_all_notifications_as_read(self, user_id: int) -> bool:
@@ -584,28 +1581,48 @@ class DatabaseManager:
         conn = self.get_connection()
         cursor = conn.cursor()
         
+        # Solo las no leídas: cada fila cambiada descuenta una del contador
         cursor.execute('''
-            UPDATE notifications SET is_read = TRUE WHERE user_id = ?
+            UPDATE notifications SET is_read = TRUE WHERE user_id = ? AND is_read = FALSE
         ''', (user_id,))
         
         conn.commit()
         conn.close()
+        self.publish_notification_changes()
         return True
 
     def get_unread_notifications_count(self, user_id: int) -> int:
-        """Obtener cantidad de notificaciones no leídas"""
+        """Obtener cantidad de notificaciones no leídas (contador mantenido por triggers)"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute('''
-            SELECT COUNT(*) as count FROM notifications 
-            WHERE user_id = ? AND is_read = FALSE
-        ''', (user_id,))
+        cursor.execute(UNREAD_NOTIFICATIONS_COUNT_SQL, (user_id,))
         
         row = cursor.fetchone()
         conn.close()
         
-        return row['count'] if row else 0
+        return row['unread_count'] if row else 0
+
+    def check_unread_counts(self, repair: bool = False) -> List[Tuple[int, int, int]]:
+        """Comparar los contadores de no leídas con las notificaciones.
+
+        Devuelve (usuario, guardado, real) por cada diferencia; con repair=True
+        recalcula todos los contadores en una transacción.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            mismatches = find_unread_count_mismatches(cursor)
+            if mismatches and repair:
+                rebuild_unread_counts(cursor)
+                conn.commit()
+            return mismatches
+        except sqlite3.Error as e:
+            print(f"Error al verificar contadores de notificaciones: {e}")
+            conn.rollback()
+            return []
+        finally:
+            conn.close()
 
     def delete_notification(self, notification_id: int) -> bool:
         """Eliminar una notificación"""
@@ -615,8 +1632,12 @@ class DatabaseManager:
         cursor.execute('''
             DELETE FROM notifications WHERE id = ?
         ''', (notification_id,))
+        success = cursor.rowcount > 0
+        cursor.execute('''
+            DELETE FROM notification_actors WHERE notification_id = ?
+        ''', (notification_id,))
         
         conn.commit()
-        success = cursor.rowcount > 0
         conn.close()
+        self.publish_notification_changes()
         return success
\ No newline at end of file
@@ -0,0 +1,195 @@
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List
+
+# Filas leídas por vuelta del feed de cambios
+CHANGE_LOG_BATCH = 500
+
+# Cambios que se conservan detrás de la marca para lectores de otros procesos
+CHANGE_LOG_RETAINED = 10000
+
+# Registro de cambios de notifications. Lo llenan los triggers en la misma
+# transacción que la escritura; los lectores avanzan por id (high-water mark).
+NOTIFICATION_CHANGES_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS notification_changes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        notification_id INTEGER NOT NULL,
+        action TEXT NOT NULL
+    )
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS notifications_changes_insert AFTER INSERT ON notifications BEGIN
+        INSERT INTO notification_changes (user_id, notification_id, action)
+        VALUES (new.user_id, new.id, 'upsert');
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS notifications_changes_update AFTER UPDATE ON notifications BEGIN
+        INSERT INTO notification_changes (user_id, notification_id, action)
+        VALUES (new.user_id, new.id, 'upsert');
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS notifications_changes_delete AFTER DELETE ON notifications BEGIN
+        INSERT INTO notification_changes (user_id, notification_id, action)
+        VALUES (old.user_id, old.id, 'delete');
+    END
+    ''',
+]
+
+
+@dataclass
+class NotificationEvent:
+    """Cambios de notificaciones de un usuario desde el último evento"""
+    user_id: int
+    unread_count: int = 0
+    upserted_ids: List[int] = field(default_factory=list)  # Nuevas o modificadas
+    deleted_ids: List[int] = field(default_factory=list)
+
+
+def notification_topic(user_id: int) -> str:
+    return f"notifications:{user_id}"
+
+
+class EventBus:
+    """Pub/sub en proceso: cada tema tiene una lista de callbacks.
+
+    publish() llama a los suscriptores en el hilo que publica; quien necesite
+    tocar la UI debe reprogramar el trabajo (p. ej. con page.run_task).
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, List[Callable]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, topic: str, callback: Callable) -> Callable[[], None]:
+        """Suscribir callback a un tema; devuelve la función que cancela la suscripción"""
+        with self._lock:
+            self._subscribers.setdefault(topic, []).append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                callbacks = self._subscribers.get(topic, [])
+                if callback in callbacks:
+                    callbacks.remove(callback)
+                if not callbacks:
+                    self._subscribers.pop(topic, None)
+        return unsubscribe
+
+    def has_subscribers(self, topic: str) -> bool:
+        with self._lock:
+            return bool(self._subscribers.get(topic))
+
+    def publish(self, topic: str, event):
+        with self._lock:
+            callbacks = list(self._subscribers.get(topic, []))
+        for callback in callbacks:
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"Error en suscriptor de {topic}: {e}")
+
+
+class NotificationChangeFeed:
+    """Publica en el bus los cambios de notification_changes posteriores a la marca.
+
+    En un solo proceso DatabaseManager llama a drain() después de cada
+    escritura, sin consultas periódicas. Si varios procesos escriben la misma
+    base, start_polling() lee el registro cada ``interval`` segundos.
+    """
+
+    def __init__(self, db_manager, bus: EventBus, batch_size: int = CHANGE_LOG_BATCH,
+                 retained: int = CHANGE_LOG_RETAINED):
+        self.db_manager = db_manager
+        self.bus = bus
+        self.batch_size = batch_size
+        self.retained = retained
+        # Reentrante: un suscriptor puede escribir y volver a disparar drain()
+        self._lock = threading.RLock()
+        self._stopped = threading.Event()
+        self._poller = None
+        self.high_water_mark = self._latest_id()
+        self._trimmed_at = self.high_water_mark
+
+    def _latest_id(self) -> int:
+        conn = self.db_manager.get_connection()
+        row = conn.execute("SELECT COALESCE(MAX(id), 0) FROM notification_changes").fetchone()
+        conn.close()
+        return row[0]
+
+    def drain(self) -> int:
+        """Publicar los cambios pendientes agrupados por usuario; devuelve cuántos se leyeron"""
+        with self._lock:
+            conn = self.db_manager.get_connection()
+            try:
+                # usuario -> {notificación: última acción}
+                changes: Dict[int, Dict[int, str]] = {}
+                read = 0
+                while True:
+                    rows = conn.execute('''
+                        SELECT id, user_id, notification_id, action FROM notification_changes
+                        WHERE id > ?
+                        ORDER BY id
+                        LIMIT ?
+                    ''', (self.high_water_mark, self.batch_size)).fetchall()
+                    for change_id, user_id, notification_id, action in rows:
+                        changes.setdefault(user_id, {})[notification_id] = action
+                        self.high_water_mark = change_id
+                    read += len(rows)
+                    if len(rows) < self.batch_size:
+                        break
+
+                events = {
+                    user_id: NotificationEvent(
+                        user_id,
+                        upserted_ids=[nid for nid, action in actions.items() if action == 'upsert'],
+                        deleted_ids=[nid for nid, action in actions.items() if action == 'delete'],
+                    )
+                    for user_id, actions in changes.items()
+                }
+                user_ids = list(events)
+                for start in range(0, len(user_ids), self.batch_size):
+                    chunk = user_ids[start:start + self.batch_size]
+                    counts = conn.execute(f'''
+                        SELECT user_id, unread_count FROM notification_counters
+                        WHERE user_id IN ({",".join("?" * len(chunk))})
+                    ''', chunk).fetchall()
+                    for user_id, unread_count in counts:
+                        events[user_id].unread_count = unread_count
+
+                if self.high_water_mark - self._trimmed_at >= self.retained:
+                    conn.execute("DELETE FROM notification_changes WHERE id <= ?",
+                                 (self.high_water_mark - self.retained,))
+                    conn.commit()
+                    self._trimmed_at = self.high_water_mark
+            finally:
+                conn.close()
+
+            # Publicar dentro del lock mantiene el orden entre escrituras concurrentes
+            for user_id, event in events.items():
+                self.bus.publish(notification_topic(user_id), event)
+            return read
+
+    def start_polling(self, interval: float = 1.0):
+        """Leer el registro periódicamente (escrituras de otros procesos)"""
+        if self._poller:
+            return
+        self._stopped.clear()
+        self._poller = threading.Thread(target=self._poll, args=(interval,),
+                                        name="notification-feed", daemon=True)
+        self._poller.start()
+
+    def _poll(self, interval: float):
+        while not self._stopped.wait(interval):
+            try:
+                self.drain()
+            except Exception as e:
+                print(f"Error al leer cambios de notificaciones: {e}")
+
+    def stop(self):
+        self._stopped.set()
+        if self._poller:
+            self._poller.join(timeout=1)
+            self._poller = None
@@ -0,0 +1,227 @@
+import heapq
+import math
+from typing import Dict, Iterable, List, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+# Radio medio de la Tierra
+EARTH_RADIUS_KM = 6371.0088
+
+# Kilómetros por grado de latitud
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+# Lado de cada celda de la grilla en grados (~1.1 km de latitud)
+GRID_CELL_DEGREES = 0.01
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Distancia en km sobre la esfera entre dos puntos en grados"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def format_distance(distance_km: float) -> str:
+    """Texto para mostrar una distancia: metros por debajo de 1 km"""
+    if distance_km < 1:
+        return f"{int(round(distance_km * 1000, -1))} m"
+    return f"{distance_km:.1f} km"
+
+
+def haversine_many(lat: float, lng: float, lats, lngs):
+    """Distancias en km desde un punto a muchos (vectorizado con NumPy si está disponible)"""
+    if NUMPY_AVAILABLE:
+        phi1 = math.radians(lat)
+        phi2 = np.radians(lats)
+        a = (np.sin((phi2 - phi1) / 2) ** 2
+             + math.cos(phi1) * np.cos(phi2) * np.sin(np.radians(np.asarray(lngs) - lng) / 2) ** 2)
+        return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(1.0, a)))
+    return [haversine_km(lat, lng, point_lat, point_lng) for point_lat, point_lng in zip(lats, lngs)]
+
+
+class GridIndex:
+    """Índice espacial en una grilla uniforme de latitud/longitud.
+
+    Cada celda guarda los puntos que caen en ella. Un radio solo revisa las
+    celdas de su caja envolvente y los k más cercanos se buscan en anillos de
+    celdas alrededor del punto, deteniéndose cuando ningún anillo sin visitar
+    puede tener algo más cerca. ``brute_force_*`` recorren todos los puntos
+    (con NumPy si está instalado) y sirven de referencia.
+    """
+
+    def __init__(self, cell_degrees: float = GRID_CELL_DEGREES):
+        self.cell_degrees = cell_degrees
+        # celda -> [(lat radianes, lng radianes, cos(lat), id)]
+        self.cells: Dict[Tuple[int, int], List[tuple]] = {}
+        self.ids: List = []
+        self.lats: List[float] = []
+        self.lngs: List[float] = []
+        self._bounds = None  # (i mín, i máx, j mín, j máx) de las celdas ocupadas
+        self._arrays = None
+
+    @classmethod
+    def from_points(cls, points: Iterable[Tuple[object, float, float]],
+                    cell_degrees: float = GRID_CELL_DEGREES) -> "GridIndex":
+        """Construir el índice a partir de (id, lat, lng)"""
+        index = cls(cell_degrees)
+        for item_id, lat, lng in points:
+            index.insert(item_id, lat, lng)
+        return index
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return math.floor(lat / self.cell_degrees), math.floor(lng / self.cell_degrees)
+
+    def insert(self, item_id, lat: float, lng: float):
+        i, j = self._cell(lat, lng)
+        phi = math.radians(lat)
+        self.cells.setdefault((i, j), []).append((phi, math.radians(lng), math.cos(phi), item_id))
+        self.ids.append(item_id)
+        self.lats.append(lat)
+        self.lngs.append(lng)
+        self._arrays = None
+        if self._bounds is None:
+            self._bounds = (i, i, j, j)
+        else:
+            min_i, max_i, min_j, max_j = self._bounds
+            self._bounds = (min(min_i, i), max(max_i, i), min(min_j, j), max(max_j, j))
+
+    def _scan_cell(self, cell, phi1: float, lambda1: float, cos1: float):
+        """Distancias en km de los puntos de una celda al punto de consulta"""
+        for phi2, lambda2, cos2, item_id in self.cells.get(cell, ()):
+            a = math.sin((phi2 - phi1) / 2) ** 2 + cos1 * cos2 * math.sin((lambda2 - lambda1) / 2) ** 2
+            yield 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a))), item_id
+
+    def within_radius(self, lat: float, lng: float, radius_km: float) -> List[Tuple[float, object]]:
+        """(distancia km, id) de los puntos a menos de radius_km, del más cercano al más lejano"""
+        if not self.cells:
+            return []
+        lat_span = radius_km / KM_PER_DEGREE
+        # La longitud se achica con la latitud: usar el coseno del borde más alejado del ecuador
+        max_abs_lat = min(89.9, abs(lat) + lat_span)
+        lng_span = radius_km / (KM_PER_DEGREE * math.cos(math.radians(max_abs_lat)))
+        min_i, min_j = self._cell(lat - lat_span, lng - lng_span)
+        max_i, max_j = self._cell(lat + lat_span, lng + lng_span)
+
+        if (max_i - min_i + 1) * (max_j - min_j + 1) > len(self.cells):
+            # La caja cubre más celdas que las ocupadas: recorrer solo las ocupadas
+            cells = [cell for cell in self.cells
+                     if min_i <= cell[0] <= max_i and min_j <= cell[1] <= max_j]
+        else:
+            cells = [(i, j) for i in range(min_i, max_i + 1) for j in range(min_j, max_j + 1)]
+
+        phi1, lambda1 = math.radians(lat), math.radians(lng)
+        cos1 = math.cos(phi1)
+        matches = [
+            (distance, item_id)
+            for cell in cells
+            for distance, item_id in self._scan_cell(cell, phi1, lambda1, cos1)
+            if distance <= radius_km
+        ]
+        matches.sort(key=lambda match: match[0])
+        return matches
+
+    def nearest(self, lat: float, lng: float, k: int) -> List[Tuple[float, object]]:
+        """Los k puntos más cercanos como (distancia km, id), del más cercano al más lejano"""
+        if not self.cells or k <= 0:
+            return []
+        qi, qj = self._cell(lat, lng)
+        min_i, max_i, min_j, max_j = self._bounds
+        phi1, lambda1 = math.radians(lat), math.radians(lng)
+        cos1 = math.cos(phi1)
+        # Máximo de k elementos con la distancia negada: la raíz es el k-ésimo más cercano
+        heap: List[Tuple[float, int, object]] = []
+        counter = 0
+        if not (min_i <= qi <= max_i and min_j <= qj <= max_j) or len(self.cells) < 8:
+            # Desde afuera de la zona ocupada los anillos recorrerían casi todo vacío
+            return self.brute_force_nearest(lat, lng, k)
+        ring = 0
+        while True:
+            if 8 * ring > len(self.cells):
+                # Un anillo con más celdas que las ocupadas (puntos dispersos):
+                # recorrerlos todos es más barato
+                return self.brute_force_nearest(lat, lng, k)
+            for cell in self._ring_cells(qi, qj, ring, self._bounds):
+                for distance, item_id in self._scan_cell(cell, phi1, lambda1, cos1):
+                    counter += 1
+                    if len(heap) < k:
+                        heapq.heappush(heap, (-distance, counter, item_id))
+                    elif distance < -heap[0][0]:
+                        heapq.heapreplace(heap, (-distance, counter, item_id))
+
+            covered = (qi - ring <= min_i and qi + ring >= max_i and
+                       qj - ring <= min_j and qj + ring >= max_j)
+            if covered:
+                break
+            if len(heap) == k and -heap[0][0] <= self._ring_clearance(lat, lng, qi, qj, ring):
+                break
+            ring += 1
+
+        return sorted((-neg_distance, item_id) for neg_distance, _, item_id in heap)
+
+    def _ring_cells(self, qi: int, qj: int, ring: int, bounds):
+        """Celdas a distancia de Chebyshev exactamente ring de (qi, qj), recortadas a bounds"""
+        min_i, max_i, min_j, max_j = bounds
+        if ring == 0:
+            yield qi, qj
+            return
+        j_range = range(max(qj - ring, min_j), min(qj + ring, max_j) + 1)
+        for i in (qi - ring, qi + ring):
+            if min_i <= i <= max_i:
+                for j in j_range:
+                    yield i, j
+        i_range = range(max(qi - ring + 1, min_i), min(qi + ring - 1, max_i) + 1)
+        for j in (qj - ring, qj + ring):
+            if min_j <= j <= max_j:
+                for i in i_range:
+                    yield i, j
+
+    def _ring_clearance(self, lat: float, lng: float, qi: int, qj: int, ring: int) -> float:
+        """Distancia mínima (km) del punto a cualquier celda fuera del bloque ya visitado"""
+        size = self.cell_degrees
+        lat_gap = min(lat - (qi - ring) * size, (qi + ring + 1) * size - lat)
+        lng_gap = min(lng - (qj - ring) * size, (qj + ring + 1) * size - lng)
+        max_abs_lat = min(89.9, abs(lat) + (ring + 1) * size)
+        return min(lat_gap * KM_PER_DEGREE,
+                   lng_gap * KM_PER_DEGREE * math.cos(math.radians(max_abs_lat)))
+
+    def _columns(self):
+        if self._arrays is None:
+            self._arrays = (np.asarray(self.lats), np.asarray(self.lngs)) if NUMPY_AVAILABLE \
+                else (self.lats, self.lngs)
+        return self._arrays
+
+    def brute_force_within_radius(self, lat: float, lng: float, radius_km: float) -> List[Tuple[float, object]]:
+        """Igual que within_radius pero calculando la distancia a todos los puntos"""
+        lats, lngs = self._columns()
+        distances = haversine_many(lat, lng, lats, lngs)
+        if NUMPY_AVAILABLE:
+            positions = np.nonzero(distances <= radius_km)[0]
+            positions = positions[np.argsort(distances[positions], kind="stable")]
+            return [(float(distances[p]), self.ids[p]) for p in positions]
+        matches = [(distance, self.ids[p]) for p, distance in enumerate(distances) if distance <= radius_km]
+        matches.sort(key=lambda match: match[0])
+        return matches
+
+    def brute_force_nearest(self, lat: float, lng: float, k: int) -> List[Tuple[float, object]]:
+        """Igual que nearest pero calculando la distancia a todos los puntos"""
+        if not self.ids or k <= 0:
+            return []
+        lats, lngs = self._columns()
+        distances = haversine_many(lat, lng, lats, lngs)
+        if NUMPY_AVAILABLE:
+            k = min(k, len(self.ids))
+            positions = np.argpartition(distances, k - 1)[:k]
+            positions = positions[np.argsort(distances[positions], kind="stable")]
+            return [(float(distances[p]), self.ids[p]) for p in positions]
+        nearest = heapq.nsmallest(k, enumerate(distances), key=lambda item: item[1])
+        return [(distance, self.ids[p]) for p, distance in nearest]
@@ -0,0 +1,112 @@
+import re
+from typing import List
+
+from database.search import fold_text
+
+# Ventana de tendencias en horas; cada bucket cuenta los usos de un tag en una hora
+TRENDING_WINDOW_HOURS = 24
+
+# Largo máximo de un hashtag guardado (sin el #)
+MAX_TAG_LENGTH = 50
+
+_HASHTAG_RE = re.compile(r"(?<!\w)#(\w+)", re.UNICODE)
+
+# Hora (epoch / 3600) de un timestamp de SQLite
+HOUR_BUCKET_SQL = "CAST(strftime('%s', {}) AS INTEGER) / 3600"
+CURRENT_BUCKET_SQL = HOUR_BUCKET_SQL.format("'now'")
+
+
+def normalize_tag(tag: str) -> str:
+    """Forma canónica de un tag: sin #, en minúsculas y sin diacríticos"""
+    return fold_text(tag.lstrip("#"))[:MAX_TAG_LENGTH]
+
+
+def extract_hashtags(caption: str) -> List[str]:
+    """Hashtags de un texto normalizados y sin repetir, en orden de aparición"""
+    tags = (normalize_tag(match) for match in _HASHTAG_RE.findall(caption or ""))
+    return list(dict.fromkeys(tag for tag in tags if tag))
+
+
+def record_post_tags(cursor, post_id: int, created_at, tags: List[str]):
+    """Indexar los tags de un post y sumarlos al bucket de su hora y a la ventana.
+
+    Se llama dentro de la transacción que crea el post.
+    """
+    if not tags:
+        return
+    cursor.executemany('''
+        INSERT OR IGNORE INTO post_tags (tag, created_at, post_id) VALUES (?, ?, ?)
+    ''', [(tag, created_at, post_id) for tag in tags])
+    cursor.executemany(f'''
+        INSERT INTO tag_buckets (bucket, tag, uses) VALUES ({HOUR_BUCKET_SQL.format('?')}, ?, 1)
+        ON CONFLICT (bucket, tag) DO UPDATE SET uses = uses + 1
+    ''', [(created_at, tag) for tag in tags])
+    cursor.executemany('''
+        INSERT INTO tag_window (tag, uses) VALUES (?, 1)
+        ON CONFLICT (tag) DO UPDATE SET uses = uses + 1
+    ''', [(tag,) for tag in tags])
+
+
+def remove_post_tags(cursor, post_id: int):
+    """Quitar los tags de un post del índice, de su bucket y de la ventana.
+
+    Se llama dentro de la transacción que borra el post. Si su bucket ya
+    venció, expire_tag_buckets ya lo descontó de la ventana.
+    """
+    cursor.execute("SELECT tag, created_at FROM post_tags WHERE post_id = ?", (post_id,))
+    rows = cursor.fetchall()
+    if not rows:
+        return
+    for tag, created_at in rows:
+        cursor.execute(f'''
+            UPDATE tag_buckets SET uses = uses - 1
+            WHERE bucket = {HOUR_BUCKET_SQL.format('?')} AND tag = ?
+        ''', (created_at, tag))
+        if cursor.rowcount:
+            cursor.execute("UPDATE tag_window SET uses = uses - 1 WHERE tag = ?", (tag,))
+    cursor.execute("DELETE FROM tag_buckets WHERE uses <= 0")
+    cursor.execute("DELETE FROM tag_window WHERE uses <= 0")
+    cursor.execute("DELETE FROM post_tags WHERE post_id = ?", (post_id,))
+
+
+def expire_tag_buckets(cursor, window_hours: int = TRENDING_WINDOW_HOURS) -> int:
+    """Sacar de la ventana los buckets que quedaron fuera y borrarlos.
+
+    Solo toca los buckets vencidos; devuelve cuántos se borraron.
+    """
+    cursor.execute(f"SELECT {CURRENT_BUCKET_SQL} - ?", (window_hours - 1,))
+    oldest_bucket = cursor.fetchone()[0]
+    cursor.execute('''
+        SELECT tag, SUM(uses) AS uses FROM tag_buckets WHERE bucket < ? GROUP BY tag
+    ''', (oldest_bucket,))
+    expired = [(row[1], row[0]) for row in cursor.fetchall()]
+    if not expired:
+        return 0
+    cursor.executemany("UPDATE tag_window SET uses = uses - ? WHERE tag = ?", expired)
+    cursor.execute("DELETE FROM tag_window WHERE uses <= 0")
+    cursor.execute("DELETE FROM tag_buckets WHERE bucket < ?", (oldest_bucket,))
+    return cursor.rowcount
+
+
+def backfill_post_tags(cursor, window_hours: int = TRENDING_WINDOW_HOURS):
+    """Paso de migración: indexar los hashtags de los posts existentes"""
+    cursor.execute("SELECT id, caption, created_at FROM posts")
+    rows = [
+        (tag, created_at, post_id)
+        for post_id, caption, created_at in cursor.fetchall()
+        for tag in extract_hashtags(caption)
+    ]
+    cursor.executemany('''
+        INSERT OR IGNORE INTO post_tags (tag, created_at, post_id) VALUES (?, ?, ?)
+    ''', rows)
+    cursor.execute(f'''
+        INSERT INTO tag_buckets (bucket, tag, uses)
+        SELECT {HOUR_BUCKET_SQL.format('created_at')} AS bucket, tag, COUNT(*)
+        FROM post_tags
+        WHERE {HOUR_BUCKET_SQL.format('created_at')} > {CURRENT_BUCKET_SQL} - ?
+        GROUP BY bucket, tag
+    ''', (window_hours,))
+    cursor.execute('''
+        INSERT INTO tag_window (tag, uses)
+        SELECT tag, SUM(uses) FROM tag_buckets GROUP BY tag
+    ''')
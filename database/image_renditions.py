@@ -0,0 +1,50 @@
+from typing import Dict, List, Tuple
+
+# Versiones de cada imagen subida (ver utils.image_pipeline). source es la ruta
+# guardada en posts.image_url o users.avatar_url; path, la de la versión.
+IMAGE_RENDITIONS_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS image_renditions (
+        source TEXT NOT NULL,
+        rendition TEXT NOT NULL,
+        path TEXT NOT NULL,
+        width INTEGER,
+        height INTEGER,
+        bytes INTEGER NOT NULL,
+        PRIMARY KEY (source, rendition)
+    ) WITHOUT ROWID
+    ''',
+]
+
+# Si falta la versión pedida se usa la siguiente más grande
+RENDITION_FALLBACKS = {
+    "thumb": ("thumb", "feed", "full"),
+    "feed": ("feed", "full"),
+    "full": ("full",),
+}
+
+
+def record_renditions(cursor, source: str, renditions: Dict):
+    """Guardar las versiones de una imagen; renditions: versión -> Rendition (path, width, height, bytes)"""
+    cursor.executemany('''
+        INSERT OR REPLACE INTO image_renditions (source, rendition, path, width, height, bytes)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', [(source, name, rendition.path, rendition.width, rendition.height, rendition.bytes)
+          for name, rendition in renditions.items()])
+
+
+def select_renditions(cursor, sources: List[str], rendition: str) -> Dict[str, str]:
+    """Ruta de la versión pedida (o la más cercana disponible) para cada imagen que la tenga"""
+    names = RENDITION_FALLBACKS.get(rendition, (rendition,))
+    placeholders = ",".join("?" * len(sources))
+    cursor.execute(f'''
+        SELECT source, rendition, path FROM image_renditions
+        WHERE source IN ({placeholders}) AND rendition IN ({",".join("?" * len(names))})
+    ''', (*sources, *names))
+    best: Dict[str, Tuple[int, str]] = {}
+    for source, name, path in cursor.fetchall():
+        rank = names.index(name)
+        if source not in best or rank < best[source][0]:
+            best[source] = (rank, path)
+    return {source: path for source, (_, path) in best.items()}
+
@@ -1,24 +1,62 @@
+import threading
+
 from database.database_manager import DatabaseManager
 
-def initialize_database():
-    """Initialize database and add sample data"""
-    db = DatabaseManager()
-    
+# Un solo DatabaseManager por proceso: todas las sesiones de Flet comparten su
+# EventBus, así una escritura en una sesión llega a los suscriptores de las demás
+_shared_db = None
+_shared_sessions = 0
+_shared_lock = threading.Lock()
+
+def initialize_database(db_path: str = "teamup.db"):
+    """Initialize database and add sample data; returns the process-wide DatabaseManager.
+
+    Cada llamada cuenta una sesión; la sesión la devuelve con release_database().
+    """
+    global _shared_db, _shared_sessions
+    with _shared_lock:
+        if _shared_db is None:
+            _shared_db = _create_database(db_path)
+        _shared_sessions += 1
+        return _shared_db
+
+def release_database():
+    """Fin de una sesión: la última cierra el manager (hilos de fondo y pool de conexiones)"""
+    global _shared_db, _shared_sessions
+    with _shared_lock:
+        if _shared_db is None:
+            return
+        _shared_sessions = max(0, _shared_sessions - 1)
+        if _shared_sessions:
+            return
+        db, _shared_db = _shared_db, None
+    db.close()
+
+def _create_database(db_path: str) -> DatabaseManager:
+    db = DatabaseManager(db_path)
+
     # Check if we need to seed data
     conn = db.get_connection()
     cursor = conn.cursor()
     cursor.execute("SELECT COUNT(*) FROM users")
     user_count = cursor.fetchone()[0]
     conn.close()
-    
+
     if user_count == 0:
         print("Seeding database with sample data...")
         db.seed_sample_data()
         print("Database initialized with sample data!")
     else:
         print("Database already contains data.")
-    
+
+    # Depurar notificaciones viejas en segundo plano (ver RetentionPolicy); un
+    # solo hilo por proceso porque el manager es compartido
+    db.enable_notification_retention()
+
+    # El pool de subidas se crea con la primera subida (UploadPage.handle_upload)
+    # y se cierra con el manager
+
     return db
 
 if __name__ == "__main__":
-    initialize_database()
\ No newline at end of file
+    initialize_database()
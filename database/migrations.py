@@ -0,0 +1,181 @@
+import sqlite3
+from typing import Callable, List, NamedTuple, Sequence, Union
+from database.timeline import backfill_timeline, mark_unfanned_posts
+from database.search import SEARCH_SCHEMA, rebuild_search_index, refresh_search_stats
+from database.hashtags import backfill_post_tags
+from database.events import NOTIFICATION_CHANGES_SCHEMA
+from database.venues import VENUES_SCHEMA, seed_venues
+from database.image_renditions import IMAGE_RENDITIONS_SCHEMA
+from database.blob_store import BLOB_SCHEMA
+from database.notifications import (
+    NOTIFICATION_ACTOR_SEQ_SCHEMA, UNREAD_COUNT_SCHEMA, collapse_notifications, number_notification_actors,
+    rebuild_unread_counts
+)
+
+# Un paso de migración es una sentencia SQL o una función que recibe el cursor
+MigrationStep = Union[str, Callable[[sqlite3.Cursor], None]]
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    steps: Sequence[MigrationStep]
+
+
+# Migraciones numeradas; PRAGMA user_version guarda la última aplicada.
+# El esquema base (versión 0) lo crea DatabaseManager.init_database().
+MIGRATIONS: List[Migration] = [
+    Migration(1, "Índices secundarios para feed, perfiles, notificaciones y seguidores", [
+        "CREATE INDEX IF NOT EXISTS idx_posts_created_at ON posts (created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_posts_user_created ON posts (user_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_notifications_user_read_created "
+        "ON notifications (user_id, is_read, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_notifications_user_created ON notifications (user_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_comments_post_created ON comments (post_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_follows_following ON follows (following_id)",
+        "CREATE INDEX IF NOT EXISTS idx_likes_post ON likes (post_id)",
+    ]),
+    Migration(2, "Timeline materializado para el feed de seguidos (fan-out-on-write)", [
+        '''
+        CREATE TABLE IF NOT EXISTS timeline (
+            user_id INTEGER NOT NULL,
+            created_at TIMESTAMP NOT NULL,
+            post_id INTEGER NOT NULL,
+            author_id INTEGER NOT NULL,
+            PRIMARY KEY (user_id, created_at, post_id)
+        ) WITHOUT ROWID
+        ''',
+        backfill_timeline,
+    ]),
+    Migration(3, "Publicaciones guardadas por usuario", [
+        '''
+        CREATE TABLE IF NOT EXISTS saved_posts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            post_id INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id),
+            FOREIGN KEY (post_id) REFERENCES posts (id),
+            UNIQUE(user_id, post_id)
+        )
+        ''',
+    ]),
+    Migration(4, "Búsqueda de texto completo (FTS5) en posts, usuarios y comentarios", [
+        *SEARCH_SCHEMA,
+        rebuild_search_index,
+        refresh_search_stats,
+    ]),
+    Migration(5, "Índice de hashtags y contadores por hora para tendencias", [
+        '''
+        CREATE TABLE IF NOT EXISTS post_tags (
+            tag TEXT NOT NULL,
+            created_at TIMESTAMP NOT NULL,
+            post_id INTEGER NOT NULL,
+            PRIMARY KEY (tag, created_at, post_id)
+        ) WITHOUT ROWID
+        ''',
+        "CREATE INDEX IF NOT EXISTS idx_post_tags_post ON post_tags (post_id)",
+        # Usos de cada tag por hora (epoch / 3600)
+        '''
+        CREATE TABLE IF NOT EXISTS tag_buckets (
+            bucket INTEGER NOT NULL,
+            tag TEXT NOT NULL,
+            uses INTEGER NOT NULL,
+            PRIMARY KEY (bucket, tag)
+        ) WITHOUT ROWID
+        ''',
+        # Suma de los buckets dentro de la ventana; el índice da el top-k en orden
+        '''
+        CREATE TABLE IF NOT EXISTS tag_window (
+            tag TEXT PRIMARY KEY,
+            uses INTEGER NOT NULL
+        ) WITHOUT ROWID
+        ''',
+        "CREATE INDEX IF NOT EXISTS idx_tag_window_uses ON tag_window (uses DESC, tag)",
+        backfill_post_tags,
+    ]),
+    Migration(6, "Notificaciones agrupadas por destinatario, tipo y post", [
+        "ALTER TABLE notifications ADD COLUMN actor_count INTEGER NOT NULL DEFAULT 1",
+        "ALTER TABLE notifications ADD COLUMN group_started_at TIMESTAMP",
+        # Actores de cada grupo: permite retirar uno (unlike) sin perder al resto
+        '''
+        CREATE TABLE IF NOT EXISTS notification_actors (
+            notification_id INTEGER NOT NULL,
+            from_user_id INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (notification_id, from_user_id)
+        ) WITHOUT ROWID
+        ''',
+        "CREATE INDEX IF NOT EXISTS idx_notifications_group ON notifications (user_id, type, post_id)",
+        collapse_notifications,
+    ]),
+    Migration(7, "Contador desnormalizado de notificaciones no leídas", [
+        *UNREAD_COUNT_SCHEMA,
+        rebuild_unread_counts,
+    ]),
+    Migration(8, "Registro de cambios de notificaciones para eventos en vivo", NOTIFICATION_CHANGES_SCHEMA),
+    Migration(9, "Retención de notificaciones y archivo comprimido", [
+        # Leídas por antigüedad para el TTL sin recorrer la tabla
+        "CREATE INDEX IF NOT EXISTS idx_notifications_read_created ON notifications (is_read, created_at)",
+        # Un blob zlib (JSON) por usuario y lote depurado
+        '''
+        CREATE TABLE IF NOT EXISTS notifications_archive (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            first_created_at TIMESTAMP NOT NULL,
+            last_created_at TIMESTAMP NOT NULL,
+            row_count INTEGER NOT NULL,
+            payload BLOB NOT NULL,
+            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        "CREATE INDEX IF NOT EXISTS idx_notifications_archive_user ON notifications_archive (user_id, last_created_at)",
+    ]),
+    Migration(10, "Lugares del mapa en tablas indexadas", [*VENUES_SCHEMA, seed_venues]),
+    Migration(11, "Versiones redimensionadas de imágenes subidas", IMAGE_RENDITIONS_SCHEMA),
+    Migration(12, "Almacén de imágenes por contenido con contador de referencias", BLOB_SCHEMA),
+    Migration(13, "Marca de posts sin distribuir al timeline (autores sobre el umbral)", [
+        "ALTER TABLE posts ADD COLUMN fanned_out INTEGER NOT NULL DEFAULT 1",
+        mark_unfanned_posts,
+        # Solo los pendientes: el índice queda chico aunque posts crezca
+        "CREATE INDEX IF NOT EXISTS idx_posts_unfanned ON posts (user_id) WHERE fanned_out = 0",
+    ]),
+    Migration(14, "Orden de llegada de los actores de cada notificación", [
+        *NOTIFICATION_ACTOR_SEQ_SCHEMA,
+        number_notification_actors,
+    ]),
+]
+
+
+def get_schema_version(conn) -> int:
+    """Leer la versión de esquema guardada en PRAGMA user_version"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def apply_migrations(conn, migrations: Sequence[Migration] = MIGRATIONS) -> List[int]:
+    """Aplicar en orden las migraciones pendientes, cada una en su propia transacción.
+
+    Devuelve la lista de versiones aplicadas.
+    """
+    current = get_schema_version(conn)
+    applied = []
+    for migration in sorted(migrations, key=lambda m: m.version):
+        if migration.version <= current:
+            continue
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN")
+            for step in migration.steps:
+                if callable(step):
+                    step(cursor)
+                else:
+                    cursor.execute(step)
+            # user_version es transaccional: se confirma junto con la migración
+            cursor.execute(f"PRAGMA user_version = {int(migration.version)}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied.append(migration.version)
+        current = migration.version
+    return applied
@@ -41,6 +41,13 @@ class Like:
     post_id: int = 0
     created_at: Optional[datetime] = None
 
+@dataclass
+class SavedPost:
+    id: Optional[int] = None
+    user_id: int = 0
+    post_id: int = 0
+    created_at: Optional[datetime] = None
+
 @dataclass
 class Comment:
     id: Optional[int] = None
@@ -71,7 +78,19 @@ class Notification:
     message: str = ""
     is_read: bool = False
     created_at: Optional[datetime] = None
+    actor_count: int = 1  # Actores agrupados; from_user_id es el más reciente
     
     # Joined data
     from_username: str = ""
-    from_user_avatar: str = ""
\ No newline at end of file
+    from_user_avatar: str = ""
+
+@dataclass
+class SearchResult:
+    kind: str = ""  # 'posts', 'users', 'comments'
+    id: int = 0
+    score: float = 0.0  # bm25: menor es más relevante
+    title: str = ""
+    text: str = ""
+    user_id: int = 0
+    avatar_url: str = ""
+    post_id: Optional[int] = None  # Post al que pertenece un comentario
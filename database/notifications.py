@@ -0,0 +1,292 @@
+"""Notificaciones agrupadas y contador desnormalizado de no leídas.
+
+Verificar los contadores (desde la raíz del repositorio):
+    python -m database.notifications [ruta.db] [--repair]
+
+Sale con código 1 si algún contador no coincide y no se pidió --repair.
+"""
+import sys
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+# Ventana de agrupación: los eventos que llegan mientras el grupo está sin leer
+# y dentro de esta ventana desde su primer evento se suman al mismo grupo
+NOTIFICATION_GROUP_WINDOW_HOURS = 24
+
+# Mensaje por tipo: (un solo actor, varios actores)
+NOTIFICATION_MESSAGES = {
+    "like": ("le dio like a tu publicación", "le dieron like a tu publicación"),
+    "comment": ("comentó tu publicación", "comentaron tu publicación"),
+    "follow": ("comenzó a seguirte", "comenzaron a seguirte"),
+}
+
+
+# Contador de no leídas por usuario. Los triggers lo actualizan en la misma
+# transacción que cada INSERT, cambio de is_read o DELETE de notifications.
+UNREAD_COUNT_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS notification_counters (
+        user_id INTEGER PRIMARY KEY,
+        unread_count INTEGER NOT NULL DEFAULT 0
+    ) WITHOUT ROWID
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS notifications_unread_insert AFTER INSERT ON notifications
+    WHEN NOT new.is_read BEGIN
+        INSERT INTO notification_counters (user_id, unread_count) VALUES (new.user_id, 1)
+        ON CONFLICT (user_id) DO UPDATE SET unread_count = unread_count + 1;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS notifications_unread_delete AFTER DELETE ON notifications
+    WHEN NOT old.is_read BEGIN
+        UPDATE notification_counters SET unread_count = unread_count - 1 WHERE user_id = old.user_id;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS notifications_unread_update AFTER UPDATE OF is_read ON notifications
+    WHEN old.is_read IS NOT new.is_read BEGIN
+        INSERT INTO notification_counters (user_id, unread_count)
+        VALUES (new.user_id, CASE WHEN new.is_read THEN -1 ELSE 1 END)
+        ON CONFLICT (user_id) DO UPDATE SET unread_count = unread_count + excluded.unread_count;
+    END
+    ''',
+]
+
+# Orden de llegada de los actores de cada grupo. created_at tiene resolución de
+# segundos: dos likes del mismo segundo empatan y no dicen quién fue el último
+NOTIFICATION_ACTOR_SEQ_SCHEMA = [
+    "ALTER TABLE notification_actors ADD COLUMN seq INTEGER NOT NULL DEFAULT 0",
+    "CREATE INDEX IF NOT EXISTS idx_notification_actors_seq ON notification_actors (notification_id, seq)",
+]
+
+# Siguiente número de orden en un grupo (el índice resuelve el MAX)
+_NEXT_ACTOR_SEQ = "(SELECT COALESCE(MAX(seq), 0) + 1 FROM notification_actors WHERE notification_id = ?)"
+
+# Grupo abierto (sin leer y dentro de la ventana) al que se suma un evento
+OPEN_NOTIFICATION_GROUP_SQL = '''
+    SELECT id, actor_count FROM notifications
+    WHERE user_id = ? AND type = ? AND post_id IS ? AND is_read = FALSE
+      AND group_started_at >= datetime('now', ?)
+    ORDER BY id DESC
+    LIMIT 1
+'''
+
+# Grupo más reciente en el que figura un actor (para retirarlo)
+ACTOR_NOTIFICATION_GROUP_SQL = '''
+    SELECT n.id, n.from_user_id, n.actor_count
+    FROM notifications n
+    JOIN notification_actors a ON a.notification_id = n.id AND a.from_user_id = ?
+    WHERE n.user_id = ? AND n.type = ? AND n.post_id IS ?
+    ORDER BY n.id DESC
+    LIMIT 1
+'''
+
+
+def _message_for(notification_type: str, actor_count: int, message: Optional[str] = None) -> str:
+    singular, plural = NOTIFICATION_MESSAGES.get(notification_type, (message, message))
+    return plural if actor_count > 1 else (message or singular)
+
+
+def record_notification(cursor, user_id: int, from_user_id: int, notification_type: str,
+                        post_id: Optional[int] = None, message: Optional[str] = None,
+                        window_hours: int = NOTIFICATION_GROUP_WINDOW_HOURS) -> int:
+    """Sumar un evento a su grupo (destinatario, tipo, post) o abrir uno nuevo.
+
+    El grupo queda con el último actor visible y sube al principio de la lista.
+    Se llama dentro de la transacción que genera el evento; devuelve el id del grupo.
+    """
+    cursor.execute(OPEN_NOTIFICATION_GROUP_SQL, (user_id, notification_type, post_id, f"-{window_hours} hours"))
+    group = cursor.fetchone()
+
+    if group is None:
+        cursor.execute('''
+            INSERT INTO notifications (user_id, from_user_id, type, post_id, message,
+                                       actor_count, group_started_at)
+            VALUES (?, ?, ?, ?, ?, 1, CURRENT_TIMESTAMP)
+        ''', (user_id, from_user_id, notification_type, post_id,
+              _message_for(notification_type, 1, message)))
+        notification_id = cursor.lastrowid
+        cursor.execute('''
+            INSERT INTO notification_actors (notification_id, from_user_id, seq) VALUES (?, ?, 1)
+        ''', (notification_id, from_user_id))
+        return notification_id
+
+    notification_id, actor_count = group[0], group[1]
+    cursor.execute(f'''
+        INSERT OR IGNORE INTO notification_actors (notification_id, from_user_id, seq)
+        VALUES (?, ?, {_NEXT_ACTOR_SEQ})
+    ''', (notification_id, from_user_id, notification_id))
+    if cursor.rowcount:
+        actor_count += 1
+    else:
+        # El actor ya estaba en el grupo (p. ej. un segundo comentario): solo pasa a ser el último
+        cursor.execute(f'''
+            UPDATE notification_actors SET created_at = CURRENT_TIMESTAMP, seq = {_NEXT_ACTOR_SEQ}
+            WHERE notification_id = ? AND from_user_id = ?
+        ''', (notification_id, notification_id, from_user_id))
+    cursor.execute('''
+        UPDATE notifications
+        SET from_user_id = ?, actor_count = ?, message = ?, created_at = CURRENT_TIMESTAMP
+        WHERE id = ?
+    ''', (from_user_id, actor_count, _message_for(notification_type, actor_count, message),
+          notification_id))
+    return notification_id
+
+
+def retract_notification(cursor, user_id: int, from_user_id: int, notification_type: str,
+                         post_id: Optional[int] = None) -> bool:
+    """Quitar a un actor de su grupo más reciente (p. ej. al sacar un like).
+
+    Si era el único actor se borra el grupo; si era el actor visible, pasa a
+    mostrarse el anterior. Devuelve si había algo que retirar.
+    """
+    cursor.execute(ACTOR_NOTIFICATION_GROUP_SQL, (from_user_id, user_id, notification_type, post_id))
+    group = cursor.fetchone()
+    if group is None:
+        return False
+
+    notification_id, shown_user_id, actor_count = group[0], group[1], group[2]
+    cursor.execute('''
+        DELETE FROM notification_actors WHERE notification_id = ? AND from_user_id = ?
+    ''', (notification_id, from_user_id))
+    if actor_count <= 1:
+        cursor.execute("DELETE FROM notifications WHERE id = ?", (notification_id,))
+        return True
+
+    if shown_user_id == from_user_id:
+        cursor.execute('''
+            SELECT from_user_id FROM notification_actors
+            WHERE notification_id = ?
+            ORDER BY seq DESC
+            LIMIT 1
+        ''', (notification_id,))
+        shown_user_id = cursor.fetchone()[0]
+    cursor.execute('''
+        UPDATE notifications SET from_user_id = ?, actor_count = ?, message = ? WHERE id = ?
+    ''', (shown_user_id, actor_count - 1,
+          _message_for(notification_type, actor_count - 1), notification_id))
+    return True
+
+
+def notify_post_owner(cursor, from_user_id: int, post_id: int, notification_type: str) -> Optional[int]:
+    """Notificar al dueño del post salvo que el evento sea propio"""
+    cursor.execute("SELECT user_id FROM posts WHERE id = ?", (post_id,))
+    owner = cursor.fetchone()
+    if owner is None or owner[0] == from_user_id:
+        return None
+    return record_notification(cursor, owner[0], from_user_id, notification_type, post_id)
+
+
+def retract_post_notification(cursor, from_user_id: int, post_id: int, notification_type: str) -> bool:
+    """Retirar la notificación que un evento generó al dueño del post"""
+    cursor.execute("SELECT user_id FROM posts WHERE id = ?", (post_id,))
+    owner = cursor.fetchone()
+    if owner is None or owner[0] == from_user_id:
+        return False
+    return retract_notification(cursor, owner[0], from_user_id, notification_type, post_id)
+
+
+def collapse_notifications(cursor, window_hours: int = NOTIFICATION_GROUP_WINDOW_HOURS):
+    """Paso de migración: registrar actores y agrupar las notificaciones sin leer existentes"""
+    cursor.execute("UPDATE notifications SET group_started_at = created_at")
+    cursor.execute('''
+        INSERT OR IGNORE INTO notification_actors (notification_id, from_user_id, created_at)
+        SELECT id, from_user_id, created_at FROM notifications
+    ''')
+    cursor.execute('''
+        SELECT id, user_id, type, post_id, from_user_id, created_at FROM notifications
+        WHERE is_read = FALSE
+        ORDER BY created_at, id
+    ''')
+    window = timedelta(hours=window_hours)
+    # (destinatario, tipo, post) -> grupo abierto [id, tipo, inicio, actores]
+    open_groups = {}
+    groups = []
+    merged = []
+    for notification_id, user_id, notification_type, post_id, from_user_id, created_at in cursor.fetchall():
+        key = (user_id, notification_type, post_id)
+        started = datetime.fromisoformat(str(created_at))
+        group = open_groups.get(key)
+        if group is None or started - group[2] > window:
+            open_groups[key] = [notification_id, notification_type, started, {from_user_id}]
+            groups.append(open_groups[key])
+            continue
+        group[3].add(from_user_id)
+        merged.append((group[0], notification_id, from_user_id, created_at))
+
+    for group_id, notification_id, from_user_id, created_at in merged:
+        cursor.execute('''
+            INSERT INTO notification_actors (notification_id, from_user_id, created_at) VALUES (?, ?, ?)
+            ON CONFLICT (notification_id, from_user_id) DO UPDATE SET created_at = excluded.created_at
+        ''', (group_id, from_user_id, created_at))
+        cursor.execute('''
+            UPDATE notifications SET from_user_id = ?, created_at = ? WHERE id = ?
+        ''', (from_user_id, created_at, group_id))
+        cursor.execute("DELETE FROM notification_actors WHERE notification_id = ?", (notification_id,))
+        cursor.execute("DELETE FROM notifications WHERE id = ?", (notification_id,))
+
+    for group_id, notification_type, _, actors in groups:
+        if len(actors) > 1:
+            cursor.execute('''
+                UPDATE notifications SET actor_count = ?, message = ? WHERE id = ?
+            ''', (len(actors), _message_for(notification_type, len(actors)), group_id))
+
+
+def number_notification_actors(cursor):
+    """Paso de migración: numerar los actores existentes de cada grupo por created_at"""
+    cursor.execute('''
+        SELECT notification_id, from_user_id,
+               ROW_NUMBER() OVER (PARTITION BY notification_id ORDER BY created_at, from_user_id)
+        FROM notification_actors
+    ''')
+    cursor.executemany('''
+        UPDATE notification_actors SET seq = ? WHERE notification_id = ? AND from_user_id = ?
+    ''', [(seq, notification_id, from_user_id) for notification_id, from_user_id, seq in cursor.fetchall()])
+
+
+def find_unread_count_mismatches(cursor) -> List[Tuple[int, int, int]]:
+    """Usuarios cuyo contador no coincide con las notificaciones: (usuario, guardado, real)"""
+    cursor.execute('''
+        SELECT user_id, SUM(stored) AS stored, SUM(actual) AS actual FROM (
+            SELECT user_id, unread_count AS stored, 0 AS actual FROM notification_counters
+            UNION ALL
+            SELECT user_id, 0, COUNT(*) FROM notifications WHERE is_read = FALSE GROUP BY user_id
+        )
+        GROUP BY user_id
+        HAVING SUM(stored) != SUM(actual)
+    ''')
+    return [(row[0], row[1], row[2]) for row in cursor.fetchall()]
+
+
+def rebuild_unread_counts(cursor):
+    """Recalcular todos los contadores de no leídas con una sola pasada"""
+    cursor.execute("DELETE FROM notification_counters")
+    cursor.execute('''
+        INSERT INTO notification_counters (user_id, unread_count)
+        SELECT user_id, COUNT(*) FROM notifications WHERE is_read = FALSE GROUP BY user_id
+    ''')
+
+
+def main(argv=None) -> int:
+    from database.database_manager import DatabaseManager
+
+    argv = sys.argv[1:] if argv is None else argv
+    repair = "--repair" in argv
+    paths = [arg for arg in argv if arg != "--repair"]
+    db = DatabaseManager(paths[0] if paths else "teamup.db")
+    try:
+        mismatches = db.check_unread_counts(repair=repair)
+    finally:
+        db.close()
+    for user_id, stored, actual in mismatches:
+        print(f"[DIFERENCIA] usuario {user_id}: contador {stored}, real {actual}")
+    if not mismatches:
+        print("Contadores de no leídas consistentes")
+    elif repair:
+        print(f"Contadores recalculados ({len(mismatches)} usuarios corregidos)")
+    return 1 if mismatches and not repair else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""Reporte EXPLAIN QUERY PLAN de las consultas más frecuentes.
+
+Uso (desde la raíz del repositorio):
+    python -m database.query_plan [ruta.db]
+
+Las migraciones pendientes se aplican a una copia temporal de la base: el
+reporte refleja el esquema actual sin modificar el archivo original.
+
+Sale con código 1 si alguna consulta recorre una tabla o índice completo sin
+estar permitido, o necesita ordenar con un B-tree temporal, para detectar
+regresiones de índices.
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+from typing import Dict, List, Tuple
+
+from database.database_manager import (
+    AUTHOR_POSTS_PAGE_SQL, FOLLOWER_IDS_SQL, FOLLOWING_TIMELINE_PAGE_SQL, POST_COMMENTS_SQL,
+    POSTS_FEED_PAGE_SQL, POSTS_FEED_SQL, TAG_POSTS_PAGE_SQL, TRENDING_TAGS_SQL,
+    UNREAD_NOTIFICATIONS_COUNT_SQL, USER_NOTIFICATIONS_SQL, USER_POSTS_SQL,
+    VENUE_IDS_BY_CATEGORY_SQL, VENUE_IDS_BY_SPORT_SQL, VENUES_SPORTS_SQL, DatabaseManager
+)
+from database.notifications import ACTOR_NOTIFICATION_GROUP_SQL, OPEN_NOTIFICATION_GROUP_SQL
+from database.retention import EXPIRED_NOTIFICATION_IDS_SQL
+
+# Consulta, parámetros de ejemplo e índices que la consulta puede recorrer
+# completos (p. ej. un ORDER BY ... LIMIT que lee el índice en orden)
+HOT_QUERIES: Dict[str, Tuple[str, tuple, tuple]] = {
+    "get_posts_feed": (POSTS_FEED_SQL, (20,), ("idx_posts_created_at",)),
+    "get_posts_feed_page": (POSTS_FEED_PAGE_SQL, ("2025-01-01 00:00:00", 1, 21), ()),
+    "get_following_feed_page": (FOLLOWING_TIMELINE_PAGE_SQL, (1, "2025-01-01 00:00:00", 1, 21), ()),
+    "get_following_feed_page (autores grandes)": (
+        AUTHOR_POSTS_PAGE_SQL, (1, "2025-01-01 00:00:00", 1, 21), ()
+    ),
+    "get_posts_by_tag": (TAG_POSTS_PAGE_SQL, ("teamup", "2025-01-01 00:00:00", 1, 21), ()),
+    "get_trending_tags": (TRENDING_TAGS_SQL, (10,), ("idx_tag_window_uses",)),
+    "get_user_posts": (USER_POSTS_SQL, (1,), ()),
+    "get_user_notifications": (USER_NOTIFICATIONS_SQL, (1, 50), ()),
+    "record_notification": (OPEN_NOTIFICATION_GROUP_SQL, (1, 'like', 1, '-24 hours'), ()),
+    "retract_notification": (ACTOR_NOTIFICATION_GROUP_SQL, (2, 1, 'like', 1), ()),
+    "get_unread_notifications_count": (UNREAD_NOTIFICATIONS_COUNT_SQL, (1,), ()),
+    "expired_notification_ids": (EXPIRED_NOTIFICATION_IDS_SQL, ('-30 days', 500), ()),
+    "get_post_comments": (POST_COMMENTS_SQL, (1, 50), ()),
+    "get_venue_ids_by_category": (VENUE_IDS_BY_CATEGORY_SQL, ("canchas",), ()),
+    "get_venue_ids_by_sport": (VENUE_IDS_BY_SPORT_SQL, ("futbol", None, None), ()),
+    "load_venues_sports": (VENUES_SPORTS_SQL, (), ("idx_venue_sports_venue",)),
+    "get_followers": (FOLLOWER_IDS_SQL, (1,), ()),
+}
+
+
+def explain(conn, sql: str, params: tuple = ()) -> List[str]:
+    """Devolver las líneas de detalle del plan de una consulta"""
+    rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    return [row[3] for row in rows]
+
+
+def find_plan_problems(plan: List[str], allowed_scans: tuple = ()) -> List[str]:
+    """Detectar recorridos completos no permitidos y ordenamientos temporales"""
+    problems = []
+    for detail in plan:
+        if detail.startswith("SCAN") and not any(f"INDEX {index}" in detail for index in allowed_scans):
+            problems.append(detail)
+        elif "USE TEMP B-TREE" in detail:
+            problems.append(detail)
+    return problems
+
+
+def build_report(conn, queries: Dict[str, Tuple[str, tuple, tuple]] = HOT_QUERIES) -> Dict[str, dict]:
+    """Plan y problemas detectados para cada consulta caliente"""
+    report = {}
+    for name, (sql, params, allowed_scans) in queries.items():
+        plan = explain(conn, sql, params)
+        report[name] = {"plan": plan, "problems": find_plan_problems(plan, allowed_scans)}
+    return report
+
+
+def print_report(report: Dict[str, dict]):
+    for name, entry in report.items():
+        status = "OK" if not entry["problems"] else "REGRESIÓN"
+        print(f"[{status}] {name}")
+        for detail in entry["plan"]:
+            print(f"    {detail}")
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    source = argv[0] if argv else "teamup.db"
+    with tempfile.TemporaryDirectory(prefix="teamup_plan_") as work_dir:
+        copy_path = os.path.join(work_dir, os.path.basename(source))
+        if os.path.exists(source):
+            # Solo lectura sobre el original; backup() copia también lo que siga en el WAL
+            src = sqlite3.connect(f"file:{source}?mode=ro", uri=True)
+            dst = sqlite3.connect(copy_path)
+            try:
+                src.backup(dst)
+            finally:
+                dst.close()
+                src.close()
+        db = DatabaseManager(copy_path)
+        conn = db.get_connection()
+        try:
+            report = build_report(conn)
+        finally:
+            conn.close()
+            db.close()
+    print_report(report)
+    return 1 if any(entry["problems"] for entry in report.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+import json
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+# Notificaciones borradas por transacción; acota cuánto se retiene el lock de escritura
+RETENTION_BATCH_SIZE = 500
+
+# Leídas más viejas que el TTL
+EXPIRED_NOTIFICATION_IDS_SQL = '''
+    SELECT id FROM notifications
+    WHERE is_read = TRUE AND created_at < datetime('now', ?)
+    LIMIT ?
+'''
+
+
+@dataclass
+class RetentionPolicy:
+    """Qué notificaciones se conservan"""
+    read_ttl_days: Optional[int] = 30  # Leídas más viejas que esto se borran (None: sin límite)
+    max_per_user: Optional[int] = 500  # Tope por usuario, se borran las más viejas (None: sin tope)
+    keep_unread: bool = True  # Las no leídas nunca se borran
+    archive: bool = False  # Guardar lo borrado comprimido en notifications_archive
+    batch_size: int = RETENTION_BATCH_SIZE
+    pause: float = 0.01  # Segundos entre lotes para dejar pasar otras escrituras
+
+
+@dataclass
+class RetentionReport:
+    pruned: int = 0
+    archived: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+    max_batch_seconds: float = 0.0  # Lote más lento: el mayor tiempo con el lock tomado
+
+    def __str__(self):
+        return (f"Notificaciones depuradas: {self.pruned} (archivadas {self.archived}) "
+                f"en {self.batches} lotes, {self.seconds:.2f} s "
+                f"(lote más lento {self.max_batch_seconds * 1000:.1f} ms)")
+
+
+def expired_notification_ids(cursor, policy: RetentionPolicy, limit: int) -> List[int]:
+    """Ids de notificaciones leídas más viejas que el TTL (usa idx_notifications_read_created)"""
+    if policy.read_ttl_days is None:
+        return []
+    cursor.execute(EXPIRED_NOTIFICATION_IDS_SQL, (f"-{policy.read_ttl_days} days", limit))
+    return [row[0] for row in cursor.fetchall()]
+
+
+def over_cap_notification_ids(cursor, policy: RetentionPolicy) -> List[int]:
+    """Ids que exceden el tope por usuario, de los usuarios que lo superan"""
+    if policy.max_per_user is None:
+        return []
+    cursor.execute('''
+        SELECT user_id FROM notifications GROUP BY user_id HAVING COUNT(*) > ?
+    ''', (policy.max_per_user,))
+    user_ids = [row[0] for row in cursor.fetchall()]
+
+    ids = []
+    for user_id in user_ids:
+        # Las más nuevas ocupan el tope; de las que sobran se salvan las no leídas si corresponde
+        cursor.execute('''
+            SELECT id, is_read FROM notifications
+            WHERE user_id = ?
+            ORDER BY created_at DESC
+            LIMIT -1 OFFSET ?
+        ''', (user_id, policy.max_per_user))
+        ids.extend(row[0] for row in cursor.fetchall() if row[1] or not policy.keep_unread)
+    return ids
+
+
+def archive_notifications(cursor, notification_ids: List[int]) -> int:
+    """Copiar las notificaciones a notifications_archive: un blob zlib por usuario y lote"""
+    placeholders = ",".join("?" * len(notification_ids))
+    cursor.execute(f'''
+        SELECT id, user_id, from_user_id, type, post_id, message, is_read, created_at, actor_count
+        FROM notifications WHERE id IN ({placeholders})
+    ''', notification_ids)
+    by_user: Dict[int, List[list]] = {}
+    for row in cursor.fetchall():
+        by_user.setdefault(row[1], []).append(list(row))
+
+    cursor.executemany('''
+        INSERT INTO notifications_archive (user_id, first_created_at, last_created_at, row_count, payload)
+        VALUES (?, ?, ?, ?, ?)
+    ''', [
+        (user_id, min(row[7] for row in rows), max(row[7] for row in rows), len(rows),
+         zlib.compress(json.dumps(rows).encode("utf-8")))
+        for user_id, rows in by_user.items()
+    ])
+    return sum(len(rows) for rows in by_user.values())
+
+
+def read_archive_payload(payload: bytes) -> List[dict]:
+    """Decodificar un blob de notifications_archive"""
+    columns = ("id", "user_id", "from_user_id", "type", "post_id", "message",
+               "is_read", "created_at", "actor_count")
+    return [dict(zip(columns, row)) for row in json.loads(zlib.decompress(payload))]
+
+
+def delete_notifications(cursor, notification_ids: List[int]) -> int:
+    """Borrar notificaciones y sus actores; los triggers ajustan contadores y registro de cambios"""
+    placeholders = ",".join("?" * len(notification_ids))
+    cursor.execute(f"DELETE FROM notification_actors WHERE notification_id IN ({placeholders})",
+                   notification_ids)
+    cursor.execute(f"DELETE FROM notifications WHERE id IN ({placeholders})", notification_ids)
+    return cursor.rowcount
+
+
+def prune_notifications(db_manager, policy: RetentionPolicy) -> RetentionReport:
+    """Aplicar la política en lotes cortos, cada uno en su propia transacción"""
+    report = RetentionReport()
+    start = time.perf_counter()
+    conn = db_manager.get_connection()
+    try:
+        cursor = conn.cursor()
+        pending = over_cap_notification_ids(cursor, policy)
+        while True:
+            batch = pending[:policy.batch_size]
+            pending = pending[policy.batch_size:]
+            if not batch:
+                batch = expired_notification_ids(cursor, policy, policy.batch_size)
+            if not batch:
+                break
+
+            batch_start = time.perf_counter()
+            try:
+                if policy.archive:
+                    report.archived += archive_notifications(cursor, batch)
+                report.pruned += delete_notifications(cursor, batch)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            report.batches += 1
+            report.max_batch_seconds = max(report.max_batch_seconds, time.perf_counter() - batch_start)
+
+            db_manager.publish_notification_changes()
+            if policy.pause:
+                time.sleep(policy.pause)
+    finally:
+        conn.close()
+    report.seconds = time.perf_counter() - start
+    return report
+
+
+class NotificationRetentionJob:
+    """Hilo de mantenimiento que aplica la política cada ``interval`` segundos"""
+
+    def __init__(self, db_manager, policy: RetentionPolicy, interval: float = 3600.0):
+        self.db_manager = db_manager
+        self.policy = policy
+        self.interval = interval
+        self.last_report: Optional[RetentionReport] = None
+        self._stopped = threading.Event()
+        self._worker = threading.Thread(target=self._run, name="notification-retention", daemon=True)
+        self._worker.start()
+
+    def run_once(self) -> RetentionReport:
+        self.last_report = prune_notifications(self.db_manager, self.policy)
+        if self.last_report.pruned:
+            print(self.last_report)
+        return self.last_report
+
+    def _run(self):
+        # Primera pasada al arrancar, después cada intervalo
+        while not self._stopped.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Error al depurar notificaciones: {e}")
+            self._stopped.wait(self.interval)
+
+    def close(self):
+        self._stopped.set()
+        self._worker.join(timeout=1)
@@ -0,0 +1,363 @@
+import base64
+import json
+import math
+import re
+import unicodedata
+from typing import List, NamedTuple, Optional, Tuple
+
+# Tipos de resultado en el orden usado para desempatar en el cursor
+SEARCH_KINDS = ("posts", "users", "comments")
+
+# Prefijos más cortos que esto se buscan como término exacto: un prefijo de una
+# letra expande a medio vocabulario y no aporta a la búsqueda
+MIN_PREFIX_LENGTH = 2
+
+# Tipos con hasta esta cantidad de coincidencias se puntúan completos (~8 µs
+# por fila entre leerla y puntuarla: ~8 ms)
+EXACT_RANK_MATCHES = 1000
+
+# Con más coincidencias se recorren en ventanas de las SEARCH_CANDIDATE_LIMIT
+# siguientes por antigüedad: cada ventana se rankea entera antes de pasar a la
+# próxima, y el cursor sigue bajando hasta la más vieja (si quedan
+# EXACT_RANK_MATCHES o menos, la ventana las toma todas).
+# bm25() de FTS5 las ordenaría todas juntas, pero cuesta cientos de ms con
+# términos frecuentes en 1M de posts y usa las estadísticas vivas del índice:
+# cada inserción mueve los scores y un cursor sobre ellos repite o saltea filas.
+# Aquí se puntúa en Python con estadísticas que fija el cursor (ver SearchCursor)
+# y el IDF sale de search_term_stats o de un sondeo acotado.
+SEARCH_CANDIDATE_LIMIT = 200
+
+# Términos con al menos esta cantidad de documentos se registran en
+# search_term_stats (ver refresh_search_stats)
+FREQUENT_TERM_DOCUMENTS = 10000
+
+# Filas del prefijo indexado que se recorren por cada candidato buscado al
+# filtrar un prefijo frecuente antes de recurrir a la consulta de prefijo exacta
+PREFIX_SCAN_FACTOR = 2
+
+# Largo máximo de los índices de prefijo (opción prefix de FTS5)
+PREFIX_INDEX_MAX = 3
+
+# unicode61 con remove_diacritics: "basquet" encuentra "básquet".
+# prefix='2 3' mantiene índices de prefijo para que "term*" no recorra el vocabulario.
+_FTS_OPTIONS = "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'"
+
+# Tablas FTS5 de contenido externo: el texto vive en la tabla original y los
+# triggers mantienen el índice sincronizado.
+SEARCH_SCHEMA = [
+    f'''
+    CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5(
+        caption, content = 'posts', content_rowid = 'id', {_FTS_OPTIONS}
+    )
+    ''',
+    f'''
+    CREATE VIRTUAL TABLE IF NOT EXISTS users_fts USING fts5(
+        username, full_name, bio, sport, content = 'users', content_rowid = 'id', {_FTS_OPTIONS}
+    )
+    ''',
+    f'''
+    CREATE VIRTUAL TABLE IF NOT EXISTS comments_fts USING fts5(
+        content, content = 'comments', content_rowid = 'id', {_FTS_OPTIONS}
+    )
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS posts_fts_insert AFTER INSERT ON posts BEGIN
+        INSERT INTO posts_fts (rowid, caption) VALUES (new.id, new.caption);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS posts_fts_delete AFTER DELETE ON posts BEGIN
+        INSERT INTO posts_fts (posts_fts, rowid, caption) VALUES ('delete', old.id, old.caption);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS posts_fts_update AFTER UPDATE OF caption ON posts BEGIN
+        INSERT INTO posts_fts (posts_fts, rowid, caption) VALUES ('delete', old.id, old.caption);
+        INSERT INTO posts_fts (rowid, caption) VALUES (new.id, new.caption);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS users_fts_insert AFTER INSERT ON users BEGIN
+        INSERT INTO users_fts (rowid, username, full_name, bio, sport)
+        VALUES (new.id, new.username, new.full_name, new.bio, new.sport);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS users_fts_delete AFTER DELETE ON users BEGIN
+        INSERT INTO users_fts (users_fts, rowid, username, full_name, bio, sport)
+        VALUES ('delete', old.id, old.username, old.full_name, old.bio, old.sport);
+    END
+    ''',
+    # Solo columnas indexadas: los contadores de users cambian en cada follow/post
+    '''
+    CREATE TRIGGER IF NOT EXISTS users_fts_update
+    AFTER UPDATE OF username, full_name, bio, sport ON users BEGIN
+        INSERT INTO users_fts (users_fts, rowid, username, full_name, bio, sport)
+        VALUES ('delete', old.id, old.username, old.full_name, old.bio, old.sport);
+        INSERT INTO users_fts (rowid, username, full_name, bio, sport)
+        VALUES (new.id, new.username, new.full_name, new.bio, new.sport);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS comments_fts_insert AFTER INSERT ON comments BEGIN
+        INSERT INTO comments_fts (rowid, content) VALUES (new.id, new.content);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS comments_fts_delete AFTER DELETE ON comments BEGIN
+        INSERT INTO comments_fts (comments_fts, rowid, content) VALUES ('delete', old.id, old.content);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS comments_fts_update AFTER UPDATE OF content ON comments BEGIN
+        INSERT INTO comments_fts (comments_fts, rowid, content) VALUES ('delete', old.id, old.content);
+        INSERT INTO comments_fts (rowid, content) VALUES (new.id, new.content);
+    END
+    ''',
+    # Vocabulario de cada índice (tablas virtuales de solo lectura, sin almacenamiento)
+    "CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts_vocab USING fts5vocab(posts_fts, row)",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS users_fts_vocab USING fts5vocab(users_fts, row)",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS comments_fts_vocab USING fts5vocab(comments_fts, row)",
+    # Estadísticas de términos frecuentes, como sqlite_stat1 para ANALYZE
+    '''
+    CREATE TABLE IF NOT EXISTS search_term_stats (
+        kind TEXT NOT NULL,
+        term TEXT NOT NULL,
+        documents INTEGER NOT NULL,
+        PRIMARY KEY (kind, term)
+    ) WITHOUT ROWID
+    ''',
+]
+
+# Columnas de texto indexadas por tipo y su peso en el ranking
+SEARCH_TEXT_COLUMNS = {
+    "posts": ("caption",),
+    "users": ("username", "full_name", "bio", "sport"),
+    "comments": ("content",),
+}
+SEARCH_COLUMN_WEIGHTS = {
+    "users": (10.0, 5.0, 1.0, 2.0),
+}
+
+# Parámetros de BM25 (los mismos que usa bm25() de FTS5)
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_TOKEN_RE = re.compile(r"[^\W_]+", re.UNICODE)
+
+# Minúsculas sin diacríticos, igual que unicode61 con remove_diacritics
+_FOLD_TABLE = {}
+# Letra base -> todas sus variantes con diacríticos, para armar expresiones
+# regulares que comparan sin plegar el texto de cada fila
+_ACCENT_VARIANTS = {}
+for _code in range(0xC0, 0x250):
+    _char = chr(_code).lower()
+    _base = unicodedata.normalize("NFKD", _char)[0]
+    if len(_char) == 1 and _base != _char and _base.isalpha():
+        _FOLD_TABLE[ord(_char)] = _base
+        _ACCENT_VARIANTS.setdefault(_base, {_base}).add(_char)
+
+
+class SearchQuery(NamedTuple):
+    terms: Tuple[str, ...]
+    prefix: bool  # La última palabra se busca por prefijo
+
+
+class SearchCursor(NamedTuple):
+    window: int
+    score: float
+    kind_index: int
+    item_id: int
+    # Mayor id de cada tipo (en el orden de SEARCH_KINDS) al pedir la primera
+    # página: las siguientes puntúan las mismas filas con las mismas estadísticas
+    max_ids: Tuple[int, ...]
+    # Mayor id de la ventana actual de cada tipo (0: el tipo no tiene más)
+    tops: Tuple[int, ...]
+
+    @property
+    def position(self) -> Tuple[float, int, int]:
+        return self.score, self.kind_index, self.item_id
+
+
+def rebuild_search_index(cursor):
+    """Paso de migración: indexar el contenido existente"""
+    for kind in SEARCH_KINDS:
+        cursor.execute(f"INSERT INTO {kind}_fts ({kind}_fts) VALUES ('rebuild')")
+
+
+def refresh_search_stats(cursor, min_documents: int = FREQUENT_TERM_DOCUMENTS):
+    """Recalcular search_term_stats a partir del vocabulario de cada índice.
+
+    Recorre el vocabulario completo (~0,4 s con 1M de posts): se llama al migrar y
+    después de cargas masivas, no en cada escritura.
+    """
+    cursor.execute("DELETE FROM search_term_stats")
+    for kind in SEARCH_KINDS:
+        cursor.execute(f'''
+            INSERT INTO search_term_stats (kind, term, documents)
+            SELECT ?, term, doc FROM {kind}_fts_vocab WHERE doc >= ?
+        ''', (kind, min_documents))
+
+
+def fold_text(text: str) -> str:
+    text = (text or "").lower()
+    # translate() recorre carácter por carácter: el texto ASCII no tiene nada que plegar
+    return text if text.isascii() else text.translate(_FOLD_TABLE)
+
+
+def tokenize(text: str) -> List[str]:
+    """Palabras plegadas de un texto, igual que las separa el índice FTS5"""
+    return _TOKEN_RE.findall(fold_text(text))
+
+
+def parse_query(text: str) -> Optional[SearchQuery]:
+    """Palabras de la consulta; la última se busca por prefijo (búsqueda mientras se escribe).
+
+    Devuelve None si no hay palabras.
+    """
+    terms = tuple(tokenize(text))
+    if not terms:
+        return None
+    return SearchQuery(terms, len(terms[-1]) >= MIN_PREFIX_LENGTH)
+
+
+def _quote(term: str) -> str:
+    # Citar cada palabra: la sintaxis de FTS5 nunca llega desde el usuario
+    return '"' + term.replace('"', '""') + '"'
+
+
+def term_expression(term: str, prefix: bool, scan_indexed_prefix: bool = False) -> str:
+    """Expresión MATCH de una palabra.
+
+    Con scan_indexed_prefix un prefijo largo se reemplaza por su prefijo
+    indexado: FTS5 devuelve las filas a medida que las recorre en lugar de unir
+    de antemano las listas de todos los términos que empiezan así, pero hay que
+    filtrarlas con term_pattern.
+    """
+    if not prefix:
+        return _quote(term)
+    if scan_indexed_prefix:
+        return _quote(term[:PREFIX_INDEX_MAX]) + "*"
+    return _quote(term) + "*"
+
+
+def build_match_expression(query: SearchQuery, scan_indexed_prefix: bool = False) -> str:
+    """Expresión MATCH con todas las palabras combinadas con AND"""
+    parts = [_quote(term) for term in query.terms[:-1]]
+    parts.append(term_expression(query.terms[-1], query.prefix, scan_indexed_prefix))
+    return " ".join(parts)
+
+
+def term_pattern(term: str, prefix: bool = False):
+    """Expresión regular que encuentra term como palabra (o como inicio de palabra)
+    en texto sin plegar, ignorando mayúsculas y diacríticos"""
+    body = "".join(
+        "[" + "".join(sorted(_ACCENT_VARIANTS[char])) + "]" if char in _ACCENT_VARIANTS else re.escape(char)
+        for char in term
+    )
+    return re.compile(r"(?<![^\W_])" + body + ("" if prefix else r"(?![^\W_])"), re.IGNORECASE)
+
+
+def term_range(term: str, prefix: bool) -> Tuple[str, str]:
+    """Rango [desde, hasta) de términos del vocabulario que coinciden con term"""
+    return (term, term + "\U0010ffff") if prefix else (term, term + "\x00")
+
+
+def estimate_document_frequency(matches: int, probe_limit: int, min_id: int, max_id: int) -> float:
+    """Documentos que contienen un término, a partir de sus probe_limit coincidencias más nuevas.
+
+    Si el sondeo no llegó al límite el conteo es exacto; si no, se extrapola la
+    densidad del término en el rango de ids recorrido a toda la tabla.
+    """
+    if matches < probe_limit or not max_id:
+        return float(matches)
+    return matches * max_id / max(1, max_id - min_id + 1)
+
+
+def bm25_scores(rows, kind: str, query: SearchQuery, document_frequencies, total_documents: int):
+    """Puntuar filas candidatas con BM25 sobre sus columnas de texto.
+
+    Devuelve (score, id) con score negativo como bm25() de FTS5: menor es mejor.
+    """
+    columns = SEARCH_TEXT_COLUMNS[kind]
+    weights = SEARCH_COLUMN_WEIGHTS.get(kind, (1.0,) * len(columns))
+    last = len(query.terms) - 1
+    terms = [
+        (term_pattern(term, query.prefix and index == last),
+         math.log((total_documents - df + 0.5) / (df + 0.5) + 1))
+        for index, (term, df) in enumerate(zip(query.terms, document_frequencies))
+    ]
+
+    texts = [[row[column] or "" for column in columns] for row in rows]
+    # Largo aproximado en palabras: alcanza para normalizar y evita tokenizar cada fila
+    lengths = [[len(text.split()) for text in row_texts] for row_texts in texts]
+    average_lengths = [
+        max(1.0, sum(row_lengths[i] for row_lengths in lengths) / len(lengths))
+        for i in range(len(columns))
+    ]
+
+    scored = []
+    for row, row_texts, row_lengths in zip(rows, texts, lengths):
+        score = 0.0
+        for weight, text, length, average_length in zip(weights, row_texts, row_lengths, average_lengths):
+            if not length:
+                continue
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * length / average_length)
+            for pattern, idf in terms:
+                tf = len(pattern.findall(text))
+                if tf:
+                    score += weight * idf * tf * (BM25_K1 + 1) / (tf + norm)
+        scored.append((-score, row['id']))
+    return scored
+
+
+def encode_search_cursor(window: int, score: float, kind: str, item_id: int, max_ids, tops) -> str:
+    """Codificar la posición (ventana, score, tipo, id) del último resultado, los
+    ids máximos de la primera página y los de su ventana como cursor opaco"""
+    raw = json.dumps([window, score, SEARCH_KINDS.index(kind), item_id, list(max_ids), list(tops)]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_search_cursor(cursor: str) -> SearchCursor:
+    """Decodificar un cursor de búsqueda; lanza ValueError si es inválido"""
+    try:
+        window, score, kind_index, item_id, max_ids, tops = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        max_ids = tuple(int(max_id) for max_id in max_ids)
+        tops = tuple(int(top) for top in tops)
+        if len(max_ids) != len(SEARCH_KINDS) or len(tops) != len(SEARCH_KINDS):
+            raise ValueError("cantidad de ids máximos")
+        return SearchCursor(int(window), float(score), int(kind_index), int(item_id), max_ids, tops)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Cursor de búsqueda inválido: {cursor!r}") from e
+
+
+def search_candidates_sql(kind: str) -> str:
+    """Coincidencias más recientes de un tipo (hasta un id máximo) con sus columnas de texto.
+
+    FTS5 recorre las coincidencias por rowid descendente sin ordenar aparte y
+    lee las columnas de la tabla de contenido solo para las filas devueltas.
+    """
+    table = f"{kind}_fts"
+    columns = ", ".join(SEARCH_TEXT_COLUMNS[kind])
+    return (f"SELECT rowid AS id, {columns} FROM {table} WHERE {table} MATCH ? AND rowid <= ? "
+            f"ORDER BY rowid DESC LIMIT ?")
+
+
+def search_probe_sql(kind: str) -> str:
+    """Cantidad y menor id de las coincidencias más recientes de un término"""
+    table = f"{kind}_fts"
+    return (f"SELECT COUNT(*) AS matches, MIN(id) AS min_id FROM ("
+            f"SELECT rowid AS id FROM {table} WHERE {table} MATCH ? AND rowid <= ? "
+            f"ORDER BY rowid DESC LIMIT ?)")
+
+
+def normalize_kinds(kinds) -> List[str]:
+    """Validar los tipos pedidos y devolverlos en el orden de SEARCH_KINDS"""
+    if kinds is None:
+        return list(SEARCH_KINDS)
+    if isinstance(kinds, str):
+        kinds = [kinds]
+    unknown = set(kinds) - set(SEARCH_KINDS)
+    if unknown:
+        raise ValueError(f"Tipos de búsqueda desconocidos: {sorted(unknown)}")
+    return [kind for kind in SEARCH_KINDS if kind in kinds]
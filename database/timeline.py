@@ -0,0 +1,71 @@
+import heapq
+
+# Autores con más seguidores que este umbral no se distribuyen al escribir
+# (fan-out-on-write); sus posts se leen y mezclan al pedir el feed.
+FANOUT_FOLLOWER_THRESHOLD = 1000
+
+# Posts recientes que se copian al timeline de quien empieza a seguir a alguien
+FOLLOW_BACKFILL_LIMIT = 50
+
+# Cota superior de un cursor de feed para la primera página
+FEED_UPPER_BOUND = ("9999-12-31 23:59:59", 2 ** 63 - 1)
+
+# Repoblar el timeline completo a partir de follows y posts
+TIMELINE_BACKFILL_SQL = '''
+    INSERT OR IGNORE INTO timeline (user_id, created_at, post_id, author_id)
+    SELECT f.follower_id, p.created_at, p.id, p.user_id
+    FROM follows f
+    JOIN posts p ON p.user_id = f.following_id
+    JOIN users a ON a.id = f.following_id
+    WHERE a.followers_count <= ?
+'''
+
+
+# Posts de autores por encima del umbral: no se copiaron a ningún timeline
+MARK_UNFANNED_POSTS_SQL = '''
+    UPDATE posts SET fanned_out = 0
+    WHERE user_id IN (SELECT id FROM users WHERE followers_count > ?)
+'''
+
+# Copiar a los seguidores los posts que un autor publicó mientras superaba el
+# umbral, cuando vuelve a quedar debajo y deja de leerse al pedir el feed
+FANOUT_PENDING_POSTS_SQL = '''
+    INSERT OR IGNORE INTO timeline (user_id, created_at, post_id, author_id)
+    SELECT f.follower_id, p.created_at, p.id, p.user_id
+    FROM posts p JOIN follows f ON f.following_id = p.user_id
+    WHERE p.user_id = ? AND p.fanned_out = 0
+'''
+
+
+def backfill_timeline(cursor, threshold: int = FANOUT_FOLLOWER_THRESHOLD):
+    """Paso de migración: poblar el timeline con los posts existentes"""
+    cursor.execute(TIMELINE_BACKFILL_SQL, (threshold,))
+
+
+def mark_unfanned_posts(cursor, threshold: int = FANOUT_FOLLOWER_THRESHOLD):
+    """Paso de migración: marcar los posts que backfill_timeline no distribuyó"""
+    cursor.execute(MARK_UNFANNED_POSTS_SQL, (threshold,))
+
+
+def fan_out_pending_posts(cursor, author_id: int):
+    """Distribuir los posts de un autor que quedaron sin copiar al timeline"""
+    cursor.execute(FANOUT_PENDING_POSTS_SQL, (author_id,))
+    cursor.execute("UPDATE posts SET fanned_out = 1 WHERE user_id = ? AND fanned_out = 0", (author_id,))
+
+
+def merge_post_streams(streams, limit: int):
+    """Mezclar streams de filas ordenadas por (created_at, id) descendente.
+
+    Descarta posts repetidos y devuelve como máximo ``limit`` filas.
+    """
+    merged = heapq.merge(*streams, key=lambda row: (row['created_at'], row['id']), reverse=True)
+    seen = set()
+    result = []
+    for row in merged:
+        if row['id'] in seen:
+            continue
+        seen.add(row['id'])
+        result.append(row)
+        if len(result) == limit:
+            break
+    return result
@@ -0,0 +1,210 @@
+import queue
+import threading
+from dataclasses import dataclass, replace
+from itertools import count
+from typing import Dict, List, Optional
+
+from database.models import Post
+
+# Subidas que se procesan a la vez. Pillow suelta el GIL al decodificar y
+# redimensionar, así que dos hilos aprovechan dos núcleos sin saturar la BD
+UPLOAD_MAX_WORKERS = 2
+
+# Estados de una subida
+UPLOAD_QUEUED = "en_cola"
+UPLOAD_PROCESSING = "procesando"
+UPLOAD_SAVING = "guardando"
+UPLOAD_DONE = "lista"
+UPLOAD_CANCELLED = "cancelada"
+UPLOAD_FAILED = "error"
+
+UPLOAD_FINISHED_STATES = (UPLOAD_DONE, UPLOAD_CANCELLED, UPLOAD_FAILED)
+
+# Parte de la barra que corresponde a la imagen; el resto es el INSERT del post
+UPLOAD_IMAGE_SHARE = 0.9
+
+
+@dataclass
+class UploadJob:
+    """Estado de una subida; los suscriptores reciben copias, nunca el objeto vivo"""
+    id: int
+    user_id: int
+    caption: str
+    source_path: str
+    state: str = UPLOAD_QUEUED
+    progress: float = 0.0
+    post_id: Optional[int] = None
+    error: str = ""
+
+    @property
+    def finished(self) -> bool:
+        return self.state in UPLOAD_FINISHED_STATES
+
+
+class UploadCancelled(Exception):
+    pass
+
+
+def upload_topic(user_id: int) -> str:
+    return f"uploads:{user_id}"
+
+
+class UploadQueue:
+    """Pool de hilos que procesa subidas fuera del hilo de la UI.
+
+    Cada trabajo ingesta la imagen (decodificar, redimensionar, hashear y
+    guardar en el almacén por contenido) y crea el post. Hay a lo sumo
+    ``max_workers`` subidas en proceso; el resto espera en la cola. Cada
+    cambio de estado o de progreso se publica en el bus del DatabaseManager
+    (tema ``upload_topic(user_id)``) con una copia del UploadJob.
+
+    Una subida se puede cancelar mientras espera o mientras se procesa la
+    imagen; los blobs que alcanzó a guardar quedan sin referencias y los borra
+    la recolección al vencer BLOB_GC_GRACE_SECONDS. Una vez que empieza a
+    guardarse el post ya no se cancela.
+    """
+
+    def __init__(self, db_manager, max_workers: int = UPLOAD_MAX_WORKERS):
+        self.db_manager = db_manager
+        self.max_workers = max(1, max_workers)
+        self._jobs: Dict[int, UploadJob] = {}
+        self._cancelled = set()
+        self._ids = count(1)
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._stopped = False
+        self._workers = [
+            threading.Thread(target=self._run, name=f"upload-worker-{i}", daemon=True)
+            for i in range(self.max_workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, user_id: int, caption: str, source_path: str) -> UploadJob:
+        """Encolar una subida y devolver su estado inicial"""
+        with self._lock:
+            job = UploadJob(next(self._ids), user_id, caption, source_path)
+            self._jobs[job.id] = job
+            snapshot = replace(job)
+        self._queue.put(job.id)
+        self._publish(snapshot)
+        return snapshot
+
+    def cancel(self, job_id: int) -> bool:
+        """Pedir la cancelación; False si la subida ya terminó o está guardando el post"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job or job.finished or job.state == UPLOAD_SAVING:
+                return False
+            self._cancelled.add(job_id)
+            if job.state != UPLOAD_QUEUED:
+                # El hilo la verá en el próximo aviso de progreso
+                return True
+            job.state = UPLOAD_CANCELLED
+            snapshot = replace(job)
+        self._publish(snapshot)
+        return True
+
+    def jobs_for(self, user_id: int) -> List[UploadJob]:
+        """Subidas del usuario en esta sesión, de la más vieja a la más nueva"""
+        with self._lock:
+            return [replace(job) for job in self._jobs.values() if job.user_id == user_id]
+
+    def clear_finished(self, user_id: int):
+        with self._lock:
+            for job_id in [job.id for job in self._jobs.values()
+                           if job.user_id == user_id and job.finished]:
+                del self._jobs[job_id]
+                self._cancelled.discard(job_id)
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if not job.finished)
+
+    def _update(self, job_id: int, **changes):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            for name, value in changes.items():
+                setattr(job, name, value)
+            snapshot = replace(job)
+        self._publish(snapshot)
+
+    def _publish(self, job: UploadJob):
+        self.db_manager.events.publish(upload_topic(job.user_id), job)
+
+    def _process(self, job_id: int):
+        # Pillow se importa con la primera subida, no al arrancar la app
+        from utils.image_pipeline import ingest_image
+
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.state != UPLOAD_QUEUED:
+                return  # Cancelada antes de empezar
+            job.state = UPLOAD_PROCESSING
+            job_data = replace(job)
+        self._publish(job_data)
+
+        def on_progress(fraction: float):
+            with self._lock:
+                if job_id in self._cancelled:
+                    raise UploadCancelled()
+            self._update(job_id, progress=fraction * UPLOAD_IMAGE_SHARE)
+
+        try:
+            if job_data.source_path.startswith("http"):
+                # URL de muestra: no hay nada que guardar localmente
+                image_url, renditions = job_data.source_path, {}
+            else:
+                renditions = ingest_image(job_data.source_path, self.db_manager.store_blob,
+                                          progress=on_progress)
+                image_url = renditions["full"].path
+            # Chequear y pasar a "guardando" juntos: cancel() no puede colarse entre medio
+            with self._lock:
+                if job_id in self._cancelled:
+                    raise UploadCancelled()
+                job = self._jobs[job_id]
+                job.state = UPLOAD_SAVING
+                snapshot = replace(job)
+            self._publish(snapshot)
+            post_id = self.db_manager.create_post(
+                Post(user_id=job_data.user_id, caption=job_data.caption, image_url=image_url),
+                renditions
+            )
+        except UploadCancelled:
+            self._update(job_id, state=UPLOAD_CANCELLED)
+            return
+        except Exception as e:
+            print(f"Error al procesar subida {job_id}: {e}")
+            self._update(job_id, state=UPLOAD_FAILED, error=str(e))
+            return
+
+        if post_id:
+            self._update(job_id, state=UPLOAD_DONE, progress=1.0, post_id=post_id)
+        else:
+            self._update(job_id, state=UPLOAD_FAILED, error="No se pudo crear la publicación")
+
+    def _run(self):
+        while True:
+            job_id = self._queue.get()
+            if job_id is None:
+                break
+            try:
+                self._process(job_id)
+            except Exception as e:
+                print(f"Error en el hilo de subidas: {e}")
+
+    def close(self):
+        """Cancelar lo que sigue en cola y esperar a las subidas en proceso"""
+        if self._stopped:
+            return
+        self._stopped = True
+        with self._lock:
+            waiting = [job.id for job in self._jobs.values() if job.state == UPLOAD_QUEUED]
+        for job_id in waiting:
+            self.cancel(job_id)
+        for _ in self._workers:
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join(timeout=5)
@@ -0,0 +1,269 @@
+"""Búsqueda de lugares del mapa en memoria.
+
+Índice invertido palabra → {lugar: peso} armado una sola vez al cargar los
+lugares. Las palabras se pliegan igual que en la búsqueda FTS5 ("basquet"
+encuentra "básquet"), la última palabra de la consulta se busca por prefijo y,
+si una palabra no aparece, se prueban las del vocabulario a una o dos
+ediciones de distancia, encontradas por trigramas.
+"""
+import bisect
+import heapq
+import math
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from database.search import parse_query, tokenize
+
+# Peso de cada campo en la relevancia
+VENUE_FIELD_WEIGHTS = {
+    "name": 3.0,
+    "sports": 2.0,
+    "category": 2.0,
+    "address": 1.0,
+    "description": 0.5,
+}
+
+# Del campo más pesado al más liviano: el primer peso que recibe un lugar para una palabra es el mayor
+_FIELDS_BY_WEIGHT = sorted(VENUE_FIELD_WEIGHTS.items(), key=lambda item: -item[1])
+
+# Factor de la relevancia según cómo coincidió la palabra
+EXACT_MATCH = 1.0
+PREFIX_MATCH = 0.7
+FUZZY_MATCH = 0.4
+
+# Palabras del vocabulario (las de más lugares) que se prueban para un prefijo
+PREFIX_EXPANSIONS = 64
+
+# Palabras con al menos esta cantidad de lugares guardan su lista ya ordenada por
+# peso y rating (ver _ranked_postings); las más chicas se ordenan al consultarlas
+RANKED_POSTINGS_MIN = 256
+
+# Palabras más cortas que esto no se corrigen: a una edición hay demasiadas
+FUZZY_MIN_LENGTH = 4
+
+# Desde este largo se admiten dos ediciones en lugar de una
+FUZZY_TWO_EDITS_LENGTH = 8
+
+
+# Categorías, deportes y descripciones se repiten entre lugares: tokenizar una vez cada texto
+_field_tokens = lru_cache(maxsize=4096)(lambda text: tuple(tokenize(text)))
+
+
+def _trigrams(token: str) -> set:
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """Distancia de edición con trasposiciones ("jnuiors" → "juniors" es una),
+    o max_distance + 1 si la supera"""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    before_previous = None
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b))
+            if before_previous and j > 1 and char_a == b[j - 2] and a[i - 2] == char_b:
+                cost = min(cost, before_previous[j - 2] + 1)
+            current.append(cost)
+        if min(current) > max_distance:
+            return max_distance + 1
+        before_previous, previous = previous, current
+    return previous[-1]
+
+
+class VenueSearchIndex:
+    """Índice invertido de lugares con prefijos y tolerancia a errores.
+
+    La relevancia de un lugar es la suma, por palabra de la consulta, del
+    mejor IDF × peso del campo × factor de coincidencia; todas las palabras
+    tienen que coincidir. A igual relevancia se ordena por rating.
+    """
+
+    def __init__(self, venues: Iterable[Dict[str, Any]]):
+        # palabra -> {id del lugar: mayor peso de campo en que aparece}
+        self.postings: Dict[str, Dict[int, float]] = {}
+        self.ratings: Dict[int, float] = {}
+        for venue in venues:
+            self.add(venue)
+        self._vocabulary: Optional[List[str]] = None
+        self._trigram_index: Optional[Dict[str, List[str]]] = None
+        self._ranked: Dict[str, List[Tuple[float, float, int]]] = {}
+
+    def add(self, venue: Dict[str, Any]):
+        venue_id = venue["id"]
+        self.ratings[venue_id] = venue.get("rating") or 0.0
+        postings = self.postings
+        for field, weight in _FIELDS_BY_WEIGHT:
+            value = venue.get(field)
+            if not value:
+                continue
+            text = " ".join(value) if isinstance(value, list) else str(value)
+            for token in _field_tokens(text):
+                venues = postings.get(token)
+                if venues is None:
+                    postings[token] = {venue_id: weight}
+                else:
+                    venues.setdefault(venue_id, weight)
+        self._vocabulary = None
+        self._trigram_index = None
+        self._ranked = {}
+
+    def __len__(self):
+        return len(self.ratings)
+
+    @property
+    def vocabulary(self) -> List[str]:
+        """Palabras ordenadas, para buscar prefijos con bisect"""
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self.postings)
+        return self._vocabulary
+
+    @property
+    def trigram_index(self) -> Dict[str, List[str]]:
+        """Trigrama -> palabras del vocabulario que lo contienen (se arma con la primera corrección)"""
+        if self._trigram_index is None:
+            index: Dict[str, List[str]] = {}
+            for token in self.postings:
+                if len(token) >= FUZZY_MIN_LENGTH - 1:
+                    for trigram in _trigrams(token):
+                        index.setdefault(trigram, []).append(token)
+            self._trigram_index = index
+        return self._trigram_index
+
+    def _idf(self, token: str) -> float:
+        return math.log(1 + len(self.ratings) / len(self.postings[token]))
+
+    def _ranked_postings(self, token: str) -> List[Tuple[float, float, int]]:
+        """(peso, rating, id) de la palabra, de mayor a menor"""
+        ranked = self._ranked.get(token)
+        if ranked is None:
+            ranked = sorted(((weight, self.ratings[venue_id], venue_id)
+                             for venue_id, weight in self.postings[token].items()), reverse=True)
+            if len(ranked) >= RANKED_POSTINGS_MIN:
+                self._ranked[token] = ranked
+        return ranked
+
+    def _prefix_matches(self, term: str) -> List[str]:
+        vocabulary = self.vocabulary
+        start = bisect.bisect_left(vocabulary, term)
+        end = bisect.bisect_left(vocabulary, term + "\uffff", start)
+        if end - start <= PREFIX_EXPANSIONS:
+            return vocabulary[start:end]
+        return heapq.nlargest(PREFIX_EXPANSIONS, vocabulary[start:end],
+                              key=lambda token: len(self.postings[token]))
+
+    def _fuzzy_matches(self, term: str) -> List[str]:
+        if len(term) < FUZZY_MIN_LENGTH:
+            return []
+        max_edits = 2 if len(term) >= FUZZY_TWO_EDITS_LENGTH else 1
+        term_trigrams = _trigrams(term)
+        # Cada edición cambia a lo sumo 4 trigramas (3, o 4 si es una trasposición)
+        min_shared = len(term_trigrams) - 4 * max_edits
+        shared: Dict[str, int] = {}
+        for trigram in term_trigrams:
+            for token in self.trigram_index.get(trigram, ()):
+                shared[token] = shared.get(token, 0) + 1
+        return [token for token, count in shared.items()
+                if count >= min_shared and edit_distance(term, token, max_edits) <= max_edits]
+
+    def expand_term(self, term: str, prefix: bool) -> List[Tuple[str, float]]:
+        """Palabras del vocabulario que cubren el término, con su factor de coincidencia"""
+        matches = []
+        if term in self.postings:
+            matches.append((term, EXACT_MATCH))
+        if prefix:
+            matches.extend((token, PREFIX_MATCH) for token in self._prefix_matches(term) if token != term)
+        if not matches:
+            matches = [(token, FUZZY_MATCH) for token in self._fuzzy_matches(term)]
+        return matches
+
+    def search(self, text: str, limit: Optional[int] = None,
+               accept: Optional[Callable[[int], bool]] = None) -> List[Tuple[float, int]]:
+        """(relevancia, id) de los lugares que coinciden, del más relevante al menos.
+
+        accept filtra ids (p. ej. por categoría) antes de ordenar.
+        """
+        query = parse_query(text)
+        if query is None:
+            return []
+        expansions = []
+        for position, term in enumerate(query.terms):
+            matches = self.expand_term(term, query.prefix and position == len(query.terms) - 1)
+            if not matches:
+                return []
+            expansions.append(matches)
+
+        if len(expansions) == 1 and limit is not None:
+            return self._top_single_term(expansions[0], limit, accept)
+
+        # Intersección empezando por el término con menos lugares
+        expansions.sort(key=lambda matches: sum(len(self.postings[token]) for token, _ in matches))
+        scores: Optional[Dict[int, float]] = None
+        for matches in expansions:
+            term_scores: Dict[int, float] = {}
+            for token, quality in matches:
+                factor = quality * self._idf(token)
+                postings = self.postings[token]
+                if scores is None:
+                    candidates = postings.items()
+                elif len(scores) < len(postings):
+                    # Recorrer la lista más corta
+                    candidates = ((venue_id, postings[venue_id]) for venue_id in scores if venue_id in postings)
+                else:
+                    candidates = ((venue_id, weight) for venue_id, weight in postings.items() if venue_id in scores)
+                for venue_id, weight in candidates:
+                    score = factor * weight
+                    if score > term_scores.get(venue_id, 0.0):
+                        term_scores[venue_id] = score
+            if scores is None:
+                scores = term_scores if accept is None else \
+                    {venue_id: score for venue_id, score in term_scores.items() if accept(venue_id)}
+            else:
+                scores = {venue_id: scores[venue_id] + score for venue_id, score in term_scores.items()}
+            if not scores:
+                return []
+
+        def rank(item):
+            return item[1], self.ratings[item[0]]
+        if limit is None:
+            ranked = sorted(scores.items(), key=rank, reverse=True)
+        else:
+            ranked = heapq.nlargest(limit, scores.items(), key=rank)
+        return [(score, venue_id) for venue_id, score in ranked]
+
+    def _top_single_term(self, matches: List[Tuple[str, float]], limit: int,
+                         accept: Optional[Callable[[int], bool]]) -> List[Tuple[float, int]]:
+        """Los limit mejores de una sola palabra sin puntuar todos sus lugares.
+
+        Mezcla las listas ordenadas de cada palabra del vocabulario que la cubre:
+        la primera vez que sale un lugar es con su mejor relevancia y se corta
+        al juntar limit lugares (una búsqueda de 2 letras no recorre 100k).
+        """
+        lists = []
+        heap = []
+        for token, quality in matches:
+            ranked = self._ranked_postings(token)
+            factor = quality * self._idf(token)
+            weight, rating, venue_id = ranked[0]
+            heap.append((-factor * weight, -rating, len(lists), 0))
+            lists.append((ranked, factor))
+        heapq.heapify(heap)
+
+        results = []
+        seen = set()
+        while heap and len(results) < limit:
+            neg_score, _, list_index, position = heapq.heappop(heap)
+            ranked, factor = lists[list_index]
+            venue_id = ranked[position][2]
+            if venue_id not in seen:
+                seen.add(venue_id)
+                if accept is None or accept(venue_id):
+                    results.append((-neg_score, venue_id))
+            position += 1
+            if position < len(ranked):
+                weight, rating, _ = ranked[position]
+                heapq.heappush(heap, (-factor * weight, -rating, list_index, position))
+        return results
@@ -0,0 +1,159 @@
+"""Lugares deportivos del mapa: formato de archivo, importador y lectura desde SQLite.
+
+Importar un archivo JSON o CSV (desde la raíz del repositorio):
+    python -m database.venues lugares.csv [ruta.db]
+
+JSON: lista de objetos como los de data/venues_buenos_aires.json.
+CSV: columnas id, name, category, sports (separados por "|"), address, lat,
+lng, description, rating, price_range, contact, website; las columnas extra
+se guardan tal cual.
+"""
+import csv
+import json
+import os
+import sys
+from typing import Any, Dict, Iterable, Iterator, List
+
+# Lugares incluidos con la app; se cargan en la base con la migración
+VENUES_SEED_PATH = os.path.join(os.path.dirname(__file__), "data", "venues_buenos_aires.json")
+
+# Filas por executemany al importar
+VENUE_IMPORT_BATCH = 5000
+
+# Campos con columna propia; el resto va como JSON en venues.extra
+VENUE_COLUMNS = ("id", "name", "category", "address", "lat", "lng", "description",
+                 "rating", "price_range", "contact", "website")
+
+_COLUMN_DEFAULTS = {"address": "", "description": ""}
+
+VENUES_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS venues (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        category TEXT NOT NULL,
+        address TEXT NOT NULL DEFAULT '',
+        lat REAL NOT NULL,
+        lng REAL NOT NULL,
+        description TEXT NOT NULL DEFAULT '',
+        rating REAL,
+        price_range TEXT,
+        contact TEXT,
+        website TEXT,
+        extra TEXT
+    )
+    ''',
+    "CREATE INDEX IF NOT EXISTS idx_venues_category ON venues (category)",
+    '''
+    CREATE TABLE IF NOT EXISTS venue_sports (
+        sport TEXT NOT NULL,
+        venue_id INTEGER NOT NULL,
+        position INTEGER NOT NULL DEFAULT 0,  -- orden del deporte en la lista del lugar
+        PRIMARY KEY (sport, venue_id)
+    ) WITHOUT ROWID
+    ''',
+    "CREATE INDEX IF NOT EXISTS idx_venue_sports_venue ON venue_sports (venue_id, position)",
+]
+
+
+def load_venues_file(path: str) -> Iterator[Dict[str, Any]]:
+    """Leer lugares de un archivo .json o .csv en el formato de MapDataManager"""
+    if path.lower().endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                yield _venue_from_csv(row)
+    else:
+        with open(path, encoding="utf-8") as f:
+            yield from json.load(f)
+
+
+def _venue_from_csv(row: Dict[str, str]) -> Dict[str, Any]:
+    venue = {key: value for key, value in row.items() if key not in ("lat", "lng", "sports") and value != ""}
+    venue["id"] = int(row["id"])
+    venue["sports"] = [sport for sport in (row.get("sports") or "").split("|") if sport]
+    venue["coordinates"] = {"lat": float(row["lat"]), "lng": float(row["lng"])}
+    if "rating" in venue:
+        venue["rating"] = float(venue["rating"])
+    return venue
+
+
+def _venue_row(venue: Dict[str, Any]) -> tuple:
+    values = {**venue, "lat": venue["coordinates"]["lat"], "lng": venue["coordinates"]["lng"]}
+    extra = {key: value for key, value in venue.items()
+             if key not in VENUE_COLUMNS and key not in ("coordinates", "sports")}
+    return (*(values.get(column, _COLUMN_DEFAULTS.get(column)) for column in VENUE_COLUMNS),
+            json.dumps(extra, ensure_ascii=False) if extra else None)
+
+
+def import_venues(cursor, venues: Iterable[Dict[str, Any]], batch_size: int = VENUE_IMPORT_BATCH) -> int:
+    """Insertar o reemplazar lugares por lotes; devuelve cuántos se importaron"""
+    imported = 0
+    batch: List[Dict[str, Any]] = []
+    for venue in venues:
+        batch.append(venue)
+        if len(batch) >= batch_size:
+            imported += _import_batch(cursor, batch)
+            batch = []
+    if batch:
+        imported += _import_batch(cursor, batch)
+    return imported
+
+
+def _import_batch(cursor, batch: List[Dict[str, Any]]) -> int:
+    placeholders = ", ".join("?" * (len(VENUE_COLUMNS) + 1))
+    cursor.executemany(f'''
+        INSERT OR REPLACE INTO venues ({", ".join(VENUE_COLUMNS)}, extra) VALUES ({placeholders})
+    ''', [_venue_row(venue) for venue in batch])
+    cursor.executemany("DELETE FROM venue_sports WHERE venue_id = ?", [(venue["id"],) for venue in batch])
+    cursor.executemany(
+        "INSERT OR IGNORE INTO venue_sports (sport, venue_id, position) VALUES (?, ?, ?)",
+        [(sport, venue["id"], position)
+         for venue in batch for position, sport in enumerate(venue.get("sports", []))]
+    )
+    return len(batch)
+
+
+def seed_venues(cursor):
+    """Paso de migración: cargar los lugares incluidos con la app"""
+    import_venues(cursor, load_venues_file(VENUES_SEED_PATH))
+
+
+def venue_from_row(row, sports: List[str]) -> Dict[str, Any]:
+    """Fila de venues al formato de diccionario que usa el mapa"""
+    venue = {
+        "id": row["id"],
+        "name": row["name"],
+        "category": row["category"],
+        "sports": sports,
+        "address": row["address"],
+        "coordinates": {"lat": row["lat"], "lng": row["lng"]},
+        "description": row["description"],
+        "rating": row["rating"],
+        "price_range": row["price_range"],
+    }
+    for column in ("contact", "website"):
+        if row[column] is not None:
+            venue[column] = row[column]
+    if row["extra"]:
+        venue.update(json.loads(row["extra"]))
+    return venue
+
+
+def main(argv=None) -> int:
+    from database.database_manager import DatabaseManager
+
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print("Uso: python -m database.venues lugares.json|lugares.csv [ruta.db]")
+        return 2
+    db = DatabaseManager(argv[1] if len(argv) > 1 else "teamup.db")
+    try:
+        imported = db.import_venues(load_venues_file(argv[0]))
+    finally:
+        db.close()
+    print(f"Lugares importados: {imported}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+import threading
+import time
+from typing import Dict, Iterable, Tuple
+
+from database.notifications import notify_post_owner, retract_post_notification
+
+
+class LikeWriteBehindQueue:
+    """Cola write-behind para likes.
+
+    Los toggles se acumulan en memoria y se combinan por (usuario, post): dos
+    toggles dentro de la misma ventana se anulan. Cada ``flush_interval``
+    segundos (o al llegar a ``max_pending``) los cambios netos se escriben en
+    una sola transacción con executemany, junto con sus notificaciones agrupadas.
+    Mientras tanto, las lecturas pasan por ``is_liked``/``overlay`` para que la
+    sesión que escribió vea sus propios cambios.
+    """
+
+    def __init__(self, db_manager, flush_interval: float = 0.05, max_pending: int = 5000):
+        self.db_manager = db_manager
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        # (user_id, post_id) -> (estado persistido, estado deseado)
+        self._pending: Dict[Tuple[int, int], Tuple[bool, bool]] = {}
+        # Lote que se está escribiendo: ya no está pendiente pero aún no se confirmó
+        self._in_flight: Dict[Tuple[int, int], Tuple[bool, bool]] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self.flushes = 0
+        self._worker = threading.Thread(target=self._run, name="like-write-behind", daemon=True)
+        self._worker.start()
+
+    def _persisted_state(self, user_id: int, post_id: int) -> bool:
+        conn = self.db_manager.get_connection()
+        row = conn.execute(
+            'SELECT 1 FROM likes WHERE user_id = ? AND post_id = ?', (user_id, post_id)
+        ).fetchone()
+        conn.close()
+        return row is not None
+
+    def _known_state(self, key):
+        """Estado deseado en memoria (pendiente o en escritura) o None; requiere _lock"""
+        entry = self._pending.get(key) or self._in_flight.get(key)
+        return entry[1] if entry else None
+
+    def toggle(self, user_id: int, post_id: int) -> bool:
+        """Encolar un toggle y devolver el nuevo estado (like o no)"""
+        key = (user_id, post_id)
+        with self._lock:
+            known = self._known_state(key)
+        persisted = known if known is not None else self._persisted_state(user_id, post_id)
+        with self._lock:
+            entry = self._pending.get(key)
+            if entry is None:
+                known = self._known_state(key)
+                base = known if known is not None else persisted
+                entry = (base, base)
+            desired = not entry[1]
+            if desired == entry[0]:
+                # Vuelve al estado persistido: no hay nada que escribir
+                self._pending.pop(key, None)
+            else:
+                self._pending[key] = (entry[0], desired)
+            pending_count = len(self._pending)
+
+        if pending_count >= self.max_pending:
+            self.flush()
+        else:
+            self._wakeup.set()
+        return desired
+
+    def is_liked(self, user_id: int, post_id: int) -> bool:
+        with self._lock:
+            known = self._known_state((user_id, post_id))
+        if known is not None:
+            return known
+        return self._persisted_state(user_id, post_id)
+
+    def overlay(self, user_id: int, liked_post_ids: Iterable[int]) -> set:
+        """Aplicar los toggles pendientes del usuario a un conjunto leído de la BD"""
+        liked = set(liked_post_ids)
+        with self._lock:
+            changes = {**self._in_flight, **self._pending}
+            for (pending_user, post_id), (_, desired) in changes.items():
+                if pending_user != user_id:
+                    continue
+                if desired:
+                    liked.add(post_id)
+                else:
+                    liked.discard(post_id)
+        return liked
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self) -> int:
+        """Escribir los cambios netos pendientes; devuelve cuántos se aplicaron"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                self._in_flight = batch
+            if not batch:
+                return 0
+
+            likes = [key for key, (_, desired) in batch.items() if desired]
+            unlikes = [key for key, (_, desired) in batch.items() if not desired]
+            post_ids = [(post_id,) for post_id in {post_id for _, post_id in batch}]
+
+            conn = self.db_manager.get_connection()
+            try:
+                cursor = conn.cursor()
+                cursor.executemany('''
+                    DELETE FROM likes WHERE user_id = ? AND post_id = ?
+                ''', unlikes)
+                cursor.executemany('''
+                    INSERT OR IGNORE INTO likes (user_id, post_id) VALUES (?, ?)
+                ''', likes)
+                # Recalcular contadores de los posts tocados (usa idx_likes_post)
+                cursor.executemany('''
+                    UPDATE posts SET likes_count = (
+                        SELECT COUNT(*) FROM likes WHERE post_id = posts.id
+                    ) WHERE id = ?
+                ''', post_ids)
+                # Sumar o retirar cada like de la notificación agrupada del post
+                for user_id, post_id in unlikes:
+                    retract_post_notification(cursor, user_id, post_id, 'like')
+                for user_id, post_id in likes:
+                    notify_post_owner(cursor, user_id, post_id, 'like')
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                # Devolver el lote a la cola sin pisar toggles más nuevos
+                with self._lock:
+                    for key, entry in batch.items():
+                        self._pending.setdefault(key, entry)
+                    self._in_flight = {}
+                raise
+            finally:
+                conn.close()
+
+            with self._lock:
+                self._in_flight = {}
+
+            self.db_manager.publish_notification_changes()
+            self.flushes += 1
+            return len(batch)
+
+    def _run(self):
+        while not self._stopped:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            if self._stopped:
+                break
+            # Esperar la ventana para que lleguen más toggles a combinar
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error al escribir likes pendientes: {e}")
+
+    def close(self):
+        """Detener el hilo de fondo y escribir lo pendiente"""
+        self._stopped = True
+        self._wakeup.set()
+        self._worker.join(timeout=1)
+        self.flush()
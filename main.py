@@ -1,19 +1,13 @@
 import flet as ft
 from utils.theme_manager import ThemeManager
 from components.navigation import NavigationManager
-from pages.home_page import HomePage
-from pages.profile_page import ProfilePage
-from pages.edit_profile_page import EditProfilePage
-from pages.settings_page import SettingsPage
-from pages.map_page import MapPage
-from pages.login_page import LoginPage
-from pages.registration_page import RegistrationPage
-from pages.upload_page import UploadPage
 from database.models import User
-from pages.notifications_page import NotificationsPage
+from database.uploads import UPLOAD_DONE
+# Las páginas se importan al navegar a ellas por primera vez (ver PageRegistry)
+from pages.registry import PageRegistry
 
 try:
-    from database.init_db import initialize_database
+    from database.init_db import initialize_database, release_database
     DATABASE_AVAILABLE = True
 except ImportError as e:
     print(f"Error de importación de base de datos: {e}")
@@ -28,6 +22,7 @@ def main(page: ft.Page):
     db_manager = None
     if DATABASE_AVAILABLE:
         try:
+            # Compartido por todas las sesiones del proceso (un solo bus de eventos)
             db_manager = initialize_database()
             print("Base de datos inicializada exitosamente")
         except Exception as e:
@@ -50,27 +45,104 @@ def main(page: ft.Page):
 
     current_page.current = get_initial_page()
     
-    home_page = HomePage(theme_manager, db_manager)
-    profile_page = ProfilePage(theme_manager, db_manager)
-    edit_profile_page = EditProfilePage(theme_manager, db_manager, page)
-    settings_page = SettingsPage(theme_manager, db_manager)
-    map_page = MapPage(theme_manager, db_manager)
-    notifications_page = NotificationsPage(theme_manager, db_manager)
-    login_page = None
-    registration_page = None
-    upload_page = None
-    
     main_content = ft.Container(expand=True)
+    notification_subscription = None
+    upload_subscription = None
+    
+    # Cada página se importa y construye en su primera navegación: el arranque
+    # solo paga por la de login o registro
+    pages = PageRegistry()
+    
+    def with_user(page_instance):
+        """Páginas creadas después del login reciben el usuario al construirse"""
+        if current_user.current:
+            page_instance.set_user(current_user.current)
+        return page_instance
+    
+    def create_home_page(page_class):
+        from utils.image_cache import acquire_image_cache
+        # Avatares e imágenes remotas se sirven desde disco después de la primera
+        # descarga; la caché es una sola para todas las sesiones
+        return with_user(page_class(theme_manager, db_manager, acquire_image_cache()))
+    
+    def create_notifications_page(page_class):
+        notifications_page = page_class(theme_manager, db_manager)
+        notifications_page.live_updates = notification_subscription is not None
+        return notifications_page
+    
+    pages.register("home", "pages.home_page", "HomePage", create_home_page)
+    pages.register("profile", "pages.profile_page", "ProfilePage",
+                   lambda cls: with_user(cls(theme_manager, db_manager)))
+    pages.register("edit_profile", "pages.edit_profile_page", "EditProfilePage",
+                   lambda cls: with_user(cls(theme_manager, db_manager, page)))
+    pages.register("settings", "pages.settings_page", "SettingsPage",
+                   lambda cls: with_user(cls(theme_manager, db_manager)))
+    pages.register("map", "pages.map_page", "MapPage", lambda cls: cls(theme_manager, db_manager))
+    pages.register("notifications", "pages.notifications_page", "NotificationsPage",
+                   create_notifications_page)
+    pages.register("login", "pages.login_page", "LoginPage",
+                   lambda cls: cls(theme_manager, db_manager, handle_login, show_registration_page))
+    pages.register("registration", "pages.registration_page", "RegistrationPage",
+                   lambda cls: cls(theme_manager, db_manager, handle_registration, show_login_page))
+    pages.register("upload", "pages.upload_page", "UploadPage",
+                   lambda cls: cls(theme_manager, db_manager, current_user, None))
+    pages.register("search", "pages.search_page", "SearchPage", lambda cls: cls(theme_manager, db_manager))
+    
+    async def on_upload_event(job):
+        """Progreso de una subida en segundo plano; al terminar, el post entra al feed"""
+        upload_page = pages.loaded("upload")
+        if upload_page:
+            upload_page.apply_upload_event(job)
+        if job.state == UPLOAD_DONE and current_page.current == "home":
+            post = db_manager.get_post(job.post_id)
+            if post:
+                pages.get("home").add_post(post)
+    
+    async def on_notification_event(event):
+        """Aplicar en la UI los cambios de notificaciones del usuario actual"""
+        nav_manager.set_unread_count(event.unread_count)
+        notifications_page = pages.loaded("notifications")
+        if current_page.current == "notifications" and not notifications_page.apply_event(event):
+            main_content.content = notifications_page.create_content()
+            page.update()
+    
+    def subscribe_notifications(user: User):
+        nonlocal notification_subscription, upload_subscription
+        unsubscribe_notifications()
+        if db_manager:
+            # El evento llega en el hilo que escribió; run_task lo pasa al loop de Flet
+            notification_subscription = db_manager.subscribe_notifications(
+                user.id, lambda event: page.run_task(on_notification_event, event)
+            )
+            upload_subscription = db_manager.subscribe_uploads(
+                user.id, lambda job: page.run_task(on_upload_event, job)
+            )
+            if pages.loaded("notifications"):
+                pages.loaded("notifications").live_updates = True
+    
+    def unsubscribe_notifications():
+        nonlocal notification_subscription, upload_subscription
+        if notification_subscription:
+            notification_subscription()
+            notification_subscription = None
+        if upload_subscription:
+            upload_subscription()
+            upload_subscription = None
+        if pages.loaded("notifications"):
+            pages.loaded("notifications").live_updates = False
     
     def handle_login(user: User):
         current_user.current = user
         current_page.current = "home"
-        profile_page.set_user(user)
-        edit_profile_page.set_user(user)
-        settings_page.set_user(user)
+        subscribe_notifications(user)
+        # Las que todavía no existen reciben el usuario al construirse (with_user)
+        for name in ("home", "profile", "edit_profile", "settings"):
+            if pages.loaded(name):
+                pages.loaded(name).set_user(user)
         show_home_page()
     
     def handle_logout():
+        unsubscribe_notifications()
         current_user.current = None
         current_page.current = "login" if db_manager else "home"
         if db_manager:
@@ -79,29 +151,23 @@ def main(page: ft.Page):
             show_home_page()
     
     def show_login_page():
-        nonlocal login_page
         if not db_manager:
             show_home_page()
             return
             
         current_page.current = "login"
-        if not login_page:
-            login_page = LoginPage(theme_manager, db_manager, handle_login, show_registration_page)
-        main_content.content = login_page.create_content()
+        main_content.content = pages.get("login").create_content()
         update_theme()
         hide_navigation()
         page.update()
     
     def show_registration_page():
-        nonlocal registration_page
         if not db_manager:
             show_home_page()
             return
             
         current_page.current = "registration"
-        if not registration_page:
-            registration_page = RegistrationPage(theme_manager, db_manager, handle_registration, show_login_page)
-        main_content.content = registration_page.create_content()
+        main_content.content = pages.get("registration").create_content()
         update_theme()
         hide_navigation()
         page.update()
@@ -110,7 +176,6 @@ def main(page: ft.Page):
         show_login_page()
     
     def show_edit_profile_page(e=None):
-        nonlocal edit_profile_page
         if not current_user.current:
             return
         
@@ -123,6 +188,7 @@ def main(page: ft.Page):
             else:
                 show_home_page()
         
+        edit_profile_page = pages.get("edit_profile")
         edit_profile_page.on_back = go_back
         main_content.content = edit_profile_page.create_content()
         update_theme()
@@ -130,7 +196,6 @@ def main(page: ft.Page):
         page.update()
     
     def show_settings_page(e=None):
-        nonlocal settings_page
         if not current_user.current:
             return
         
@@ -143,6 +208,7 @@ def main(page: ft.Page):
             else:
                 show_home_page()
         
+        settings_page = pages.get("settings")
         settings_page.on_back = go_back
         main_content.content = settings_page.create_content()
         update_theme()
@@ -150,7 +216,6 @@ def main(page: ft.Page):
         page.update()
     
     def show_upload_page(e=None):
-        nonlocal upload_page
         if not current_user.current:
             return
             
@@ -165,11 +230,8 @@ def main(page: ft.Page):
             elif previous_page == "map":
                 show_map_page()
         
-        if not upload_page:
-            upload_page = UploadPage(theme_manager, db_manager, current_user, upload_callback)
-        else:
-            upload_page.upload_callback = upload_callback
-        
+        upload_page = pages.get("upload")
+        upload_page.upload_callback = upload_callback
         main_content.content = upload_page.create_content()
         update_theme()
         hide_navigation()
@@ -177,13 +239,14 @@ def main(page: ft.Page):
     
     def show_home_page(e=None):
         current_page.current = "home"
-        main_content.content = home_page.create_content()
+        main_content.content = pages.get("home").create_content()
         update_theme()
         update_navigation()
         page.update()
     
     def show_profile_page(e=None):
         current_page.current = "profile"
+        profile_page = pages.get("profile")
         profile_page.page_callbacks = page_callbacks
         main_content.content = profile_page.create_content()
         update_theme()
@@ -192,6 +255,7 @@ def main(page: ft.Page):
     
     def show_map_page(e=None):
         current_page.current = "map"
+        map_page = pages.get("map")
         map_page.on_back = show_home_page
         main_content.content = map_page.create_content()
         update_theme()
@@ -215,6 +279,7 @@ def main(page: ft.Page):
             else:
                 show_home_page()
         
+        notifications_page = pages.get("notifications")
         notifications_page.set_user(current_user.current)
         notifications_page.on_back = go_back
         notifications_page.page_callbacks = page_callbacks
@@ -223,29 +288,36 @@ def main(page: ft.Page):
         hide_navigation()
         page.update()
     
+    def show_search_page(e=None):
+        if not current_user.current:
+            return
+        
+        previous_page = current_page.current
+        current_page.current = "search"
+        
+        def go_back():
+            if previous_page == "profile":
+                show_profile_page()
+            elif previous_page == "map":
+                show_map_page()
+            else:
+                show_home_page()
+        
+        search_page = pages.get("search")
+        search_page.on_back = go_back
+        main_content.content = search_page.create_content()
+        update_theme()
+        hide_navigation()
+        page.update()
+    
     def update_theme():
         colors = theme_manager.get_theme_colors()
         page.bgcolor = colors["page_bg"]
         phone_screen.bgcolor = colors["phone_bg"]
         
-        if current_page.current == "home":
-            home_page.update_theme()
-        elif current_page.current == "profile":
-            profile_page.update_theme()
-        elif current_page.current == "edit_profile":
-            edit_profile_page.update_theme()
-        elif current_page.current == "settings":
-            settings_page.update_theme()
-        elif current_page.current == "map":
-            map_page.update_theme()
-        elif current_page.current == "login" and login_page:
-            login_page.update_theme()
-        elif current_page.current == "registration" and registration_page:
-            registration_page.update_theme()
-        elif current_page.current == "upload" and upload_page:
-            upload_page.update_theme()
-        elif current_page.current == "notifications":
-            notifications_page.update_theme()
+        current = pages.loaded(current_page.current)
+        if current:
+            current.update_theme()
         
         page.update()
     
@@ -267,15 +339,13 @@ def main(page: ft.Page):
         "show_map": show_map_page,
         "show_upload": show_upload_page,
         "show_notifications": show_notifications_page,
+        "show_search": show_search_page,
         "show_edit_profile": show_edit_profile_page,
         "show_settings": show_settings_page,
         "update_theme": update_theme,
         "logout": handle_logout
     }
     
-    nav_manager = NavigationManager(theme_manager, page_callbacks, current_page)
-
-
     nav_manager = NavigationManager(theme_manager, page_callbacks, current_page)
 
     # Agregar método para obtener notificaciones no leídas
@@ -286,6 +356,26 @@ def main(page: ft.Page):
 
     nav_manager.get_unread_count = get_unread_count
     
+    def on_disconnect(e):
+        # Puede ser un corte pasajero: la sesión se reconecta y sigue usando
+        # sus suscripciones y el manager compartido
+        home_page = pages.loaded("home")
+        if home_page and home_page.image_cache:
+            home_page.image_cache.flush()
+    
+    def on_close(e):
+        """Fin definitivo de la sesión"""
+        unsubscribe_notifications()
+        if pages.loaded("home"):
+            from utils.image_cache import release_image_cache
+            release_image_cache()
+        # La última sesión en irse detiene la retención y cierra el pool
+        if db_manager:
+            release_database()
+    
+    page.on_disconnect = on_disconnect
+    page.on_close = on_close
+    
     app_bar = nav_manager.create_app_bar()
     bottom_bar = nav_manager.create_bottom_bar(page)
     
@@ -318,4 +408,5 @@ def main(page: ft.Page):
     else:
         show_home_page()
 
-ft.app(target=main)
+if __name__ == "__main__":
+    ft.app(target=main)
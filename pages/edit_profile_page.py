@@ -1,6 +1,7 @@
 import flet as ft
 from database.database_manager import DatabaseManager
 from database.models import User
+from utils.image_pipeline import AVATAR_RENDITIONS, ingest_image
 
 class EditProfilePage:
     def __init__(self, theme_manager, db_manager: DatabaseManager = None, page: ft.Page = None):
@@ -95,9 +96,17 @@ class EditProfilePage:
                 self.current_user.full_name = name_field.value
                 self.current_user.bio = bio_field.value
                 self.current_user.sport = sport_field.value
+                avatar_renditions = None
                 if self.selected_image_path:
-                    self.current_user.avatar_url = self.selected_image_path
-                self.db_manager.update_user(self.current_user)
+                    # El avatar pasa por el almacén de imágenes en lugar de guardar la ruta elegida
+                    try:
+                        avatar_renditions = ingest_image(
+                            self.selected_image_path, self.db_manager.store_blob, AVATAR_RENDITIONS
+                        )
+                        self.current_user.avatar_url = avatar_renditions["full"].path
+                    except Exception as ex:
+                        print(f"Error al procesar avatar: {ex}")
+                self.db_manager.update_user(self.current_user, avatar_renditions)
             
             if self.on_back:
                 self.on_back()
@@ -1,77 +1,179 @@
 import flet as ft
 from database.database_manager import DatabaseManager
+from components.control_cache import ControlCache
+from components.virtualized_list import VirtualizedList
+
+# Posts por página del feed, altura estimada de una tarjeta y máximo de
+# tarjetas vivas en la ventana del feed virtualizado
+FEED_PAGE_SIZE = 10
+FEED_CARD_EXTENT = 420
+FEED_MAX_LIVE_CARDS = 40
+FEED_CARD_CACHE_SIZE = 1000
+# Comentarios que muestra el diálogo de un post
+COMMENTS_DIALOG_LIMIT = 50
 
 class HomePage:
-    def __init__(self, theme_manager, db_manager: DatabaseManager = None):
+    def __init__(self, theme_manager, db_manager: DatabaseManager = None, image_cache=None):
         self.theme_manager = theme_manager
         self.db_manager = db_manager
+        # Caché en disco de avatares e imágenes remotas (utils.image_cache)
+        self.image_cache = image_cache
         self.content = None
+        self.current_user = None
         
         # Estado de interacciones (me gusta, guardados, etc.)
         self.liked_posts = set()
         self.saved_posts = set()
+        # Comentarios agregados en la sesión cuando no hay BD
         self.post_comments = {}
+        # Imagen original -> versión "feed" (la tarjeta la muestra a 200 px de alto)
+        self.feed_images = {}
+        
+        # Estado de la paginación del feed
+        self.feed_list = None
+        self.feed_cursor = None
+        self.feed_has_more = False
+        # Página siguiente leída por adelantado: (cursor, posts, cursor siguiente)
+        self.next_feed_page = None
+        
+        # Tarjetas ya construidas por post; se reutilizan al volver al inicio
+        self.card_cache = ControlCache(FEED_CARD_CACHE_SIZE)
+    
+    def set_user(self, user):
+        self.current_user = user
+        
+        # Likes y guardados de la sesión, cargados una sola vez al iniciar sesión
+        if user and self.db_manager:
+            self.liked_posts = self.db_manager.get_liked_post_ids(user.id)
+            self.saved_posts = self.db_manager.get_saved_post_ids(user.id)
+        else:
+            self.liked_posts = set()
+            self.saved_posts = set()
+        
+        # Las tarjetas cacheadas reflejan los likes del usuario anterior
+        self.card_cache.clear()
     
     def create_content(self):
         colors = self.theme_manager.get_theme_colors()
         
-        # Crear publicaciones de ejemplo
-        posts = self._create_sample_posts(colors)
-        
-        home_content = ft.Column(
-            controls=[
-                # Encabezado
-                ft.Container(
-                    bgcolor=colors["card_bg"],
-                    padding=20,
-                    margin=ft.margin.only(bottom=10),
-                    border_radius=15,
-                    content=ft.Column(
-                        controls=[
-                            ft.Text(
-                                "Inicio",
-                                size=28,
-                                weight=ft.FontWeight.BOLD,
-                                color=colors["text_primary"]
-                            ),
-                            ft.Text(
-                                "Descubre entrenamientos de tu comunidad",
-                                size=14,
-                                color=colors["text_secondary"]
-                            ),
-                        ]
-                    )
-                ),
-                
-                # Feed de publicaciones
-                ft.Container(
-                    bgcolor=colors["card_bg"],
-                    padding=15,
-                    border_radius=15,
-                    content=ft.Column(
-                        controls=posts,
-                        scroll=ft.ScrollMode.AUTO,
-                        spacing=15
-                    )
-                ),
-            ],
-            scroll=ft.ScrollMode.AUTO
+        header = ft.Container(
+            bgcolor=colors["card_bg"],
+            padding=20,
+            margin=ft.margin.only(bottom=10),
+            border_radius=15,
+            content=ft.Column(
+                controls=[
+                    ft.Text(
+                        "Inicio",
+                        size=28,
+                        weight=ft.FontWeight.BOLD,
+                        color=colors["text_primary"]
+                    ),
+                    ft.Text(
+                        "Descubre entrenamientos de tu comunidad",
+                        size=14,
+                        color=colors["text_secondary"]
+                    ),
+                ]
+            )
         )
         
-        self.content = ft.ListView(
-            expand=True,
-            spacing=0,
-            padding=10,
-            controls=[home_content]
+        # Feed virtualizado: posts de la base de datos (o ejemplos sin BD)
+        if self.db_manager:
+            self.feed_cursor = None
+            self.feed_has_more = True
+            self.next_feed_page = None
+            build_item = lambda post: self._create_feed_card(post, colors)
+            load_more = self._fetch_next_feed_page
+        else:
+            sample_posts = [self._sample_posts_data()]
+            build_item = lambda post_data: self._create_post_card(post_data, colors)
+            load_more = lambda: sample_posts.pop() if sample_posts else []
+        
+        self.feed_list = VirtualizedList(
+            build_item=build_item,
+            load_more=load_more,
+            item_extent=FEED_CARD_EXTENT,
+            chunk_size=FEED_PAGE_SIZE,
+            max_live_items=FEED_MAX_LIVE_CARDS,
+            header_controls=[header],
+            spacing=15,
+            # Con BD los posts se identifican por id (ver add_post)
+            item_key=(lambda post: post.id) if self.db_manager else None
         )
+        self.content = self.feed_list.reset()
         
         return self.content
     
-    def _create_sample_posts(self, colors):
-        """Crear publicaciones de ejemplo con botones de interacción"""
-        posts = []
+    def _fetch_next_feed_page(self):
+        """Traer la siguiente página del feed usando el cursor actual"""
+        if not self.feed_has_more:
+            return []
+        if self.next_feed_page and self.next_feed_page[0] == self.feed_cursor:
+            _, posts, self.feed_cursor = self.next_feed_page
+        else:
+            posts, self.feed_cursor = self.db_manager.get_posts_feed_page(self.feed_cursor, FEED_PAGE_SIZE)
+        self.next_feed_page = None
+        self.feed_has_more = self.feed_cursor is not None
         
-        sample_posts_data = [
+        # Versiones de las imágenes de toda la página en una consulta por lote; los
+        # likes y guardados ya están en los conjuntos de la sesión, y los
+        # comentarios se leen al abrir el diálogo de cada post
+        self.feed_images.update(self.db_manager.get_image_renditions((post.image_url for post in posts), "feed"))
+        
+        # Leer la página siguiente ahora y bajar sus imágenes mientras se mira esta
+        if self.image_cache and self.feed_has_more:
+            next_posts, next_cursor = self.db_manager.get_posts_feed_page(self.feed_cursor, FEED_PAGE_SIZE)
+            self.next_feed_page = (self.feed_cursor, next_posts, next_cursor)
+            self.image_cache.prefetch(url for post in next_posts for url in (post.image_url, post.user_avatar))
+        return posts
+    
+    def add_post(self, post):
+        """Mostrar arriba del feed un post recién publicado sin recargar la lista"""
+        if not self.feed_list or not self.db_manager:
+            return
+        self.feed_images.update(self.db_manager.get_image_renditions([post.image_url], "feed"))
+        self.feed_list.apply_changes(prepend=[post])
+    
+    def _refresh_feed_post(self, post_id):
+        """Releer un post del feed para que su tarjeta muestre los contadores actuales.
+
+        La tarjeta se reconstruye porque los contadores forman parte de su
+        versión en card_cache.
+        """
+        if not self.feed_list or not self.db_manager:
+            return
+        post = self.db_manager.get_post(post_id)
+        if post and any(item.id == post_id for item in self.feed_list.items):
+            self.feed_list.apply_changes(replace=[post])
+    
+    def _create_feed_card(self, post, colors):
+        return self.card_cache.get_or_build(
+            post.id,
+            # Los contadores no tocan updated_at, así que forman parte de la versión
+            (post.updated_at, post.likes_count, post.comments_count, self.theme_manager.get_current_theme()),
+            lambda: self._create_post_card(self._post_to_card_data(post), colors)
+        )
+    
+    def _image_src(self, url):
+        """Ruta local si la imagen remota ya está en caché; si no, la URL (y se descarga)"""
+        return self.image_cache.resolve(url) if self.image_cache else url
+    
+    def _post_to_card_data(self, post):
+        return {
+            "author": post.username,
+            "username": f"@{post.username}",
+            "avatar": post.user_avatar or "https://i.pravatar.cc/150?img=1",
+            "image": self.feed_images.get(post.image_url, post.image_url),
+            "caption": post.caption,
+            "likes": post.likes_count,
+            "comments": post.comments_count,
+            "post_id": post.id
+        }
+    
+    def _sample_posts_data(self):
+        """Datos de publicaciones de ejemplo cuando no hay base de datos"""
+        return [
             {
                 "author": "Carlos Martínez",
                 "username": "@carlos_fit",
@@ -103,156 +205,176 @@ class HomePage:
                 "post_id": 3
             },
         ]
+    
+    def _create_post_card(self, post_data, colors):
+        """Crear la tarjeta de una publicación con botones de interacción"""
+        post_id = post_data["post_id"]
+        is_liked = post_id in self.liked_posts
+        is_saved = post_id in self.saved_posts
         
-        for post_data in sample_posts_data:
-            post_id = post_data["post_id"]
-            is_liked = post_id in self.liked_posts
-            is_saved = post_id in self.saved_posts
-            
-            post_card = ft.Container(
-                bgcolor=colors["content_bg"],
-                padding=15,
-                border_radius=10,
-                border=ft.border.all(1, colors["divider_color"]),
-                content=ft.Column(
-                    controls=[
-                        # Encabezado del post
-                        ft.Row(
-                            controls=[
-                                ft.CircleAvatar(
-                                    content=ft.Image(src=post_data["avatar"]),
-                                    radius=20
-                                ),
-                                ft.Column(
-                                    controls=[
-                                        ft.Text(
-                                            post_data["author"],
-                                            size=14,
-                                            weight=ft.FontWeight.BOLD,
-                                            color=colors["text_primary"]
-                                        ),
-                                        ft.Text(
-                                            post_data["username"],
-                                            size=12,
-                                            color=colors["text_secondary"]
-                                        ),
-                                    ],
-                                    expand=True
-                                ),
-                                ft.IconButton(
-                                    icon=ft.Icons.MORE_VERT,
-                                    icon_color=colors["text_secondary"],
-                                    icon_size=20
-                                )
-                            ],
-                            alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
-                            vertical_alignment=ft.CrossAxisAlignment.CENTER
-                        ),
-                        
-                        ft.Container(height=10),
-                        
-                        # Imagen del post
-                        ft.Image(
-                            src=post_data["image"],
-                            height=200,
-                            fit=ft.ImageFit.COVER,
-                            border_radius=8
-                        ),
-                        
-                        ft.Container(height=10),
-                        
-                        # Descripción
-                        ft.Text(
-                            post_data["caption"],
-                            size=14,
-                            color=colors["text_primary"]
-                        ),
-                        
-                        ft.Container(height=10),
-                        
-                        # Estadísticas
-                        ft.Row(
-                            controls=[
-                                ft.Text(
-                                    f"❤️ {post_data['likes']} Me gusta",
-                                    size=12,
-                                    color=colors["text_secondary"]
-                                ),
-                                ft.Text(
-                                    f"💬 {post_data['comments']} Comentarios",
-                                    size=12,
-                                    color=colors["text_secondary"]
-                                ),
-                            ],
-                            spacing=20
-                        ),
-                        
-                        ft.Divider(color=colors["divider_color"]),
-                        
-                        # Botones de interacción
-                        ft.Row(
-                            controls=[
-                                ft.IconButton(
-                                    icon=ft.Icons.FAVORITE if is_liked else ft.Icons.FAVORITE_BORDER,
-                                    icon_color=ft.Colors.RED_500 if is_liked else colors["text_secondary"],
-                                    tooltip="Me gusta",
-                                    on_click=lambda e, pid=post_id: self.toggle_like(e, pid, colors)
-                                ),
-                                ft.IconButton(
-                                    icon=ft.Icons.COMMENT,
-                                    icon_color=colors["text_secondary"],
-                                    tooltip="Comentar",
-                                    on_click=lambda e, pid=post_id: self.show_comments(e, pid, colors)
-                                ),
-                                ft.IconButton(
-                                    icon=ft.Icons.BOOKMARK if is_saved else ft.Icons.BOOKMARK_BORDER,
-                                    icon_color=ft.Colors.BLUE_500 if is_saved else colors["text_secondary"],
-                                    tooltip="Guardar",
-                                    on_click=lambda e, pid=post_id: self.toggle_save(e, pid, colors)
-                                ),
-                                ft.IconButton(
-                                    icon=ft.Icons.SHARE,
-                                    icon_color=colors["text_secondary"],
-                                    tooltip="Compartir",
-                                    on_click=lambda e: self.share_post(e)
-                                ),
-                            ],
-                            alignment=ft.MainAxisAlignment.SPACE_AROUND
-                        ),
-                    ]
-                )
+        like_count_text = ft.Text(
+            f"❤️ {post_data['likes']} Me gusta",
+            size=12,
+            color=colors["text_secondary"],
+            data=post_data["likes"]
+        )
+        
+        post_card = ft.Container(
+            bgcolor=colors["content_bg"],
+            padding=15,
+            border_radius=10,
+            border=ft.border.all(1, colors["divider_color"]),
+            content=ft.Column(
+                controls=[
+                    # Encabezado del post
+                    ft.Row(
+                        controls=[
+                            ft.CircleAvatar(
+                                content=ft.Image(src=self._image_src(post_data["avatar"])),
+                                radius=20
+                            ),
+                            ft.Column(
+                                controls=[
+                                    ft.Text(
+                                        post_data["author"],
+                                        size=14,
+                                        weight=ft.FontWeight.BOLD,
+                                        color=colors["text_primary"]
+                                    ),
+                                    ft.Text(
+                                        post_data["username"],
+                                        size=12,
+                                        color=colors["text_secondary"]
+                                    ),
+                                ],
+                                expand=True
+                            ),
+                            ft.IconButton(
+                                icon=ft.Icons.MORE_VERT,
+                                icon_color=colors["text_secondary"],
+                                icon_size=20
+                            )
+                        ],
+                        alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
+                        vertical_alignment=ft.CrossAxisAlignment.CENTER
+                    ),
+                    
+                    ft.Container(height=10),
+                    
+                    # Imagen del post
+                    ft.Image(
+                        src=self._image_src(post_data["image"]),
+                        height=200,
+                        fit=ft.ImageFit.COVER,
+                        border_radius=8
+                    ),
+                    
+                    ft.Container(height=10),
+                    
+                    # Descripción
+                    ft.Text(
+                        post_data["caption"],
+                        size=14,
+                        color=colors["text_primary"]
+                    ),
+                    
+                    ft.Container(height=10),
+                    
+                    # Estadísticas
+                    ft.Row(
+                        controls=[
+                            like_count_text,
+                            ft.Text(
+                                f"💬 {post_data['comments']} Comentarios",
+                                size=12,
+                                color=colors["text_secondary"]
+                            ),
+                        ],
+                        spacing=20
+                    ),
+                    
+                    ft.Divider(color=colors["divider_color"]),
+                    
+                    # Botones de interacción
+                    ft.Row(
+                        controls=[
+                            ft.IconButton(
+                                icon=ft.Icons.FAVORITE if is_liked else ft.Icons.FAVORITE_BORDER,
+                                icon_color=ft.Colors.RED_500 if is_liked else colors["text_secondary"],
+                                tooltip="Me gusta",
+                                # El contador viaja con la tarjeta: se descarta junto con ella
+                                on_click=lambda e, pid=post_id: self.toggle_like(e, pid, colors, like_count_text)
+                            ),
+                            ft.IconButton(
+                                icon=ft.Icons.COMMENT,
+                                icon_color=colors["text_secondary"],
+                                tooltip="Comentar",
+                                on_click=lambda e, pid=post_id: self.show_comments(e, pid, colors)
+                            ),
+                            ft.IconButton(
+                                icon=ft.Icons.BOOKMARK if is_saved else ft.Icons.BOOKMARK_BORDER,
+                                icon_color=ft.Colors.BLUE_500 if is_saved else colors["text_secondary"],
+                                tooltip="Guardar",
+                                on_click=lambda e, pid=post_id: self.toggle_save(e, pid, colors)
+                            ),
+                            ft.IconButton(
+                                icon=ft.Icons.SHARE,
+                                icon_color=colors["text_secondary"],
+                                tooltip="Compartir",
+                                on_click=lambda e: self.share_post(e)
+                            ),
+                        ],
+                        alignment=ft.MainAxisAlignment.SPACE_AROUND
+                    ),
+                ]
             )
-            
-            posts.append(post_card)
+        )
         
-        return posts
+        return post_card
     
-    def toggle_like(self, e, post_id, colors):
+    def toggle_like(self, e, post_id, colors, like_count_text):
         """Alternar me gusta en una publicación"""
-        if post_id in self.liked_posts:
-            self.liked_posts.remove(post_id)
+        was_liked = post_id in self.liked_posts
+        if self.db_manager and self.current_user:
+            liked = self.db_manager.toggle_like(self.current_user.id, post_id)
         else:
+            liked = post_id not in self.liked_posts
+        
+        if liked:
             self.liked_posts.add(post_id)
+        else:
+            self.liked_posts.discard(post_id)
         
-        # Cambiar icono
-        if post_id in self.liked_posts:
+        # Cambiar icono y contador en el lugar, sin reconstruir el feed
+        if liked:
             e.control.icon = ft.Icons.FAVORITE
             e.control.icon_color = ft.Colors.RED_500
         else:
             e.control.icon = ft.Icons.FAVORITE_BORDER
             e.control.icon_color = colors["text_secondary"]
         
+        # Solo si cambió respecto de lo que mostraba la página: el estado local
+        # puede estar atrasado (p. ej. otra sesión del mismo usuario ya lo cambió)
+        if liked != was_liked:
+            like_count_text.data += 1 if liked else -1
+            like_count_text.value = f"❤️ {like_count_text.data} Me gusta"
+        
         e.page.update()
     
     def toggle_save(self, e, post_id, colors):
         """Alternar guardar una publicación"""
-        if post_id in self.saved_posts:
-            self.saved_posts.remove(post_id)
+        if self.db_manager and self.current_user:
+            saved = self.db_manager.toggle_save(self.current_user.id, post_id)
         else:
+            saved = post_id not in self.saved_posts
+        
+        if saved:
             self.saved_posts.add(post_id)
+        else:
+            self.saved_posts.discard(post_id)
         
         # Cambiar icono
-        if post_id in self.saved_posts:
+        if saved:
             e.control.icon = ft.Icons.BOOKMARK
             e.control.icon_color = ft.Colors.BLUE_500
         else:
@@ -263,6 +385,18 @@ class HomePage:
     
     def show_comments(self, e, post_id, colors):
         """Mostrar modal de comentarios"""
+        # Con BD se leen los comentarios del post al abrir; sin BD, los de la sesión
+        if self.db_manager:
+            post = self.db_manager.get_post(post_id)
+            comments = [
+                f"{c.username}: {c.content}"
+                for c in self.db_manager.get_post_comments(post_id, COMMENTS_DIALOG_LIMIT)
+            ]
+            total = post.comments_count if post else len(comments)
+        else:
+            comments = self.post_comments.get(post_id, [])
+            total = len(comments)
+        
         comment_field = ft.TextField(
             label="Escribe un comentario...",
             width=250,
@@ -270,35 +404,48 @@ class HomePage:
             border_color=colors["divider_color"]
         )
         
+        count_text = ft.Text(
+            f"Comentarios ({total})",
+            size=16,
+            weight=ft.FontWeight.BOLD,
+            color=colors["text_primary"],
+            data=total
+        )
+        
+        def comment_control(comment):
+            return ft.Container(
+                bgcolor=colors["content_bg"],
+                padding=10,
+                border_radius=8,
+                content=ft.Text(
+                    comment,
+                    size=12,
+                    color=colors["text_primary"]
+                )
+            )
+        
         def add_comment(e):
-            if comment_field.value:
-                if post_id not in self.post_comments:
-                    self.post_comments[post_id] = []
-                self.post_comments[post_id].append(comment_field.value)
-                comment_field.value = ""
-                e.page.update()
+            if not comment_field.value:
+                return
+            if self.db_manager and self.current_user:
+                if self.db_manager.create_comment(self.current_user.id, post_id, comment_field.value) is None:
+                    return
+                comment = f"{self.current_user.username}: {comment_field.value}"
+                self._refresh_feed_post(post_id)
+            else:
+                comment = comment_field.value
+                self.post_comments.setdefault(post_id, []).append(comment)
+            
+            count_text.data += 1
+            count_text.value = f"Comentarios ({count_text.data})"
+            comments_list.controls.append(comment_control(comment))
+            comment_field.value = ""
+            e.page.update()
         
         comments_list = ft.Column(
             controls=[
-                ft.Text(
-                    f"Comentarios ({len(self.post_comments.get(post_id, []))})",
-                    size=16,
-                    weight=ft.FontWeight.BOLD,
-                    color=colors["text_primary"]
-                ),
-                *[
-                    ft.Container(
-                        bgcolor=colors["content_bg"],
-                        padding=10,
-                        border_radius=8,
-                        content=ft.Text(
-                            comment,
-                            size=12,
-                            color=colors["text_primary"]
-                        )
-                    )
-                    for comment in self.post_comments.get(post_id, [])
-                ]
+                count_text,
+                *[comment_control(comment) for comment in comments]
             ],
             scroll=ft.ScrollMode.AUTO,
             spacing=10
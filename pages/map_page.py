@@ -1,16 +1,20 @@
+import asyncio
 import flet as ft
 import json
 import webbrowser
 import urllib.parse
-from typing import List, Dict, Any
-from database.map_data import MapDataManager
+from typing import List, Dict, Any, Optional
+from database.map_data import MAP_RESULTS_LIMIT, MapDataManager
+
+# Espera desde la última tecla antes de buscar: escribir rápido dispara una sola búsqueda
+SEARCH_DEBOUNCE_SECONDS = 0.25
 
 class MapPage:
     def __init__(self, theme_manager, db_manager=None):
         self.theme_manager = theme_manager
         self.db_manager = db_manager
         self.content = None
-        self.map_data_manager = MapDataManager()
+        self.map_data_manager = MapDataManager(db_manager)
         self.on_back = None
         
         # Estado del mapa
@@ -20,6 +24,8 @@ class MapPage:
         
         # Coordenadas de Buenos Aires
         self.buenos_aires_center = {"lat": -34.6118, "lng": -58.3960}
+        # Posición desde la que se miden las distancias (sin GPS, el centro de la ciudad)
+        self.user_position = dict(self.buenos_aires_center)
         
         # Controles de UI
         self.search_field = ft.TextField()
@@ -27,8 +33,18 @@ class MapPage:
         self.locations_list = ft.Column()
         self.map_container = ft.Container()
         
+        # Tarjetas ya construidas por id de lugar e ids mostrados, para cambiar solo lo que difiere
+        self._location_cards: Dict[int, ft.Control] = {}
+        self._shown_ids: Optional[List[int]] = None
+        # Búsqueda programada; cada refresco incrementa la generación y los anteriores se descartan
+        self._refresh_future = None
+        self._refresh_generation = 0
+        
     def create_content(self):
         colors = self.theme_manager.get_theme_colors()
+        locations = self._query_locations()
+        self._location_cards = {}
+        self._shown_ids = [location["id"] for location in locations]
         
         # Campo de búsqueda
         self.search_field = ft.TextField(
@@ -122,7 +138,7 @@ class MapPage:
                         size=14,
                         color=colors["text_primary"]
                     ),
-                    self._create_map_points_preview()
+                    self._create_map_points_preview(locations)
                 ],
                 horizontal_alignment=ft.CrossAxisAlignment.CENTER,
                 alignment=ft.MainAxisAlignment.CENTER
@@ -131,7 +147,7 @@ class MapPage:
         
         # Lista de ubicaciones
         self.locations_list = ft.Column(
-            controls=self._create_location_cards(),
+            controls=self._create_location_cards(locations),
             scroll=ft.ScrollMode.AUTO,
             spacing=10
         )
@@ -255,16 +271,21 @@ class MapPage:
         else:
             print("Callback de navegación no configurado")
         
-    def _create_map_points_preview(self):
+    def _query_locations(self) -> List[Dict[str, Any]]:
+        """Lugares a mostrar con el filtro y la búsqueda actuales"""
+        return self.map_data_manager.get_filtered_locations(
+            self.current_filter, self.search_query, origin=self.user_position, limit=MAP_RESULTS_LIMIT
+        )
+    
+    def _create_map_points_preview(self, locations: List[Dict[str, Any]]):
         """Crear vista previa de puntos en el mapa"""
         colors = self.theme_manager.get_theme_colors()
-        locations = self.map_data_manager.get_filtered_locations(self.current_filter, self.search_query)
         
         if not locations:
             return ft.Text("No se encontraron ubicaciones", color=colors["text_secondary"])
         
         points = []
-        for i, location in enumerate(locations[:]):  
+        for i, location in enumerate(locations):
             points.append(
                 ft.Container(
                     width=30,
@@ -284,114 +305,120 @@ class MapPage:
         return ft.Row(
             controls=points,
             alignment=ft.MainAxisAlignment.CENTER,
-            spacing=5
+            spacing=5,
+            wrap=True
         )
     
-    def _create_location_cards(self):
-        """Crear tarjetas de ubicaciones"""
+    def _create_location_cards(self, locations: List[Dict[str, Any]]):
+        """Tarjetas de los lugares, reutilizando las que ya estaban en pantalla"""
         colors = self.theme_manager.get_theme_colors()
-        locations = self.map_data_manager.get_filtered_locations(self.current_filter, self.search_query)
         
         if not locations:
+            self._location_cards = {}
             return [ft.Text("No se encontraron ubicaciones", color=colors["text_secondary"])]
         
-        cards = []
+        cards = {}
         for location in locations:
-            card = ft.Container(
-                bgcolor=colors["content_bg"],
-                padding=15,
-                border_radius=10,
-                border=ft.border.all(1, colors["divider_color"]),
-                content=ft.Column(
-                    controls=[
-                        ft.Row(
-                            controls=[
-                                ft.Icon(
-                                    self._get_category_icon(location["category"]),
-                                    color=self._get_category_color(location["category"]),
-                                    size=24
-                                ),
-                                ft.Column(
-                                    controls=[
-                                        ft.Text(
-                                            location["name"],
-                                            size=16,
-                                            weight=ft.FontWeight.BOLD,
-                                            color=colors["text_primary"]
-                                        ),
-                                        ft.Text(
-                                            location["address"],
-                                            size=12,
-                                            color=colors["text_secondary"]
-                                        ),
-                                    ],
-                                    expand=True
-                                ),
-                                ft.Container(
-                                    bgcolor=self._get_category_color(location["category"]),
-                                    padding=ft.padding.symmetric(horizontal=8, vertical=4),
-                                    border_radius=12,
-                                    content=ft.Text(
-                                        location["category"].title(),
-                                        size=10,
-                                        color=ft.Colors.WHITE,
-                                        weight=ft.FontWeight.BOLD
-                                    )
-                                )
-                            ]
-                        ),
-                        ft.Container(height=8),
-                        ft.Text(
-                            location["description"],
-                            size=12,
-                            color=colors["text_primary"]
-                        ),
-                        ft.Container(height=8),
-                        ft.Row(
-                            controls=[
-                                ft.Text(
-                                    f"⭐ {location['rating']}/5",
-                                    size=12,
-                                    color=colors["text_secondary"]
-                                ),
-                                ft.Text(
-                                    f"📍 {location['distance']}",
-                                    size=12,
-                                    color=colors["text_secondary"]
-                                ),
-                                ft.Text(
-                                    f"💰 {location['price_range']}",
-                                    size=12,
-                                    color=colors["text_secondary"]
-                                ),
-                            ],
-                            spacing=15
-                        ),
-                        ft.Container(height=8),
-                        ft.Row(
-                            controls=[
-                                ft.ElevatedButton(
-                                    "Ver detalles",
-                                    bgcolor=ft.Colors.RED_500,
+            card = self._location_cards.get(location["id"])
+            cards[location["id"]] = card or self._create_location_card(location, colors)
+        # Las que salieron de la lista se descartan
+        self._location_cards = cards
+        return list(cards.values())
+    
+    def _create_location_card(self, location: Dict[str, Any], colors):
+        """Crear la tarjeta de un lugar"""
+        return ft.Container(
+            bgcolor=colors["content_bg"],
+            padding=15,
+            border_radius=10,
+            border=ft.border.all(1, colors["divider_color"]),
+            content=ft.Column(
+                controls=[
+                    ft.Row(
+                        controls=[
+                            ft.Icon(
+                                self._get_category_icon(location["category"]),
+                                color=self._get_category_color(location["category"]),
+                                size=24
+                            ),
+                            ft.Column(
+                                controls=[
+                                    ft.Text(
+                                        location["name"],
+                                        size=16,
+                                        weight=ft.FontWeight.BOLD,
+                                        color=colors["text_primary"]
+                                    ),
+                                    ft.Text(
+                                        location["address"],
+                                        size=12,
+                                        color=colors["text_secondary"]
+                                    ),
+                                ],
+                                expand=True
+                            ),
+                            ft.Container(
+                                bgcolor=self._get_category_color(location["category"]),
+                                padding=ft.padding.symmetric(horizontal=8, vertical=4),
+                                border_radius=12,
+                                content=ft.Text(
+                                    location["category"].title(),
+                                    size=10,
                                     color=ft.Colors.WHITE,
-                                    on_click=lambda e, loc=location: self.show_location_details(loc)
-                                ),
-                                ft.ElevatedButton(
-                                    "Cómo llegar",
-                                    bgcolor=colors["card_bg"],
-                                    color=colors["text_primary"],
-                                    icon=ft.Icons.DIRECTIONS,
-                                    on_click=lambda e, loc=location: self.show_directions(loc)
-                                ),
-                            ],
-                            spacing=10
-                        )
-                    ]
-                )
+                                    weight=ft.FontWeight.BOLD
+                                )
+                            )
+                        ]
+                    ),
+                    ft.Container(height=8),
+                    ft.Text(
+                        location["description"],
+                        size=12,
+                        color=colors["text_primary"]
+                    ),
+                    ft.Container(height=8),
+                    ft.Row(
+                        controls=[
+                            ft.Text(
+                                f"⭐ {location['rating']}/5",
+                                size=12,
+                                color=colors["text_secondary"]
+                            ),
+                            ft.Text(
+                                f"📍 {location['distance']}",
+                                size=12,
+                                color=colors["text_secondary"]
+                            ),
+                            ft.Text(
+                                f"💰 {location['price_range']}",
+                                size=12,
+                                color=colors["text_secondary"]
+                            ),
+                        ],
+                        spacing=15
+                    ),
+                    ft.Container(height=8),
+                    ft.Row(
+                        controls=[
+                            ft.ElevatedButton(
+                                "Ver detalles",
+                                bgcolor=ft.Colors.RED_500,
+                                color=ft.Colors.WHITE,
+                                on_click=lambda e, loc=location: self.show_location_details(loc)
+                            ),
+                            ft.ElevatedButton(
+                                "Cómo llegar",
+                                bgcolor=colors["card_bg"],
+                                color=colors["text_primary"],
+                                icon=ft.Icons.DIRECTIONS,
+                                on_click=lambda e, loc=location: self.show_directions(loc)
+                            ),
+                        ],
+                        spacing=10
+                    )
+                ]
             )
-            cards.append(card)
-        
-        return cards
+        )
     
     def _get_category_icon(self, category):
         """Obtener icono según la categoría"""
@@ -418,34 +445,69 @@ class MapPage:
         return colors.get(category, ft.Colors.GREY_500)
     
     def on_search_change(self, e):
-        """Manejar cambio en búsqueda"""
+        """Manejar cambio en búsqueda (con espera: las teclas seguidas se juntan en una búsqueda)"""
         self.search_query = e.control.value
-        self.refresh_locations()
+        self.schedule_refresh()
     
     def on_filter_change(self, e):
         """Manejar cambio en filtro"""
         self.current_filter = e.control.value
-        self.refresh_locations()
+        self.schedule_refresh(delay=0)
     
     def filter_by_sport(self, sport):
         """Filtrar por deporte específico"""
         self.search_query = sport
         self.search_field.value = sport
         self.search_field.update()
-        self.refresh_locations()
+        self.schedule_refresh(delay=0)
+    
+    def schedule_refresh(self, delay: float = SEARCH_DEBOUNCE_SECONDS):
+        """Programar un refresco en el loop de Flet, cancelando el que estuviera pendiente"""
+        page = self.locations_list.page if self.locations_list else None
+        if page is None:
+            self.refresh_locations()
+            return
+        if self._refresh_future:
+            self._refresh_future.cancel()
+        self._refresh_generation += 1
+        self._refresh_future = page.run_task(self._refresh_after, self._refresh_generation, delay)
+    
+    async def _refresh_after(self, generation: int, delay: float):
+        if delay:
+            await asyncio.sleep(delay)
+        # La consulta corre en otro hilo para no trabar la UI mientras se escribe
+        locations = await asyncio.to_thread(self._query_locations)
+        if generation != self._refresh_generation:
+            return  # Llegó otra búsqueda mientras esta corría: su resultado ya no sirve
+        self._show_locations(locations)
     
     def refresh_locations(self):
-        """Refrescar lista de ubicaciones"""
+        """Refrescar lista de ubicaciones ahora mismo"""
+        if self._refresh_future:
+            self._refresh_future.cancel()
+            self._refresh_future = None
+        self._refresh_generation += 1
+        self._show_locations(self._query_locations())
+    
+    def _show_locations(self, locations: List[Dict[str, Any]]):
+        """Mostrar los lugares cambiando solo las tarjetas que entran o salen"""
+        ids = [location["id"] for location in locations]
+        if ids == self._shown_ids:
+            return
+        self._shown_ids = ids
+        
         if self.locations_list:
-            self.locations_list.controls = self._create_location_cards()
-            self.locations_list.update()
+            self.locations_list.controls = self._create_location_cards(locations)
+            if self.locations_list.page:
+                self.locations_list.update()
         
         if self.map_container:
             # Actualizar vista previa del mapa
             map_content = self.map_container.content
             if isinstance(map_content, ft.Column) and len(map_content.controls) > 4:
-                map_content.controls[4] = self._create_map_points_preview()
-                self.map_container.update()
+                map_content.controls[4] = self._create_map_points_preview(locations)
+                if self.map_container.page:
+                    self.map_container.update()
     
     def show_location_details(self, location):
         """Mostrar detalles de una ubicación - abrir sitio web""" 
@@ -524,8 +586,10 @@ class MapPage:
             self.map_container.border = ft.border.all(1, colors["divider_color"])
             self.map_container.update()
 
-        # Actualizar lista de ubicaciones
+        # Actualizar lista de ubicaciones (las tarjetas guardadas tienen los colores anteriores)
         if self.locations_list and self.locations_list.page:
+            self._location_cards = {}
+            self._shown_ids = None
             self.refresh_locations()
 
         if self.content.page:
@@ -1,6 +1,12 @@
 import flet as ft
 from datetime import datetime
 from database.models import Notification
+from components.control_cache import ControlCache
+from components.virtualized_list import VirtualizedList
+
+# Altura estimada de una tarjeta de notificación
+NOTIFICATION_CARD_EXTENT = 110
+NOTIFICATION_CARD_CACHE_SIZE = 200
 
 class NotificationsPage:
     def __init__(self, theme_manager, db_manager=None):
@@ -11,6 +17,11 @@ class NotificationsPage:
         self.notifications_list = None
         self.on_back = None
         self.page_callbacks = None
+        self.count_text = None
+        # True si la sesión está suscrita a los eventos de notificaciones (apply_event)
+        self.live_updates = False
+        # Tarjetas ya construidas por notificación; se reutilizan al volver a la ventana
+        self.card_cache = ControlCache(NOTIFICATION_CARD_CACHE_SIZE)
     
     def set_user(self, user):
         """Establecer el usuario actual"""
@@ -30,6 +41,12 @@ class NotificationsPage:
         if self.db_manager:
             notifications = self.db_manager.get_user_notifications(self.current_user.id)
         
+        self.count_text = ft.Text(
+            f"{len(notifications)} notificaciones",
+            size=14,
+            color=colors["text_secondary"]
+        )
+        
         # Header con botón de regresar
         header = ft.Container(
             bgcolor=colors["card_bg"],
@@ -52,11 +69,7 @@ class NotificationsPage:
                                 weight=ft.FontWeight.BOLD,
                                 color=colors["text_primary"]
                             ),
-                            ft.Text(
-                                f"{len(notifications)} notificaciones",
-                                size=14,
-                                color=colors["text_secondary"]
-                            ),
+                            self.count_text,
                         ],
                         expand=True
                     ),
@@ -71,145 +84,162 @@ class NotificationsPage:
             )
         )
         
-        # Lista de notificaciones
-        self.notifications_list = ft.Column(
-            controls=self._create_notification_cards(notifications),
-            spacing=10,
-            scroll=ft.ScrollMode.AUTO
-        )
-        
-        # Contenedor principal
-        main_content = ft.Column(
-            controls=[
-                header,
-                ft.Container(
-                    bgcolor=colors["card_bg"],
-                    padding=15,
-                    border_radius=15,
-                    content=self.notifications_list if notifications else ft.Container(
-                        padding=40,
-                        content=ft.Column(
-                            controls=[
-                                ft.Icon(
-                                    ft.Icons.NOTIFICATIONS_NONE,
-                                    size=80,
-                                    color=colors["text_secondary"]
-                                ),
-                                ft.Text(
-                                    "No tienes notificaciones",
-                                    size=18,
-                                    color=colors["text_secondary"],
-                                    text_align=ft.TextAlign.CENTER
-                                ),
-                            ],
-                            horizontal_alignment=ft.CrossAxisAlignment.CENTER,
-                            spacing=20
+        if not notifications:
+            self.notifications_list = None
+            self.content = ft.ListView(
+                expand=True,
+                spacing=0,
+                padding=10,
+                controls=[
+                    header,
+                    ft.Container(
+                        bgcolor=colors["card_bg"],
+                        padding=15,
+                        border_radius=15,
+                        content=ft.Container(
+                            padding=40,
+                            content=ft.Column(
+                                controls=[
+                                    ft.Icon(
+                                        ft.Icons.NOTIFICATIONS_NONE,
+                                        size=80,
+                                        color=colors["text_secondary"]
+                                    ),
+                                    ft.Text(
+                                        "No tienes notificaciones",
+                                        size=18,
+                                        color=colors["text_secondary"],
+                                        text_align=ft.TextAlign.CENTER
+                                    ),
+                                ],
+                                horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+                                spacing=20
+                            )
                         )
                     )
-                )
-            ],
-            scroll=ft.ScrollMode.AUTO
-        )
+                ]
+            )
+            return self.content
         
-        self.content = ft.ListView(
-            expand=True,
-            spacing=0,
-            padding=10,
-            controls=[main_content]
+        # Lista virtualizada: solo se construyen las tarjetas visibles
+        self.notifications_list = VirtualizedList(
+            build_item=self._cached_notification_card,
+            load_more=self._make_loader(notifications),
+            item_extent=NOTIFICATION_CARD_EXTENT,
+            header_controls=[header],
+            spacing=10,
+            item_key=lambda notification: notification.id
         )
+        self.content = self.notifications_list.reset()
         
         return self.content
     
-    def _create_notification_cards(self, notifications):
-        """Crear tarjetas de notificaciones"""
+    def _make_loader(self, notifications):
+        """Fuente de datos para la lista virtualizada (un único bloque)"""
+        pending = [notifications]
+        return lambda: pending.pop() if pending else []
+    
+    def _cached_notification_card(self, notification):
+        # La versión es la propia notificación: si cambió algún campo se reconstruye
+        return self.card_cache.get_or_build(
+            notification.id,
+            (notification, self.theme_manager.get_current_theme()),
+            lambda: self._create_notification_card(notification)
+        )
+    
+    def _create_notification_card(self, notification):
+        """Crear la tarjeta de una notificación"""
         colors = self.theme_manager.get_theme_colors()
-        cards = []
         
-        for notification in notifications:
-            # Icono según el tipo
-            icon, icon_color = self._get_notification_icon(notification.type)
-            
-            # Tiempo relativo
-            time_ago = self._get_time_ago(notification.created_at)
-            
-            card = ft.Container(
-                bgcolor=colors["content_bg"] if notification.is_read else colors["card_bg"],
-                padding=15,
-                border_radius=10,
-                border=ft.border.all(
-                    2 if not notification.is_read else 1,
-                    ft.Colors.RED_500 if not notification.is_read else colors["divider_color"]
-                ),
-                content=ft.Row(
-                    controls=[
-                        # Avatar del usuario
-                        ft.Container(
-                            content=ft.Image(
-                                src=notification.from_user_avatar or "https://i.pravatar.cc/150?img=1",
-                                width=50,
-                                height=50,
-                                fit=ft.ImageFit.COVER,
-                                border_radius=ft.border_radius.all(25)
-                            ),
-                        ),
-                        # Contenido
-                        ft.Column(
-                            controls=[
-                                ft.Row(
-                                    controls=[
-                                        ft.Text(
-                                            notification.from_username,
-                                            size=14,
-                                            weight=ft.FontWeight.BOLD,
-                                            color=colors["text_primary"]
-                                        ),
-                                        ft.Icon(icon, size=16, color=icon_color),
-                                    ],
-                                    spacing=5
-                                ),
-                                ft.Text(
-                                    notification.message,
-                                    size=13,
-                                    color=colors["text_secondary"]
-                                ),
-                                ft.Text(
-                                    time_ago,
-                                    size=11,
-                                    color=colors["text_secondary"],
-                                    italic=True
-                                ),
-                            ],
-                            spacing=3,
-                            expand=True
+        # Icono según el tipo
+        icon, icon_color = self._get_notification_icon(notification.type)
+        
+        # Tiempo relativo
+        time_ago = self._get_time_ago(notification.created_at)
+        
+        card = ft.Container(
+            bgcolor=colors["content_bg"] if notification.is_read else colors["card_bg"],
+            padding=15,
+            border_radius=10,
+            border=ft.border.all(
+                2 if not notification.is_read else 1,
+                ft.Colors.RED_500 if not notification.is_read else colors["divider_color"]
+            ),
+            content=ft.Row(
+                controls=[
+                    # Avatar del usuario
+                    ft.Container(
+                        content=ft.Image(
+                            src=notification.from_user_avatar or "https://i.pravatar.cc/150?img=1",
+                            width=50,
+                            height=50,
+                            fit=ft.ImageFit.COVER,
+                            border_radius=ft.border_radius.all(25)
                         ),
-                        # Botones de acción
-                        ft.Column(
-                            controls=[
-                                ft.IconButton(
-                                    icon=ft.Icons.CHECK if not notification.is_read else ft.Icons.CHECK_CIRCLE,
-                                    icon_size=20,
-                                    icon_color=ft.Colors.GREEN_500 if not notification.is_read else colors["text_secondary"],
-                                    tooltip="Marcar como leída" if not notification.is_read else "Leída",
-                                    on_click=lambda e, nid=notification.id: self.mark_as_read(nid)
-                                ),
-                                ft.IconButton(
-                                    icon=ft.Icons.DELETE_OUTLINE,
-                                    icon_size=20,
-                                    icon_color=ft.Colors.RED_400,
-                                    tooltip="Eliminar",
-                                    on_click=lambda e, nid=notification.id: self.delete_notification(nid)
-                                ),
-                            ],
-                            spacing=0
-                        )
-                    ],
-                    spacing=10
-                ),
-                on_click=lambda e, n=notification: self.handle_notification_click(n)
-            )
-            cards.append(card)
+                    ),
+                    # Contenido
+                    ft.Column(
+                        controls=[
+                            ft.Row(
+                                controls=[
+                                    ft.Text(
+                                        self._get_actors_text(notification),
+                                        size=14,
+                                        weight=ft.FontWeight.BOLD,
+                                        color=colors["text_primary"]
+                                    ),
+                                    ft.Icon(icon, size=16, color=icon_color),
+                                ],
+                                spacing=5
+                            ),
+                            ft.Text(
+                                notification.message,
+                                size=13,
+                                color=colors["text_secondary"]
+                            ),
+                            ft.Text(
+                                time_ago,
+                                size=11,
+                                color=colors["text_secondary"],
+                                italic=True
+                            ),
+                        ],
+                        spacing=3,
+                        expand=True
+                    ),
+                    # Botones de acción
+                    ft.Column(
+                        controls=[
+                            ft.IconButton(
+                                icon=ft.Icons.CHECK if not notification.is_read else ft.Icons.CHECK_CIRCLE,
+                                icon_size=20,
+                                icon_color=ft.Colors.GREEN_500 if not notification.is_read else colors["text_secondary"],
+                                tooltip="Marcar como leída" if not notification.is_read else "Leída",
+                                on_click=lambda e, nid=notification.id: self.mark_as_read(nid)
+                            ),
+                            ft.IconButton(
+                                icon=ft.Icons.DELETE_OUTLINE,
+                                icon_size=20,
+                                icon_color=ft.Colors.RED_400,
+                                tooltip="Eliminar",
+                                on_click=lambda e, nid=notification.id: self.delete_notification(nid)
+                            ),
+                        ],
+                        spacing=0
+                    )
+                ],
+                spacing=10
+            ),
+            on_click=lambda e, n=notification: self.handle_notification_click(n)
+        )
         
-        return cards
+        return card
+    
+    def _get_actors_text(self, notification):
+        """Nombre del último actor y cuántos más hay en el grupo ("ana y 241 más")"""
+        if notification.actor_count > 1:
+            return f"{notification.from_username} y {notification.actor_count - 1} más"
+        return notification.from_username
     
     def _get_notification_icon(self, notification_type):
         """Obtener icono según el tipo de notificación"""
@@ -253,26 +283,58 @@ class NotificationsPage:
         """Marcar notificación como leída"""
         if self.db_manager:
             self.db_manager.mark_notification_as_read(notification_id)
-            self.refresh_notifications()
+            if not self.live_updates:
+                self.refresh_notifications()
     
     def mark_all_as_read(self, e):
         """Marcar todas como leídas"""
         if self.db_manager and self.current_user:
             self.db_manager.mark_all_notifications_as_read(self.current_user.id)
-            self.refresh_notifications()
+            if not self.live_updates:
+                self.refresh_notifications()
     
     def delete_notification(self, notification_id):
         """Eliminar notificación"""
         if self.db_manager:
             self.db_manager.delete_notification(notification_id)
-            self.refresh_notifications()
+            if not self.live_updates:
+                self.refresh_notifications()
+    
+    def apply_event(self, event) -> bool:
+        """Aplicar un NotificationEvent a la lista sin recargarla.
+
+        Las notificaciones nuevas o con actividad nueva suben al principio; las
+        que solo cambiaron (p. ej. leídas) se reemplazan en su lugar. Devuelve
+        False si la página no tiene lista y hay que volver a crearla.
+        """
+        if not self.notifications_list:
+            return not event.upserted_ids
+        
+        known = {notification.id: notification for notification in self.notifications_list.items}
+        changed = self.db_manager.get_notifications_by_ids(event.upserted_ids)
+        bumped = [n for n in changed if n.id not in known or n.created_at != known[n.id].created_at]
+        in_place = [n for n in changed if n.id in known and n.created_at == known[n.id].created_at]
+        self.notifications_list.apply_changes(
+            prepend=bumped,
+            replace=in_place,
+            remove_keys=event.deleted_ids
+        )
+        
+        if not self.notifications_list.items:
+            return False  # Se quitó la última: mostrar el estado vacío
+        
+        self.count_text.value = f"{len(self.notifications_list.items)} notificaciones"
+        if self.count_text.page:
+            self.count_text.update()
+        return True
     
     def refresh_notifications(self):
         """Refrescar lista de notificaciones"""
         if self.db_manager and self.current_user and self.notifications_list:
             notifications = self.db_manager.get_user_notifications(self.current_user.id)
-            self.notifications_list.controls = self._create_notification_cards(notifications)
-            self.notifications_list.update()
+            self.notifications_list.load_more = self._make_loader(notifications)
+            self.notifications_list.reset()
+            self.notifications_list.list_view.update()
     
     def handle_notification_click(self, notification):
         """Manejar clic en notificación"""
@@ -9,6 +9,8 @@ class ProfilePage:
         self.content = None
         self.current_user = None
         self.page_callbacks = {}
+        # Imagen original -> versión "thumb" de los posts del perfil
+        self.post_thumbnails = {}
         
         self.default_user_data = {
             "name": "Usuario TeamUP",
@@ -28,6 +30,10 @@ class ProfilePage:
     def create_content(self):
         colors = self.theme_manager.get_theme_colors()
         
+        if self.current_user and self.db_manager:
+            # Contadores actualizados (la caché de perfiles evita ir a SQLite cada vez)
+            self.current_user = self.db_manager.get_user_by_id(self.current_user.id) or self.current_user
+        
         if self.current_user:
             user_data = {
                 "name": self.current_user.full_name,
@@ -44,6 +50,10 @@ class ProfilePage:
             user_posts = []
             if self.db_manager:
                 user_posts = self.db_manager.get_user_posts(self.current_user.id)
+                # La grilla muestra las fotos a 100 px: pedir la versión "thumb"
+                self.post_thumbnails = self.db_manager.get_image_renditions(
+                    (post.image_url for post in user_posts), "thumb"
+                )
         else:
             user_data = self.default_user_data
             user_posts = []
@@ -229,7 +239,7 @@ class ProfilePage:
                 content=ft.Column(
                     controls=[
                         ft.Image(
-                            src=post.image_url,
+                            src=self.post_thumbnails.get(post.image_url, post.image_url),
                             height=100,
                             fit=ft.ImageFit.COVER,
                             border_radius=5
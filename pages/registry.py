@@ -0,0 +1,35 @@
+import importlib
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class PageRegistry:
+    """Páginas de la app: cada una se importa y se construye en su primera navegación.
+
+    register() solo anota el módulo, la clase y la fábrica; get() importa el
+    módulo, construye la página con la fábrica (que recibe la clase) y la
+    guarda para las navegaciones siguientes. loaded() devuelve la página sin
+    construirla, para avisar de un cambio solo a las que ya existen.
+    """
+
+    def __init__(self):
+        self._factories: Dict[str, Tuple[str, str, Callable[[type], Any]]] = {}
+        self._pages: Dict[str, Any] = {}
+        # Segundos de importación + construcción de cada página cargada
+        self.load_times: Dict[str, float] = {}
+
+    def register(self, name: str, module: str, class_name: str, factory: Callable[[type], Any]):
+        self._factories[name] = (module, class_name, factory)
+
+    def get(self, name: str):
+        page = self._pages.get(name)
+        if page is None:
+            module, class_name, factory = self._factories[name]
+            start = time.perf_counter()
+            page_class = getattr(importlib.import_module(module), class_name)
+            page = self._pages[name] = factory(page_class)
+            self.load_times[name] = time.perf_counter() - start
+        return page
+
+    def loaded(self, name: str) -> Optional[Any]:
+        return self._pages.get(name)
@@ -0,0 +1,284 @@
+import flet as ft
+from database.models import SearchResult
+
+# Resultados por página de búsqueda
+SEARCH_PAGE_SIZE = 20
+
+# Tags en tendencia que se sugieren con la búsqueda vacía
+TRENDING_TAGS_SHOWN = 8
+
+# Filtros de tipo disponibles: (etiqueta, tipos buscados)
+SEARCH_FILTERS = {
+    "todo": ("Todo", None),
+    "posts": ("Publicaciones", ["posts"]),
+    "users": ("Personas", ["users"]),
+    "comments": ("Comentarios", ["comments"]),
+}
+
+class SearchPage:
+    def __init__(self, theme_manager, db_manager=None):
+        self.theme_manager = theme_manager
+        self.db_manager = db_manager
+        self.content = None
+        self.on_back = None
+        self.search_field = None
+        self.filter_chips = {}
+        self.results_list = None
+        self.load_more_button = None
+        self.query = ""
+        self.current_filter = "todo"
+        self.next_cursor = None
+
+    def create_content(self):
+        colors = self.theme_manager.get_theme_colors()
+
+        self.search_field = ft.TextField(
+            label="Buscar personas, publicaciones...",
+            value=self.query,
+            expand=True,
+            autofocus=True,
+            prefix_icon=ft.Icons.SEARCH,
+            color=colors["text_primary"],
+            border_color=colors["divider_color"],
+            on_submit=self.on_search_submit
+        )
+
+        self.filter_chips = {
+            key: ft.Chip(
+                label=ft.Text(label),
+                selected=key == self.current_filter,
+                on_select=lambda e, k=key: self.on_filter_change(k)
+            )
+            for key, (label, _) in SEARCH_FILTERS.items()
+        }
+
+        header = ft.Container(
+            bgcolor=colors["card_bg"],
+            padding=15,
+            margin=ft.margin.only(bottom=10),
+            border_radius=15,
+            content=ft.Column(
+                controls=[
+                    ft.Row(
+                        controls=[
+                            ft.IconButton(
+                                icon=ft.Icons.ARROW_BACK,
+                                icon_color=colors["text_primary"],
+                                tooltip="Volver",
+                                on_click=self.go_back
+                            ),
+                            self.search_field,
+                        ],
+                        vertical_alignment=ft.CrossAxisAlignment.CENTER
+                    ),
+                    ft.Row(
+                        controls=list(self.filter_chips.values()),
+                        scroll=ft.ScrollMode.AUTO,
+                        spacing=5
+                    ),
+                ],
+                spacing=10
+            )
+        )
+
+        self.load_more_button = ft.TextButton(
+            "Ver más resultados",
+            visible=False,
+            on_click=self.load_more
+        )
+        self.results_list = ft.ListView(expand=True, spacing=10, padding=0)
+        self._run_search()
+
+        self.content = ft.Container(
+            padding=10,
+            expand=True,
+            content=ft.Column(
+                controls=[header, self.results_list, self.load_more_button],
+                spacing=0,
+                expand=True,
+                horizontal_alignment=ft.CrossAxisAlignment.CENTER
+            )
+        )
+        return self.content
+
+    def _run_search(self, append: bool = False):
+        """Ejecutar la búsqueda actual y mostrar la primera página (o la siguiente)"""
+        if not append:
+            self.results_list.controls = []
+            self.next_cursor = None
+
+        if not self.db_manager:
+            self.results_list.controls = [self._create_message("Búsqueda no disponible sin base de datos")]
+            self.load_more_button.visible = False
+            return
+        if not self.query.strip():
+            self.results_list.controls = [
+                self._create_message("Escribe algo para buscar"),
+                self._create_trending_tags(),
+            ]
+            self.load_more_button.visible = False
+            return
+
+        cursor = self.next_cursor if append else None
+        if self.query.strip().startswith("#"):
+            # Búsqueda por hashtag: posts del índice de tags, del más nuevo al más viejo
+            posts, self.next_cursor = self.db_manager.get_posts_by_tag(
+                self.query.strip(), cursor=cursor, limit=SEARCH_PAGE_SIZE
+            )
+            results = [
+                SearchResult(kind="posts", id=post.id, title=post.username, text=post.caption,
+                             user_id=post.user_id, avatar_url=post.user_avatar)
+                for post in posts
+            ]
+        else:
+            _, kinds = SEARCH_FILTERS[self.current_filter]
+            results, self.next_cursor = self.db_manager.search(
+                self.query, kinds=kinds, limit=SEARCH_PAGE_SIZE, cursor=cursor
+            )
+        self.results_list.controls.extend(self._create_result_card(result) for result in results)
+        if not self.results_list.controls:
+            self.results_list.controls = [self._create_message(f"Sin resultados para \"{self.query}\"")]
+        self.load_more_button.visible = self.next_cursor is not None
+
+    def _create_trending_tags(self):
+        """Chips con los tags en tendencia; al tocarlos se busca el tag"""
+        colors = self.theme_manager.get_theme_colors()
+        trending = self.db_manager.get_trending_tags(TRENDING_TAGS_SHOWN)
+        if not trending:
+            return ft.Container()
+        return ft.Column(
+            controls=[
+                ft.Text("Tendencias", size=16, weight=ft.FontWeight.BOLD, color=colors["text_primary"]),
+                ft.Row(
+                    controls=[
+                        ft.Chip(
+                            label=ft.Text(f"#{tag} · {uses}"),
+                            on_click=lambda e, t=tag: self.search_tag(t)
+                        )
+                        for tag, uses in trending
+                    ],
+                    wrap=True,
+                    spacing=5
+                ),
+            ],
+            spacing=10
+        )
+
+    def search_tag(self, tag):
+        """Buscar los posts de un hashtag"""
+        self.query = f"#{tag}"
+        self.search_field.value = self.query
+        self._run_search()
+        self.content.update()
+
+    def _create_message(self, text):
+        colors = self.theme_manager.get_theme_colors()
+        return ft.Container(
+            padding=40,
+            content=ft.Text(
+                text,
+                size=16,
+                color=colors["text_secondary"],
+                text_align=ft.TextAlign.CENTER
+            )
+        )
+
+    def _create_result_card(self, result: SearchResult):
+        """Crear la tarjeta de un resultado"""
+        colors = self.theme_manager.get_theme_colors()
+        icon, subtitle = {
+            "posts": (ft.Icons.PHOTO, "Publicación"),
+            "users": (ft.Icons.PERSON, "Perfil"),
+            "comments": (ft.Icons.COMMENT, "Comentario"),
+        }[result.kind]
+
+        return ft.Container(
+            bgcolor=colors["card_bg"],
+            padding=15,
+            border_radius=10,
+            content=ft.Row(
+                controls=[
+                    ft.Image(
+                        src=result.avatar_url or "https://i.pravatar.cc/150?img=1",
+                        width=45,
+                        height=45,
+                        fit=ft.ImageFit.COVER,
+                        border_radius=ft.border_radius.all(22)
+                    ),
+                    ft.Column(
+                        controls=[
+                            ft.Row(
+                                controls=[
+                                    ft.Text(
+                                        result.title,
+                                        size=14,
+                                        weight=ft.FontWeight.BOLD,
+                                        color=colors["text_primary"]
+                                    ),
+                                    ft.Icon(icon, size=14, color=colors["text_secondary"]),
+                                    ft.Text(subtitle, size=11, color=colors["text_secondary"]),
+                                ],
+                                spacing=5
+                            ),
+                            ft.Text(
+                                result.text,
+                                size=13,
+                                color=colors["text_secondary"],
+                                max_lines=2,
+                                overflow=ft.TextOverflow.ELLIPSIS
+                            ),
+                        ],
+                        spacing=3,
+                        expand=True
+                    ),
+                ],
+                spacing=10
+            ),
+            on_click=lambda e, r=result: self.handle_result_click(r)
+        )
+
+    def on_search_submit(self, e):
+        """Buscar al presionar Enter"""
+        self.query = e.control.value or ""
+        self._run_search()
+        self.content.update()
+
+    def on_filter_change(self, key):
+        """Cambiar el tipo de resultados y repetir la búsqueda"""
+        self.current_filter = key
+        for chip_key, chip in self.filter_chips.items():
+            chip.selected = chip_key == key
+        self.query = self.search_field.value or ""
+        self._run_search()
+        self.content.update()
+
+    def load_more(self, e):
+        """Cargar la siguiente página de resultados"""
+        if self.next_cursor:
+            self._run_search(append=True)
+            self.results_list.update()
+            self.load_more_button.update()
+
+    def handle_result_click(self, result: SearchResult):
+        """Manejar clic en un resultado"""
+        if result.kind == "users":
+            print(f"Navegando al perfil de {result.title}")
+        else:
+            post_id = result.post_id if result.kind == "comments" else result.id
+            print(f"Navegando al post {post_id}")
+
+    def go_back(self, e):
+        """Volver a la página anterior"""
+        if self.on_back:
+            self.on_back()
+
+    def update_theme(self):
+        """Actualizar tema"""
+        if not self.content:
+            return  # Aún no existe la UI
+
+        colors = self.theme_manager.get_theme_colors()
+        if self.search_field and self.search_field.page:
+            self.search_field.color = colors["text_primary"]
+            self.search_field.border_color = colors["divider_color"]
+            self.search_field.update()
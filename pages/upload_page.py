@@ -1,8 +1,18 @@
 import flet as ft
-import os
-import shutil
 from database.database_manager import DatabaseManager
-from database.models import Post
+from database.uploads import (
+    UPLOAD_CANCELLED, UPLOAD_DONE, UPLOAD_FAILED, UPLOAD_PROCESSING, UPLOAD_QUEUED, UPLOAD_SAVING
+)
+
+# Texto bajo la barra de progreso de cada subida
+UPLOAD_STATUS_LABELS = {
+    UPLOAD_QUEUED: "En espera",
+    UPLOAD_PROCESSING: "Procesando imagen…",
+    UPLOAD_SAVING: "Guardando publicación…",
+    UPLOAD_DONE: "Publicada",
+    UPLOAD_CANCELLED: "Cancelada",
+    UPLOAD_FAILED: "Error",
+}
 
 class UploadPage:
     def __init__(self, theme_manager, db_manager: DatabaseManager, current_user, upload_callback):
@@ -20,9 +30,9 @@ class UploadPage:
         self.success_text = ft.Text()
         self.file_picker = ft.FilePicker()
         
-        # Crear directorio para imágenes si no existe
-        self.images_dir = "assets/images/posts"
-        os.makedirs(self.images_dir, exist_ok=True)
+        # Subidas en curso o terminadas: id -> (barra, estado, botón cancelar)
+        self.uploads_column = ft.Column(spacing=8)
+        self.upload_rows = {}
     
     def create_content(self):
         colors = self.theme_manager.get_theme_colors()
@@ -37,6 +47,9 @@ class UploadPage:
             hint_text="Comparte tu viaje atlético..."
         )
         
+        self.uploads_column = ft.Column(spacing=8, horizontal_alignment=ft.CrossAxisAlignment.CENTER)
+        self._create_upload_rows()
+        
         # Configurar file picker
         self.file_picker = ft.FilePicker(
             on_result=self.on_file_picked
@@ -138,7 +151,7 @@ class UploadPage:
                     ft.Row(
                         controls=[
                             ft.ElevatedButton(
-                                "Cancelar",
+                                "Volver",
                                 width=150,
                                 bgcolor=colors["card_bg"],
                                 color=colors["text_primary"],
@@ -155,6 +168,11 @@ class UploadPage:
                         alignment=ft.MainAxisAlignment.CENTER,
                         spacing=20
                     ),
+                    
+                    # Progreso de las subidas en segundo plano
+                    ft.Container(height=20),
+                    self.uploads_column,
+                    ft.Container(height=20),
                 ],
                 horizontal_alignment=ft.CrossAxisAlignment.CENTER,
                 scroll=ft.ScrollMode.AUTO
@@ -202,28 +220,6 @@ class UploadPage:
     
     
     
-    def save_image_locally(self, source_path: str) -> str:
-        """Guardar imagen localmente y retornar la ruta"""
-        if source_path.startswith("http"):
-            # Es una URL de muestra, no necesita guardarse localmente
-            return source_path
-        
-        try:
-            # Generar nombre único para el archivo
-            import uuid
-            file_extension = os.path.splitext(source_path)[1]
-            unique_filename = f"{uuid.uuid4()}{file_extension}"
-            destination_path = os.path.join(self.images_dir, unique_filename)
-            
-            # Copiar archivo
-            shutil.copy2(source_path, destination_path)
-            
-            # Retornar ruta relativa
-            return destination_path
-            
-        except Exception as e:
-            raise Exception(f"Error al guardar imagen: {str(e)}")
-    
     def handle_upload(self, e):
         if not self.validate_form():
             return
@@ -232,31 +228,82 @@ class UploadPage:
             self.show_error("Por favor inicia sesión para crear publicaciones")
             return
         
-        try:
-            # Guardar imagen localmente
-            image_path = self.save_image_locally(self.selected_image_path)
-            
-            # Crear objeto publicación
-            new_post = Post(
-                user_id=self.current_user.current.id,
-                caption=self.caption_field.value.strip(),
-                image_url=image_path  # Usar ruta local en lugar de URL
+        # La imagen se procesa en segundo plano: la UI no se congela con fotos grandes
+        upload_queue = self.db_manager.enable_upload_queue()
+        job = upload_queue.submit(
+            self.current_user.current.id,
+            self.caption_field.value.strip(),
+            self.selected_image_path
+        )
+        self.apply_upload_event(job)
+        self.show_success("Publicando en segundo plano. Puedes seguir usando la app.")
+        self.clear_form()
+    
+    def _create_upload_rows(self):
+        """Filas de progreso de las subidas de esta sesión"""
+        self.upload_rows = {}
+        self.uploads_column.controls = []
+        if not self.current_user.current or not self.db_manager.upload_queue:
+            return
+        for job in self.db_manager.upload_queue.jobs_for(self.current_user.current.id):
+            self._add_upload_row(job)
+    
+    def _add_upload_row(self, job):
+        colors = self.theme_manager.get_theme_colors()
+        caption = job.caption if len(job.caption) <= 30 else job.caption[:29] + "…"
+        progress_bar = ft.ProgressBar(width=220, color=ft.Colors.RED_500, bgcolor=colors["divider_color"])
+        status_text = ft.Text(size=11, color=colors["text_secondary"])
+        cancel_button = ft.IconButton(
+            icon=ft.Icons.CLOSE,
+            icon_size=18,
+            tooltip="Cancelar subida",
+            on_click=lambda e, job_id=job.id: self.cancel_upload(job_id)
+        )
+        row = ft.Container(
+            width=320,
+            padding=10,
+            bgcolor=colors["card_bg"],
+            border_radius=10,
+            content=ft.Row(
+                controls=[
+                    ft.Column(
+                        controls=[
+                            ft.Text(caption, size=13, color=colors["text_primary"]),
+                            progress_bar,
+                            status_text,
+                        ],
+                        spacing=4,
+                        expand=True
+                    ),
+                    cancel_button,
+                ],
+                vertical_alignment=ft.CrossAxisAlignment.CENTER
             )
-            
-            # Intentar crear publicación
-            post_id = self.db_manager.create_post(new_post)
-            if post_id:
-                self.show_success("¡Publicación creada exitosamente!")
-                # Limpiar formulario y regresar después de un retraso
-                self.clear_form()
-                # Regresar a la página anterior después de 2 segundos
-                import threading
-                threading.Timer(2.0, lambda: self.upload_callback()).start()
-            else:
-                self.show_error("Error al crear la publicación. Inténtalo de nuevo.")
-                
-        except Exception as ex:
-            self.show_error(f"Error al procesar imagen: {str(ex)}")
+        )
+        self.upload_rows[job.id] = (progress_bar, status_text, cancel_button)
+        self.uploads_column.controls.insert(0, row)
+        self._update_upload_row(job)
+    
+    def _update_upload_row(self, job):
+        progress_bar, status_text, cancel_button = self.upload_rows[job.id]
+        progress_bar.value = job.progress
+        status_text.value = UPLOAD_STATUS_LABELS.get(job.state, job.state)
+        if job.state == UPLOAD_FAILED and job.error:
+            status_text.value += f": {job.error}"
+        cancel_button.visible = not job.finished and job.state != UPLOAD_SAVING
+    
+    def apply_upload_event(self, job):
+        """Reflejar en la página el estado de una subida (llamar desde el loop de Flet)"""
+        if job.id in self.upload_rows:
+            self._update_upload_row(job)
+        else:
+            self._add_upload_row(job)
+        if self.uploads_column.page:
+            self.uploads_column.update()
+    
+    def cancel_upload(self, job_id: int):
+        if self.db_manager.upload_queue and not self.db_manager.upload_queue.cancel(job_id):
+            self.show_error("La publicación ya se está guardando")
     
     def validate_form(self):
         if not self.caption_field.value or not self.caption_field.value.strip():
@@ -0,0 +1,365 @@
+"""Caché en disco de imágenes remotas (avatares, posts de ejemplo).
+
+resolve(url) devuelve la ruta local si la imagen ya está guardada; si no,
+devuelve la URL original y un hilo la descarga para la próxima tarjeta. Las
+entradas vencidas se siguen sirviendo mientras se revalidan en segundo plano
+con If-None-Match / If-Modified-Since: un 304 renueva la entrada sin volver
+a bajar los bytes. Al superar max_bytes se borran las menos usadas (LRU).
+
+El índice (URL, ETag, fechas, tamaño) vive en index.db dentro del directorio
+de la caché; los accesos se anotan en memoria y se guardan con flush().
+"""
+import email.utils
+import hashlib
+import os
+import queue
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional
+
+# Directorio de la caché (relativo a la raíz de la app, como las imágenes subidas)
+IMAGE_CACHE_ROOT = os.path.join("assets", "images", "cache")
+
+# Tope del total en disco; al pasarlo se borran las imágenes menos usadas
+IMAGE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Imágenes más grandes que esto no se guardan
+IMAGE_CACHE_MAX_ITEM_BYTES = 8 * 1024 * 1024
+
+# Vigencia si el servidor no manda Cache-Control: max-age
+IMAGE_CACHE_FRESH_SECONDS = 24 * 3600
+
+# Descargas en paralelo en segundo plano
+IMAGE_CACHE_WORKERS = 4
+
+IMAGE_CACHE_TIMEOUT = 10.0
+
+IMAGE_CACHE_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS image_cache (
+        url TEXT PRIMARY KEY,
+        path TEXT NOT NULL,
+        bytes INTEGER NOT NULL,
+        etag TEXT,
+        last_modified TEXT,
+        fetched_at REAL NOT NULL,
+        max_age REAL NOT NULL,
+        last_access REAL NOT NULL
+    ) WITHOUT ROWID
+'''
+
+IMAGE_EXTENSIONS = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/webp": ".webp",
+    "image/gif": ".gif",
+    "image/svg+xml": ".svg",
+}
+
+MAX_AGE_PATTERN = re.compile(r"max-age=(\d+)")
+
+
+@dataclass
+class CacheEntry:
+    url: str
+    path: str
+    bytes: int
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+    max_age: float
+    last_access: float
+
+    def is_fresh(self, now: float) -> bool:
+        return now - self.fetched_at < self.max_age
+
+
+def is_remote(url: Optional[str]) -> bool:
+    return bool(url) and url.startswith(("http://", "https://"))
+
+
+class ImageCache:
+    def __init__(self, root: str = IMAGE_CACHE_ROOT, max_bytes: int = IMAGE_CACHE_MAX_BYTES,
+                 fresh_seconds: float = IMAGE_CACHE_FRESH_SECONDS, workers: int = IMAGE_CACHE_WORKERS,
+                 timeout: float = IMAGE_CACHE_TIMEOUT):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.fresh_seconds = fresh_seconds
+        self.timeout = timeout
+        self.stats = {"hits": 0, "misses": 0, "downloads": 0, "revalidated": 0, "evicted": 0, "errors": 0}
+
+        # URL -> entrada, de la menos a la más usada
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._total_bytes = 0
+        self._touched = set()
+        self._in_flight = set()
+        self._lock = threading.Lock()
+
+        os.makedirs(root, exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(root, "index.db"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute(IMAGE_CACHE_SCHEMA)
+        self._load_index()
+
+        self._queue = queue.Queue()
+        self._workers = [
+            threading.Thread(target=self._run, name=f"image-cache-{i}", daemon=True)
+            for i in range(max(1, workers))
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def _load_index(self):
+        missing = []
+        rows = self._conn.execute('''
+            SELECT url, path, bytes, etag, last_modified, fetched_at, max_age, last_access
+            FROM image_cache ORDER BY last_access
+        ''').fetchall()
+        for row in rows:
+            entry = CacheEntry(*row)
+            if os.path.exists(entry.path):
+                self._entries[entry.url] = entry
+                self._total_bytes += entry.bytes
+            else:
+                missing.append((entry.url,))
+        if missing:
+            self._conn.executemany("DELETE FROM image_cache WHERE url = ?", missing)
+            self._conn.commit()
+
+    def resolve(self, url: Optional[str]) -> Optional[str]:
+        """Ruta local de la imagen si está en caché; si no, la URL (y se descarga en segundo plano)"""
+        if not is_remote(url):
+            return url
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry:
+                self._entries.move_to_end(url)
+                entry.last_access = now
+                self._touched.add(url)
+                self.stats["hits"] += 1
+                fresh = entry.is_fresh(now)
+            else:
+                self.stats["misses"] += 1
+        if not entry or not fresh:
+            # Vencida: se sigue mostrando la copia local mientras se revalida
+            self.prefetch([url])
+        return entry.path if entry else url
+
+    def prefetch(self, urls: Iterable[Optional[str]]) -> int:
+        """Encolar la descarga o revalidación de las URLs que lo necesiten; devuelve cuántas"""
+        now = time.time()
+        queued = 0
+        with self._lock:
+            for url in urls:
+                if not is_remote(url) or url in self._in_flight:
+                    continue
+                entry = self._entries.get(url)
+                if entry and entry.is_fresh(now):
+                    continue
+                self._in_flight.add(url)
+                self._queue.put(url)
+                queued += 1
+        return queued
+
+    def wait(self):
+        """Esperar a que terminen las descargas encoladas"""
+        self._queue.join()
+
+    def fetch(self, url: str) -> Optional[str]:
+        """Descargar (o revalidar) ahora; devuelve la ruta local o None si no se pudo"""
+        with self._lock:
+            entry = self._entries.get(url)
+        request = urllib.request.Request(url, headers={"User-Agent": "TeamUP"})
+        if entry:
+            if entry.etag:
+                request.add_header("If-None-Match", entry.etag)
+            if entry.last_modified:
+                request.add_header("If-Modified-Since", entry.last_modified)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                headers = response.headers
+                content_type = headers.get_content_type()
+                data = response.read(IMAGE_CACHE_MAX_ITEM_BYTES + 1)
+        except urllib.error.HTTPError as e:
+            if e.code == 304 and entry:
+                self._revalidated(entry, e.headers)
+                return entry.path
+            return self._fetch_failed(url, entry, f"HTTP {e.code}")
+        except (urllib.error.URLError, OSError) as e:
+            return self._fetch_failed(url, entry, e)
+
+        if not content_type.startswith("image/") or len(data) > IMAGE_CACHE_MAX_ITEM_BYTES:
+            return self._fetch_failed(url, entry, f"respuesta no cacheable ({content_type}, {len(data)} bytes)")
+
+        digest = hashlib.sha256(url.encode()).hexdigest()
+        extension = IMAGE_EXTENSIONS.get(content_type, ".img")
+        path = os.path.join(self.root, digest[:2], digest + extension)
+        self._write_file(path, data)
+
+        now = time.time()
+        new_entry = CacheEntry(url, path, len(data), headers.get("ETag"), headers.get("Last-Modified"),
+                               now, self._max_age(headers), entry.last_access if entry else now)
+        with self._lock:
+            previous = self._entries.pop(url, None)
+            if previous:
+                self._total_bytes -= previous.bytes
+                if previous.path != path:
+                    self._remove_file(previous.path)
+            self._entries[url] = new_entry
+            self._total_bytes += new_entry.bytes
+            self._save_entry(new_entry)
+            self._evict()
+            self._conn.commit()
+            self.stats["downloads"] += 1
+        return path
+
+    def _max_age(self, headers) -> float:
+        cache_control = headers.get("Cache-Control") or ""
+        if "no-cache" in cache_control or "no-store" in cache_control:
+            return 0
+        match = MAX_AGE_PATTERN.search(cache_control)
+        if match:
+            return int(match.group(1))
+        expires = headers.get("Expires")
+        if expires:
+            try:
+                return max(0.0, email.utils.parsedate_to_datetime(expires).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+        return self.fresh_seconds
+
+    def _revalidated(self, entry: CacheEntry, headers):
+        with self._lock:
+            entry.fetched_at = time.time()
+            entry.max_age = self._max_age(headers)
+            # El 304 puede traer un ETag nuevo para la misma representación
+            entry.etag = headers.get("ETag") or entry.etag
+            # Pudo desalojarse mientras se revalidaba
+            if entry.url in self._entries:
+                self._save_entry(entry)
+                self._conn.commit()
+            self.stats["revalidated"] += 1
+
+    def _fetch_failed(self, url: str, entry: Optional[CacheEntry], reason) -> Optional[str]:
+        print(f"Error al descargar imagen {url}: {reason}")
+        with self._lock:
+            self.stats["errors"] += 1
+        # Sin red se sigue usando la copia vencida
+        return entry.path if entry else None
+
+    def _save_entry(self, entry: CacheEntry):
+        """Requiere _lock"""
+        self._conn.execute('''
+            INSERT OR REPLACE INTO image_cache
+                (url, path, bytes, etag, last_modified, fetched_at, max_age, last_access)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (entry.url, entry.path, entry.bytes, entry.etag, entry.last_modified,
+              entry.fetched_at, entry.max_age, entry.last_access))
+        self._touched.discard(entry.url)
+
+    def _evict(self):
+        """Borrar las menos usadas hasta volver bajo el tope; requiere _lock"""
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            url, entry = self._entries.popitem(last=False)
+            self._total_bytes -= entry.bytes
+            self._touched.discard(url)
+            self._conn.execute("DELETE FROM image_cache WHERE url = ?", (url,))
+            self._remove_file(entry.path)
+            self.stats["evicted"] += 1
+
+    @staticmethod
+    def _write_file(path: str, data: bytes):
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        # Archivo temporal + rename: una tarjeta nunca lee una imagen a medias
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @staticmethod
+    def _remove_file(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def flush(self):
+        """Guardar los últimos accesos para que el orden LRU sobreviva al reinicio"""
+        with self._lock:
+            touched = [(self._entries[url].last_access, url) for url in self._touched if url in self._entries]
+            self._touched.clear()
+            if touched:
+                self._conn.executemany("UPDATE image_cache SET last_access = ? WHERE url = ?", touched)
+                self._conn.commit()
+
+    def size(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._total_bytes}
+
+    def _run(self):
+        while True:
+            url = self._queue.get()
+            try:
+                if url is None:
+                    break
+                self.fetch(url)
+            except Exception as e:
+                print(f"Error en la caché de imágenes: {e}")
+            finally:
+                with self._lock:
+                    self._in_flight.discard(url)
+                self._queue.task_done()
+
+    def close(self):
+        """Detener las descargas pendientes y guardar el índice"""
+        for _ in self._workers:
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join(timeout=1)
+        self.flush()
+        with self._lock:
+            self._conn.close()
+
+
+# Una sola caché por proceso: todas las sesiones comparten el directorio, así
+# que comparten también el índice LRU, el tope max_bytes y los hilos
+_shared_cache = None
+_shared_sessions = 0
+_shared_lock = threading.Lock()
+
+
+def acquire_image_cache() -> ImageCache:
+    """Caché compartida por el proceso; cada llamada cuenta una sesión que la
+    devuelve con release_image_cache()"""
+    global _shared_cache, _shared_sessions
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = ImageCache()
+        _shared_sessions += 1
+        return _shared_cache
+
+
+def release_image_cache():
+    """Fin de una sesión: la última cierra la caché (hilos e índice)"""
+    global _shared_cache, _shared_sessions
+    with _shared_lock:
+        if _shared_cache is None:
+            return
+        _shared_sessions = max(0, _shared_sessions - 1)
+        if _shared_sessions:
+            return
+        cache, _shared_cache = _shared_cache, None
+    cache.close()
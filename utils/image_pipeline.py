@@ -0,0 +1,104 @@
+"""Ingesta de imágenes: se decodifican una vez y se guardan en varios tamaños.
+
+Cada imagen subida se orienta según su EXIF, se guarda sin metadatos (ni EXIF
+ni GPS) y se codifica en las versiones pedidas, de la más grande a la más
+chica. Los bytes de cada versión se entregan a store_blob (el almacén por
+contenido de DatabaseManager), así una foto repetida no ocupa más disco. Sin
+Pillow se guarda el original como única versión.
+"""
+import io
+import os
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+try:
+    from PIL import Image, ImageOps
+    PIL_AVAILABLE = True
+except ImportError:
+    Image = ImageOps = None
+    PIL_AVAILABLE = False
+
+# Versión -> (lado mayor en px, calidad). thumb: grilla del perfil (100 px);
+# feed: tarjeta del feed (200 px de alto a todo el ancho, pantallas 2x);
+# full: vista ampliada
+IMAGE_RENDITIONS = {
+    "full": (1600, 85),
+    "feed": (720, 80),
+    "thumb": (240, 75),
+}
+
+# Avatares: se muestran como círculos de 40 a 150 px
+AVATAR_RENDITIONS = {
+    "full": (480, 85),
+    "thumb": (160, 80),
+}
+
+# (bytes, extensión) -> (sha256, ruta)
+StoreBlob = Callable[[bytes, str], Tuple[str, str]]
+
+# Recibe la fracción completada (0 a 1); puede lanzar una excepción para cancelar
+Progress = Callable[[float], None]
+
+
+class Rendition(NamedTuple):
+    path: str
+    width: Optional[int]
+    height: Optional[int]
+    bytes: int
+    sha256: str
+
+
+def output_format() -> str:
+    """WebP si Pillow lo soporta (~30 % menos que JPEG a igual calidad), si no JPEG"""
+    if PIL_AVAILABLE:
+        Image.init()  # Registra los formatos; Image.SAVE está vacío hasta abrir la primera imagen
+        if "WEBP" in Image.SAVE:
+            return "WEBP"
+    return "JPEG"
+
+
+def ingest_image(source_path: str, store_blob: StoreBlob,
+                 renditions: Dict[str, Tuple[int, int]] = IMAGE_RENDITIONS,
+                 progress: Optional[Progress] = None) -> Dict[str, Rendition]:
+    """Codificar las versiones de una imagen y guardarlas con store_blob; devuelve versión -> Rendition.
+
+    progress se llama después de decodificar y de cada versión guardada.
+    """
+    progress = progress or (lambda fraction: None)
+    if not PIL_AVAILABLE:
+        with open(source_path, "rb") as f:
+            data = f.read()
+        progress(0.5)
+        digest, path = store_blob(data, os.path.splitext(source_path)[1].lower())
+        progress(1.0)
+        return {"full": Rendition(path, None, None, len(data), digest)}
+
+    image_format = output_format()
+    extension = ".webp" if image_format == "WEBP" else ".jpg"
+    results = {}
+    with Image.open(source_path) as original:
+        # draft() deja que el decodificador JPEG reduzca al leer (mucho más rápido con fotos grandes)
+        scale = max(size for size, _ in renditions.values()) / max(original.size)
+        if scale < 1:
+            original.draft("RGB", (int(original.width * scale) + 1, int(original.height * scale) + 1))
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ("RGB", "RGBA") or (image.mode == "RGBA" and image_format == "JPEG"):
+            image = image.convert("RGB")
+        # Decodificar es el paso más caro: cuenta como una versión más
+        steps = len(renditions) + 1
+        progress(1 / steps)
+
+        # Cada versión sale de la anterior, ya reducida
+        for name, (size, quality) in sorted(renditions.items(), key=lambda item: -item[1][0]):
+            image = image.copy()
+            image.thumbnail((size, size), Image.LANCZOS)
+            buffer = io.BytesIO()
+            # Sin exif= ni icc_profile=: el archivo se guarda sin metadatos
+            if image_format == "WEBP":
+                image.save(buffer, image_format, quality=quality, method=4)
+            else:
+                image.save(buffer, image_format, quality=quality, optimize=True, progressive=True)
+            data = buffer.getvalue()
+            digest, path = store_blob(data, extension)
+            results[name] = Rendition(path, image.width, image.height, len(data), digest)
+            progress((len(results) + 1) / steps)
+    return results